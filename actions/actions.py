@@ -10,26 +10,69 @@ import json
 import os
 
 from rasa_sdk import Action, Tracker
+from rasa_sdk.events import SlotSet
 from rasa_sdk.executor import CollectingDispatcher
 
-# Get API URL from environment variable, default to backend API for production
-API_BASE_URL = os.getenv("API_URL", "https://watch-shop-uzr4.onrender.com")
-
-
-def format_price_value(value: Optional[int]) -> Text:
-    """Format a price in VND into a concise human-readable string."""
-    if value is None:
-        return ""
-
-    def format_number(num: float) -> Text:
-        return str(int(num)) if num.is_integer() else f"{num:.1f}".rstrip("0").rstrip(".")
-
-    if value >= 1_000_000:
-        millions = value / 1_000_000
-        return f"{format_number(millions)} triệu"
-
-    thousands = value / 1000
-    return f"{format_number(thousands)}k"
+from actions.api import (
+    TAXONOMY_TTL,
+    get_json,
+    get_recommendations,
+    prefetch_searches,
+    search_params,
+    search_watches,
+)
+from actions.buckets import PRICE_BUCKETS, RATING_BUCKETS, bucket_buttons, bucket_replies
+from actions.cards import (
+    order_card,
+    order_status,
+    price_range_text,
+    rating_text,
+    recommendation_card,
+    watch_cards,
+)
+from actions.compression import install_reply_compression
+from actions.deadline import DeadlineExceeded, with_deadline
+from actions.encoding import install_reply_encoding
+from actions.lexicon import STRAP_MATERIAL, STYLE, VAGUE_PRICE, distinct_phrases, strap_material_lexicon
+from actions.normalizer import match_name, normalize_query
+from actions.orders import (
+    cancel_requested,
+    fetch_orders_with_statuses,
+    find_order,
+    invalidate_orders,
+    order_detail,
+    status_definitions,
+    status_of,
+)
+from actions.parsing import get_shop_filters
+from actions.promotions import promotions
+from actions.refinement import LAST_SEARCH_SLOT, SearchState, describe, is_complete, refinements
+
+# Rebuilds the replies of the price and rating buttons in the background
+bucket_replies.start()
+# Large webhook replies (product cards) are sent gzip compressed
+install_reply_compression()
+# and encoded with orjson, splicing the pre-encoded cards
+install_reply_encoding()
+
+
+def utter_degraded(dispatcher: CollectingDispatcher, tracker: Tracker) -> None:
+    """Reply of a search whose latency budget ran out: cached popular
+    watches, or a short message"""
+    token = tracker.latest_message.get("metadata", {}).get("token")
+    try:
+        # The budget is spent, only cached recommendations come back
+        data = get_recommendations(token, 5)
+        recommendations = data.get("data", {}).get("data", {}).get("recommendations", [])
+    except requests.exceptions.RequestException:
+        recommendations = []
+    if recommendations:
+        dispatcher.utter_message(
+            text="Hệ thống đang phản hồi chậm, bạn xem tạm các mẫu đồng hồ nổi bật nhé:",
+            custom={"type": "cards", "cards": [recommendation_card(rec) for rec in recommendations]}
+        )
+    else:
+        dispatcher.utter_message(text="Hệ thống đang phản hồi chậm, bạn vui lòng thử lại sau giây lát nhé.")
 
 
 class ActionShowBrands(Action):
@@ -38,6 +81,7 @@ class ActionShowBrands(Action):
     def name(self) -> Text:
         return "action_show_brands"
 
+    @with_deadline
     def run(self, dispatcher: CollectingDispatcher,
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
@@ -58,17 +102,8 @@ class ActionShowBrands(Action):
                 )
                 return []
 
-            # Call brands API with token
-            headers = {
-                "Authorization": f"Bearer {token}",
-                "Content-Type": "application/json"
-            }
-            
-            response = requests.get(f"{API_BASE_URL}/v1/brands", 
-                                 headers=headers, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
+            # Taxonomy is the same for every user, cached across processes
+            data = get_json("/v1/brands", token, ttl=TAXONOMY_TTL, persist=True)
             brands = data.get("brands", {}).get("items", [])
             
             if not brands:
@@ -96,6 +131,9 @@ class ActionShowBrands(Action):
                 buttons=buttons
             )
 
+            # The next message is likely a click on one of these buttons
+            prefetch_searches(token, [search_params(brand_id=b["id"]) for b in buttons])
+
         except requests.exceptions.RequestException as e:
             # Fallback to mock data on API error
             dispatcher.utter_message(
@@ -119,6 +157,7 @@ class ActionShowCategories(Action):
     def name(self) -> Text:
         return "action_show_categories"
 
+    @with_deadline
     def run(self, dispatcher: CollectingDispatcher,
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
@@ -141,17 +180,8 @@ class ActionShowCategories(Action):
                 )
                 return []
 
-            # Call categories API with token
-            headers = {
-                "Authorization": f"Bearer {token}",
-                "Content-Type": "application/json"
-            }
-            
-            response = requests.get(f"{API_BASE_URL}/v1/categorys", 
-                                 headers=headers, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
+            # Taxonomy is the same for every user, cached across processes
+            data = get_json("/v1/categorys", token, ttl=TAXONOMY_TTL, persist=True)
             categories = data.get("categorys", {}).get("items", [])
             
             if not categories:
@@ -179,6 +209,9 @@ class ActionShowCategories(Action):
                 buttons=buttons
             )
 
+            # The next message is likely a click on one of these buttons
+            prefetch_searches(token, [search_params(category_id=b["id"]) for b in buttons])
+
         except requests.exceptions.RequestException as e:
             # Fallback to mock data on API error
             dispatcher.utter_message(
@@ -204,6 +237,7 @@ class ActionShowColors(Action):
     def name(self) -> Text:
         return "action_show_colors"
 
+    @with_deadline
     def run(self, dispatcher: CollectingDispatcher,
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
@@ -227,17 +261,8 @@ class ActionShowColors(Action):
                 )
                 return []
 
-            # Call colors API with token
-            headers = {
-                "Authorization": f"Bearer {token}",
-                "Content-Type": "application/json"
-            }
-            
-            response = requests.get(f"{API_BASE_URL}/v1/colors", 
-                                 headers=headers, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
+            # Taxonomy is the same for every user, cached across processes
+            data = get_json("/v1/colors", token, ttl=TAXONOMY_TTL, persist=True)
             colors = data.get("colors", {}).get("items", [])
             
             if not colors:
@@ -265,6 +290,9 @@ class ActionShowColors(Action):
                 buttons=buttons
             )
 
+            # The next message is likely a click on one of these buttons
+            prefetch_searches(token, [search_params(color_id=b["id"]) for b in buttons])
+
         except requests.exceptions.RequestException as e:
             # Fallback to mock data on API error
             dispatcher.utter_message(
@@ -291,6 +319,7 @@ class ActionShowPopularWatches(Action):
     def name(self) -> Text:
         return "action_show_popular_watches"
 
+    @with_deadline
     def run(self, dispatcher: CollectingDispatcher,
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
@@ -300,23 +329,8 @@ class ActionShowPopularWatches(Action):
             latest_message = tracker.latest_message
             token = latest_message.get("metadata", {}).get("token")
 
-            headers = {"Content-Type": "application/json"}
-            if token:
-                headers["Authorization"] = f"Bearer {token}"
-
-            # Choose API endpoint based on token availability
-            if token:
-                # Use authenticated recommendations API
-                response = requests.get(f"{API_BASE_URL}/v1/recommendations?limit=5", 
-                                     headers=headers, timeout=10)
-            else:
-                # Use public recommendations API
-                response = requests.get(f"{API_BASE_URL}/v1/recommendations/public?limit=5", 
-                                     headers=headers, timeout=10)
-            
-            response.raise_for_status()
-            
-            data = response.json()
+            # Authenticated recommendations with a token, public ones otherwise
+            data = get_recommendations(token, 5)
             # API provides recommendations in data.data.recommendations (nested structure)
             recommendations = data.get("data", {}).get("data", {}).get("recommendations", [])
             
@@ -325,58 +339,7 @@ class ActionShowPopularWatches(Action):
                 return []
 
             # Build cards payload for FE
-            cards: List[Dict[str, Any]] = []
-            for rec in recommendations:
-                # Normalize gender value
-                gender_val = rec.get("gender") or rec.get("gender_target")
-                if gender_val in ("M", "F"):
-                    gender_val = "0" if gender_val == "M" else "1"
-                # Normalize slider list
-                slider_raw = rec.get("slider")
-                if isinstance(slider_raw, str):
-                    slider_list = [s.strip() for s in slider_raw.split(",") if s.strip()]
-                elif isinstance(slider_raw, list):
-                    slider_list = slider_raw
-                else:
-                    slider_list = rec.get("images", [])
-                # Thumbnail fallback
-                thumbnail = rec.get("thumbnail") or (rec.get("images", [None])[0] if rec.get("images") else None)
-                # Movement type name
-                movement_type_name = (rec.get("movement_type") or {}).get("name") or ", ".join(rec.get("movement_type_tags", []))
-                # Case material
-                case_material = rec.get("case_material") or ", ".join(rec.get("material_tags", []))
-
-                cards.append({
-                    "id": rec.get("watch_id"),
-                    "code": rec.get("code") or f"REC-{rec.get('watch_id')}",
-                    "name": rec.get("name"),
-                    "description": rec.get("description"),
-                    "model": rec.get("model") or rec.get("name"),
-                    "caseMaterial": case_material,
-                    "caseSize": rec.get("case_size"),
-                    "strapSize": rec.get("strap_size"),
-                    "gender": gender_val,
-                    "waterResistance": rec.get("water_resistance"),
-                    "releaseDate": rec.get("release_date"),
-                    "sold": rec.get("sold"),
-                    "basePrice": rec.get("base_price"),
-                    "rating": rec.get("rating"),
-                    "status": rec.get("status", True),
-                    "thumbnail": thumbnail,
-                    "slider": slider_list,
-                    "brandId": (rec.get("brand", {}) or {}).get("id"),
-                    "brandName": (rec.get("brand", {}) or {}).get("name"),
-                    "categoryId": (rec.get("category", {}) or {}).get("id"),
-                    "categoryName": (rec.get("category", {}) or {}).get("name"),
-                    "movementTypeId": None,
-                    "movementTypeName": movement_type_name,
-                    "colorTags": rec.get("color_tags", []),
-                    "styleTags": rec.get("style_tags", []),
-                    "priceTier": rec.get("price_tier"),
-                    "sizeCategory": rec.get("size_category"),
-                    "isAiRecommended": rec.get("is_ai_recommended"),
-                    "score": rec.get("score")
-                })
+            cards: List[Dict[str, Any]] = [recommendation_card(rec) for rec in recommendations]
 
             dispatcher.utter_message(
                 text="Top mẫu đồng hồ nổi bật/hot hiện tại:",
@@ -429,6 +392,7 @@ class ActionShowMovementTypes(Action):
     def name(self) -> Text:
         return "action_show_movement_types"
 
+    @with_deadline
     def run(self, dispatcher: CollectingDispatcher,
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
@@ -453,19 +417,8 @@ class ActionShowMovementTypes(Action):
                 )
                 return []
 
-            # Call movement-types API with token
-            headers = {
-                "Authorization": f"Bearer {token}",
-                "Content-Type": "application/json"
-            }
-            
-            response = requests.get(f"{API_BASE_URL}/v1/movement-type", 
-                                 headers=headers, timeout=10)
-            response.raise_for_status()
-            
-            # Handle encoding issues
-            response.encoding = 'utf-8'
-            data = response.json()
+            # Taxonomy is the same for every user, cached across processes
+            data = get_json("/v1/movement-type", token, ttl=TAXONOMY_TTL, persist=True)
             movement_types = data.get("movementTypes", {}).get("items", [])
             
             if not movement_types:
@@ -493,6 +446,9 @@ class ActionShowMovementTypes(Action):
                 buttons=buttons
             )
 
+            # The next message is likely a click on one of these buttons
+            prefetch_searches(token, [search_params(movement_type_id=b["id"]) for b in buttons])
+
         except requests.exceptions.RequestException as e:
             # Fallback to mock data on API error
             dispatcher.utter_message(
@@ -521,28 +477,7 @@ class ActionShowPrice(Action):
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
         # Create buttons for price ranges
-        buttons = [
-            {
-                "title": "Dưới 1 triệu",
-                "payload": "tôi muốn mua đồng hồ giá dưới 1 triệu"
-            },
-            {
-                "title": "1-3 triệu",
-                "payload": "tôi muốn mua đồng hồ giá từ 1 triệu đến 3 triệu"
-            },
-            {
-                "title": "3-7 triệu",
-                "payload": "tôi muốn mua đồng hồ giá từ 3 triệu đến 7 triệu"
-            },
-            {
-                "title": "7-15 triệu",
-                "payload": "tôi muốn mua đồng hồ giá từ 7 triệu đến 15 triệu"
-            },
-            {
-                "title": "Trên 15 triệu",
-                "payload": "tôi muốn mua đồng hồ giá trên 15 triệu"
-            }
-        ]
+        buttons = bucket_buttons(PRICE_BUCKETS)
         
         dispatcher.utter_message(
             text="Chọn khoảng giá bạn muốn xem:",
@@ -563,32 +498,7 @@ class ActionShowProductReviews(Action):
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
         
         # Create buttons for rating filters
-        buttons = [
-            {
-                "title": "Chưa đánh giá",
-                "payload": "tôi muốn mua đồng hồ từ 0 sao trở lên"
-            },
-            {
-                "title": "Trên 1 sao",
-                "payload": "tôi muốn mua đồng hồ từ 1 sao trở lên"
-            },
-            {
-                "title": "Trên 2 sao",
-                "payload": "tôi muốn mua đồng hồ từ 2 sao trở lên"
-            },
-            {
-                "title": "Trên 3 sao",
-                "payload": "tôi muốn mua đồng hồ từ 3 sao trở lên"
-            },
-            {
-                "title": "Trên 4 sao",
-                "payload": "tôi muốn mua đồng hồ từ 4 sao trở lên"
-            },
-            {
-                "title": "Trên 5 sao",
-                "payload": "tôi muốn mua đồng hồ từ 5 sao trở lên"
-            }
-        ]
+        buttons = bucket_buttons(RATING_BUCKETS)
         
         dispatcher.utter_message(
             text="Chọn mức đánh giá bạn muốn xem:",
@@ -604,6 +514,7 @@ class ActionShowStrapMaterials(Action):
     def name(self) -> Text:
         return "action_show_strap_materials"
 
+    @with_deadline
     def run(self, dispatcher: CollectingDispatcher,
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
@@ -624,19 +535,8 @@ class ActionShowStrapMaterials(Action):
                 )
                 return []
 
-            # Call strap materials API with token
-            headers = {
-                "Authorization": f"Bearer {token}",
-                "Content-Type": "application/json"
-            }
-            
-            response = requests.get(f"{API_BASE_URL}/v1/strap-materials", 
-                                 headers=headers, timeout=10)
-            response.raise_for_status()
-            
-            # Handle encoding issues
-            response.encoding = 'utf-8'
-            data = response.json()
+            # Taxonomy is the same for every user, cached across processes
+            data = get_json("/v1/strap-materials", token, ttl=TAXONOMY_TTL, persist=True)
             strap_materials = data.get("strapMaterials", {}).get("items", [])
             
             if not strap_materials:
@@ -664,6 +564,9 @@ class ActionShowStrapMaterials(Action):
                 buttons=buttons
             )
 
+            # The next message is likely a click on one of these buttons
+            prefetch_searches(token, [search_params(strap_material_id=b["id"]) for b in buttons])
+
         except requests.exceptions.RequestException as e:
             # Fallback to mock data on API error
             dispatcher.utter_message(
@@ -687,6 +590,7 @@ class ActionSearchProducts(Action):
     def name(self) -> Text:
         return "action_search_products"
 
+    @with_deadline
     def run(self, dispatcher: CollectingDispatcher,
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
@@ -703,19 +607,25 @@ class ActionSearchProducts(Action):
             ]):
                 # This is a filter request from FE metadata (e.g., category_id), use filter action instead
                 return ActionFilterProducts().run(dispatcher, tracker, domain)
+
+            # Last search of this conversation, a follow-up may narrow it
+            previous_search = refinements.load(tracker.sender_id, tracker.get_slot(LAST_SEARCH_SLOT))
+
+            # Price and rating buttons have fixed payloads, their replies are
+            # prebuilt (unless they narrow a previous search)
+            bucket_search = bucket_replies.search(user_text)
+            if bucket_search is not None and refinements.replaces(previous_search, bucket_search.filters):
+                bucket_reply = bucket_replies.reply(user_text)
+                if bucket_reply:
+                    dispatcher.utter_message(**bucket_reply)
+                    return [SlotSet(LAST_SEARCH_SLOT, refinements.save(tracker.sender_id, bucket_search))]
             
             # Get token from latest message metadata
             token = latest_message.get("metadata", {}).get("token")
-            
-            headers = {"Content-Type": "application/json"}
-            if token:
-                headers["Authorization"] = f"Bearer {token}"
 
             # Helper: fetch list and match by name appearing in user_text
-            def fetch_items(url_key: Text, key_path_items: List[Text]) -> List[Dict[str, Any]]:
-                resp = requests.get(url_key, headers=headers, timeout=10)
-                resp.raise_for_status()
-                data_json = resp.json()
+            def fetch_items(path: Text, key_path_items: List[Text]) -> List[Dict[str, Any]]:
+                data_json = get_json(path, token, ttl=TAXONOMY_TTL, persist=True)
                 data_cursor = data_json
                 for k in key_path_items:
                     data_cursor = data_cursor.get(k, {}) if isinstance(data_cursor, dict) else {}
@@ -729,342 +639,69 @@ class ActionSearchProducts(Action):
                         return data_cursor.get("rows", [])
                 return []
 
-            def find_first_match(items: List[Dict[str, Any]], field: Text = "name", synonyms: Dict[str, str] = None) -> Dict[str, Any]:
-                text = user_text
-                for it in items:
-                    name_val = (it.get(field) or "").lower()
-                    if not name_val:
-                        continue
-                    if name_val in text:
-                        return it
-                    # try synonyms mapping
-                    if synonyms:
-                        for syn, canon in synonyms.items():
-                            if syn in text and canon == name_val:
-                                return it
-                return {}
-
-            # Synonyms normalization for matching
-            color_synonyms = {
-                "gold": "vàng",
-                "vàng gold": "vàng",
-                "màu gold": "vàng",
-                "mạ vàng": "vàng",
-            }
+            # Canonical form (synonyms folded, stop words removed) used to
+            # match catalog names, which go through the same normalizer
+            query = normalize_query(user_text)
+
+            # Price, rating and gender come from ShopEntityExtractor in the NLU pipeline
+            price_range, rating_min, gender_code = get_shop_filters(latest_message)
 
-            # Helper function to parse price from text
-            def parse_price(text: str) -> tuple:
-                """
-                Parse price from Vietnamese text.
-                Returns tuple (min_price, max_price) in VND, or None if no price found.
-                Examples:
-                - "250k" -> (0, 250000)
-                - "1 triệu" -> (0, 1000000)
-                - "từ 100k đến 500k" -> (100000, 500000)
-                - "dưới 1 triệu" -> (0, 1000000)
-                - "trên 5 triệu" -> (5000000, None)
-                """
-                import re
-                
-                # Skip price parsing ONLY if text contains rating-related keywords WITHOUT price keywords
-                # This allows parsing price even when rating is present, as long as price keywords exist
-                text_lower = text.lower()
-                has_price_keywords = any(kw in text_lower for kw in ["giá", "triệu", "nghìn", "ngàn", "k ", "mua", "còn có", "m"])
-                has_rating_keywords = any(kw in text_lower for kw in ["sao", "rating", "đánh giá"])
-                
-                # Only skip if rating keywords exist but NO price keywords (to avoid false matches)
-                if has_rating_keywords and not has_price_keywords:
-                    return None
-                
-                # Normalize formatting: remove thousand separators but keep decimals, handle decimal commas
-                thousand_sep_regex = re.compile(r"(?<=\d)[\.,](?=\d{3}(?:\D|$))")
-                decimal_comma_regex = re.compile(r"(?<=\d),(?=\d)")
-                
-                text = thousand_sep_regex.sub("", text_lower)
-                text = decimal_comma_regex.sub(".", text)
-                
-                # Expand compact million notations (e.g., 2m4 -> 2.4 triệu, 1tr2 -> 1.2 triệu)
-                text = re.sub(r"(\d+)\s*m\s*(\d+)", r"\1.\2 triệu", text, flags=re.IGNORECASE)
-                text = re.sub(r"(\d+)\s*m\b", r"\1 triệu", text, flags=re.IGNORECASE)
-                text = re.sub(r"(\d+)\s*tr\s*(\d+)", r"\1.\2 triệu", text, flags=re.IGNORECASE)
-                text = re.sub(r"(\d+)\s*tr\b", r"\1 triệu", text, flags=re.IGNORECASE)
-                text = re.sub(r"(\d+)\s+triệu\s+(\d+)(?!\s*(?:nghìn|ngàn|k))", r"\1.\2 triệu", text)
-                
-                number_token = r"\d+(?:[\.,]\d+)?(?:\s*(?:m|tr|triệu|k|nghìn|ngàn))?(?:\s+\d+\s*(?:nghìn|ngàn|k))?"
-                
-                # Helper to convert text to number
-                def text_to_number(s):
-                    s = s.strip().lower()
-                    if not s:
-                        return None
-                    s = thousand_sep_regex.sub("", s)
-                    s = decimal_comma_regex.sub(".", s)
-                    s = s.replace("ngàn", "nghìn")
-                    s = re.sub(r"\s+", " ", s).strip()
-                    
-                    # Remove currency words for easier parsing
-                    for currency_word in ["vnd", "vnđ", "đồng", "đ"]:
-                        if s.endswith(currency_word):
-                            s = s[: -len(currency_word)].strip()
-                    
-                    # Patterns for million-based expressions
-                    match = re.fullmatch(r"(\d+)\s*(?:triệu|tr)\s+(\d+)\s*(?:nghìn|k)", s)
-                    if match:
-                        return int(match.group(1)) * 1000000 + int(match.group(2)) * 1000
-                    
-                    match = re.fullmatch(r"(\d+)\s*(?:triệu|tr)\s+(\d+)", s)
-                    if match:
-                        combined = float(f"{match.group(1)}.{match.group(2)}")
-                        return int(combined * 1000000)
-                    
-                    match = re.fullmatch(r"(\d+(?:\.\d+)?)\s*(?:triệu|tr|m)", s)
-                    if match:
-                        return int(float(match.group(1)) * 1000000)
-                    
-                    # Thousand-based expressions
-                    match = re.fullmatch(r"(\d+(?:\.\d+)?)\s*(?:k|nghìn)", s)
-                    if match:
-                        return int(float(match.group(1)) * 1000)
-                    
-                    # Plain number with optional decimal
-                    try:
-                        val = float(s)
-                        if val < 10000:
-                            return int(val * 1000)
-                        return int(val)
-                    except:
-                        pass
-                    
-                    # Handle "k" suffix (thousand)
-                    if s.endswith("k"):
-                        return int(float(s[:-1]) * 1000)
-                    # Handle "nghìn" fallback (if still present)
-                    if "nghìn" in s:
-                        num_part = s.replace("nghìn", "").strip()
-                        if num_part:
-                            return int(float(num_part) * 1000)
-                    
-                    return None
-                
-                # Pattern 1: "từ X đến Y" or "khoảng từ X đến Y" or "trong khoảng từ X đến Y"
-                range_pattern = rf"(?:từ|khoảng từ|trong khoảng từ)\s+({number_token})\s+đến\s+({number_token})"
-                match = re.search(range_pattern, text)
-                if match:
-                    min_val = text_to_number(match.group(1))
-                    max_val = text_to_number(match.group(2))
-                    if min_val is not None and max_val is not None:
-                        return (min_val, max_val)
-                
-                # Pattern 1b: "X đến Y" or "X - Y"
-                range_pattern_simple = rf"({number_token})\s+(?:đến|-)\s+({number_token})"
-                match = re.search(range_pattern_simple, text)
-                if match:
-                    min_val = text_to_number(match.group(1))
-                    max_val = text_to_number(match.group(2))
-                    if min_val is not None and max_val is not None:
-                        return (min_val, max_val)
-                
-                # Pattern 2: "dưới X" or "dưới X triệu" or "dưới Xk"
-                below_pattern = rf"dưới\s+({number_token})"
-                match = re.search(below_pattern, text)
-                if match:
-                    max_val = text_to_number(match.group(1))
-                    if max_val is not None:
-                        return (0, max_val)
-                
-                # Pattern 3: "trên X" or "từ X trở lên"
-                above_pattern = rf"(?:trên|từ)\s+({number_token})(?:\s+trở lên)?"
-                match = re.search(above_pattern, text)
-                if match:
-                    min_val = text_to_number(match.group(1))
-                    if min_val is not None:
-                        return (min_val, None)  # No upper limit
-                
-                # Pattern 4: "tầm X" or "khoảng X" or "cỡ X" or "còn có X"
-                exact_pattern = rf"(?:tầm|khoảng|cỡ|còn có)\s+({number_token})"
-                match = re.search(exact_pattern, text)
-                if match:
-                    val = text_to_number(match.group(1))
-                    if val is not None:
-                        # For exact price, use small range (e.g., ±10%)
-                        return (int(val * 0.9), int(val * 1.1))
-                
-                # Pattern 5: Just a number with k/tr/triệu/nghìn (e.g., "250k", "1 triệu")
-                simple_pattern = r"([\d\.\,\s]+(?:k|tr|triệu|nghìn|m))"
-                matches = re.findall(simple_pattern, text)
-                if matches:
-                    # Try to find price context
-                    if "giá" in text or "còn có" in text or "có" in text[:50] or "mua" in text:
-                        val = text_to_number(matches[0])
-                        if val is not None:
-                            return (0, val)
-                
-                # Pattern 6: Just a number without unit (e.g., "250 mua", "500 mua được")
-                # Assume it's in thousands if number is reasonable (100-9999)
-                number_pattern = r"^(\d{2,4})\s+(?:mua|đồng|k|triệu|nghìn)"
-                match = re.search(number_pattern, text)
-                if match:
-                    num = int(match.group(1))
-                    if 100 <= num <= 9999:
-                        # Assume it's thousands (250 → 250k)
-                        return (0, num * 1000)
-                
-                # Pattern 7: Number at start/end with "mua" context
-                number_with_context = r"(\d{2,4})\s+(?:mua|đồng|k|triệu|nghìn|được)"
-                match = re.search(number_with_context, text)
-                if match:
-                    num = int(match.group(1))
-                    if 100 <= num <= 9999:
-                        # Assume it's thousands (250 → 250k)
-                        return (0, num * 1000)
-                
-                return None
-            
-            # Helper function to parse rating from text
-            def parse_rating(text: str) -> int:
-                """
-                Parse rating from Vietnamese text.
-                Returns rating value (0-5) or None if no rating found.
-                Examples:
-                - "đồng hồ 4 sao" -> 4
-                - "rating từ 4" -> 4
-                - "đánh giá từ 4 sao trở lên" -> 4
-                - "4 sao trở lên" -> 4
-                - "từ 4 sao" -> 4
-                - "từ 0 sao trở lên" -> 0 (chưa đánh giá)
-                """
-                import re
-                
-                text = text.lower()
-                
-                # Pattern 1: "X sao" or "X sao trở lên" or "từ X sao"
-                rating_pattern = r"(?:từ\s+)?(\d)\s*sao(?:\s+trở\s+lên)?"
-                match = re.search(rating_pattern, text)
-                if match:
-                    rating = int(match.group(1))
-                    if 0 <= rating <= 5:  # Allow 0 for "chưa đánh giá"
-                        return rating
-                
-                # Pattern 2: "rating X" or "đánh giá X" or "rating từ X"
-                rating_pattern2 = r"(?:rating|đánh giá)(?:\s+từ)?\s+(\d)"
-                match = re.search(rating_pattern2, text)
-                if match:
-                    rating = int(match.group(1))
-                    if 0 <= rating <= 5:  # Allow 0 for "chưa đánh giá"
-                        return rating
-                
-                # Pattern 3: "X sao" standalone (if rating-related keywords present)
-                if "sao" in text or "rating" in text or "đánh giá" in text:
-                    rating_pattern3 = r"\b(\d)\s*sao"
-                    match = re.search(rating_pattern3, text)
-                    if match:
-                        rating = int(match.group(1))
-                        if 0 <= rating <= 5:  # Allow 0 for "chưa đánh giá"
-                            return rating
-                
-                return None
-            
-            # Parse price from user text
-            price_range = parse_price(user_text)
-            
-            # Parse rating from user text
-            rating_min = parse_rating(user_text)
-            
-            # Gender parse
-            gender_code = None
-            if " nam" in f" {user_text}" or user_text.startswith("nam"):
-                gender_code = "0"
-            if " nữ" in f" {user_text}" or user_text.startswith("nữ"):
-                gender_code = "1"
-            
-            # Check for vague price-related queries (should use recommend API)
-            vague_price_keywords = ["giá rẻ", "rẻ", "rẻ nhất", "giá tốt", "giá tốt nhất", "hợp lý", "hợp lý nhất", 
-                                     "giá bình dân", "giá phải chăng", "vừa túi tiền", "đáng mua", "nên mua", 
-                                     "tốt nhất", "hot nhất", "bán chạy nhất", "được yêu thích nhất"]
-            is_vague_query = any(keyword in user_text for keyword in vague_price_keywords)
-            
             # Try dynamic resolutions first (for filters)
             brand = {}
             category = {}
             color = {}
             movement_type = {}
             strap_material = {}
+            strap_materials_list = []
 
             try:
-                brands_list = fetch_items(f"{API_BASE_URL}/v1/brands", ["brands", "items"])
-                brand = find_first_match(brands_list)
+                brands_list = fetch_items("/v1/brands", ["brands", "items"])
+                # Brand names are often misspelled ("rolx"), allow typos
+                brand = match_name(query, brands_list, fuzzy=True)
             except Exception:
                 pass
 
             try:
-                categories_list = fetch_items(f"{API_BASE_URL}/v1/categorys", ["categorys", "items"])
-                category = find_first_match(categories_list)
+                categories_list = fetch_items("/v1/categorys", ["categorys", "items"])
+                category = match_name(query, categories_list)
             except Exception:
                 pass
 
             try:
-                colors_list = fetch_items(f"{API_BASE_URL}/v1/colors", ["colors", "items"])
-                color = find_first_match(colors_list, synonyms=color_synonyms)
-                if not color:
-                    # heuristic for gold if API color name differs
-                    if "gold" in user_text or "vàng gold" in user_text or "mạ vàng" in user_text:
-                        for c in colors_list:
-                            n = (c.get("name") or "").lower()
-                            if "vàng" in n or "gold" in n:
-                                color = c
-                                break
+                colors_list = fetch_items("/v1/colors", ["colors", "items"])
+                # "gold", "mạ vàng", ... and a color named "Vàng" share the term "vàng"
+                color = match_name(query, colors_list)
             except Exception:
                 pass
 
             try:
-                movement_types_list = fetch_items(f"{API_BASE_URL}/v1/movement-type", ["movementTypes", "items"])
-                movement_type = find_first_match(movement_types_list)
-                # quartz/automatic synonyms
-                if not movement_type:
-                    for it in movement_types_list:
-                        n = (it.get("name") or "").lower()
-                        if (("quartz" in user_text and ("quartz" in n or "máy pin" in n)) or
-                            ("automatic" in user_text and ("automatic" in n or "máy cơ" in n))):
-                            movement_type = it
-                            break
+                movement_types_list = fetch_items("/v1/movement-type", ["movementTypes", "items"])
+                # quartz/automatic fold into "máy pin"/"máy cơ" on both sides
+                movement_type = match_name(query, movement_types_list)
             except Exception:
                 pass
 
             try:
-                strap_materials_list = fetch_items(f"{API_BASE_URL}/v1/strap-materials", ["strapMaterials", "rows"])
-                # Avoid matching generic word "đồng" from "đồng hồ"; require explicit strap context
-                for it in strap_materials_list:
-                    n = (it.get("name") or "").lower()
-                    if not n:
-                        continue
-                    # require phrase patterns: "dây <name>" or "<name> dây"
-                    if f"dây {n}" in user_text or f"{n} dây" in user_text:
-                        strap_material = it
-                        break
-                    # handle synonyms for metal
-                    if n in ("kim loại", "thép") and "kim loại" in user_text:
-                        strap_material = it
-                        break
-                    # special case for copper ("đồng"): only match when "dây đồng" explicitly mentioned
-                    if n == "đồng" and "dây đồng" in user_text:
-                        strap_material = it
-                        break
+                strap_materials_list = fetch_items("/v1/strap-materials", ["strapMaterials", "rows"])
             except Exception:
                 pass
 
+            # One scan of the canonical text finds the vague-price words, style
+            # tokens and strap-material phrases ("dây <name>" or "<name> dây")
+            strap_names = tuple(normalize_query(it.get("name") or "").text for it in strap_materials_list)
+            hints = strap_material_lexicon(strap_names).scan(query.text)
+            strap_hits = hints.get(STRAP_MATERIAL)
+            if strap_hits:
+                # The first material in API order wins when several are mentioned
+                strap_material = strap_materials_list[min(hit.value for hit in strap_hits)]
+
             # Style tokens (sent to q if present)
-            style_tokens = []
-            for st in ["cổ điển", "classic", "vintage", "retro", "thể thao", "hiện đại"]:
-                if st in user_text:
-                    style_tokens.append(st)
+            style_tokens = distinct_phrases(hints.get(STYLE, []))
 
             # Check for vague price-related queries (should use recommend API)
             # Only check if no specific filters are found
-            vague_price_keywords = ["giá rẻ", "rẻ", "rẻ nhất", "giá tốt", "giá tốt nhất", "hợp lý", "hợp lý nhất", 
-                                     "giá bình dân", "giá phải chăng", "vừa túi tiền", "đáng mua", "nên mua", 
-                                     "tốt nhất", "hot nhất", "bán chạy nhất", "được yêu thích nhất"]
-            is_vague_query = any(keyword in user_text for keyword in vague_price_keywords)
-            
+            is_vague_query = VAGUE_PRICE in hints
+
             # If vague query without specific price, rating or filters, use recommend API
             if is_vague_query and price_range is None and rating_min is None and not any([
                 brand.get("id"), category.get("id"), color.get("id"), movement_type.get("id"), 
@@ -1072,74 +709,18 @@ class ActionSearchProducts(Action):
             ]):
                 # Use recommend API for vague queries
                 try:
-                    if token:
-                        rec_headers = {"Content-Type": "application/json"}
-                        rec_headers["Authorization"] = f"Bearer {token}"
-                        rec_resp = requests.get(
-                            f"{API_BASE_URL}/v1/recommendations",
-                            headers=rec_headers,
-                            params={"limit": 12},
-                            timeout=10,
-                        )
-                    else:
-                        rec_headers = {"Content-Type": "application/json"}
-                        rec_resp = requests.get(
-                            f"{API_BASE_URL}/v1/recommendations/public",
-                            headers=rec_headers,
-                            params={"limit": 12},
-                            timeout=10,
-                        )
-                    rec_resp.raise_for_status()
-                    rec_data = rec_resp.json()
+                    rec_data = get_recommendations(token, 12)
                     recs = rec_data.get("data", {}).get("data", {}).get("recommendations", [])
-                    cards: List[Dict[str, Any]] = []
-                    for rec in recs:
-                        gender_val = rec.get("gender") or rec.get("gender_target")
-                        if gender_val in ("M", "F"):
-                            gender_val = "0" if gender_val == "M" else "1"
-                        slider_raw = rec.get("slider")
-                        if isinstance(slider_raw, str):
-                            slider_list = [s.strip() for s in slider_raw.split(",") if s.strip()]
-                        elif isinstance(slider_raw, list):
-                            slider_list = slider_raw
-                        else:
-                            slider_list = rec.get("images", [])
-                        thumbnail = rec.get("thumbnail") or (rec.get("images", [None])[0] if rec.get("images") else None)
-                        movement_type_name = (rec.get("movement_type") or {}).get("name") or ", ".join(rec.get("movement_type_tags", []))
-                        case_material = rec.get("case_material") or ", ".join(rec.get("material_tags", []))
-                        cards.append({
-                            "id": rec.get("watch_id"),
-                            "code": rec.get("code") or f"REC-{rec.get('watch_id')}",
-                            "name": rec.get("name"),
-                            "description": rec.get("description"),
-                            "model": rec.get("model") or rec.get("name"),
-                            "caseMaterial": case_material,
-                            "caseSize": rec.get("case_size"),
-                            "strapSize": rec.get("strap_size"),
-                            "gender": gender_val,
-                            "waterResistance": rec.get("water_resistance"),
-                            "releaseDate": rec.get("release_date"),
-                            "sold": rec.get("sold"),
-                            "basePrice": rec.get("base_price"),
-                            "rating": rec.get("rating"),
-                            "thumbnail": thumbnail,
-                            "slider": slider_list,
-                            "brandId": (rec.get("brand", {}) or {}).get("id"),
-                            "brandName": (rec.get("brand", {}) or {}).get("name"),
-                            "categoryId": (rec.get("category", {}) or {}).get("id"),
-                            "categoryName": (rec.get("category", {}) or {}).get("name"),
-                            "movementTypeName": movement_type_name,
-                            "colorTags": rec.get("color_tags", []),
-                            "styleTags": rec.get("style_tags", []),
-                            "isAiRecommended": rec.get("is_ai_recommended"),
-                            "score": rec.get("score")
-                        })
+                    cards: List[Dict[str, Any]] = [recommendation_card(rec) for rec in recs]
                     if cards:
                         dispatcher.utter_message(
                             text="Đây là những đồng hồ được gợi ý dành cho bạn:",
                             custom={"type": "cards", "cards": cards}
                         )
                         return []
+                except DeadlineExceeded:
+                    utter_degraded(dispatcher, tracker)
+                    return []
                 except Exception:
                     pass  # Fall through to normal search if recommend fails
 
@@ -1149,168 +730,65 @@ class ActionSearchProducts(Action):
             ])
 
             if any_filter:
-                query_params: Dict[str, Any] = {"page": 1, "limit": 12}
-                if brand.get("id"):
-                    query_params["brand_id__in"] = brand.get("id")
-                if category.get("id"):
-                    query_params["category_id__in"] = category.get("id")
-                if color.get("id"):
-                    query_params["color_id__in"] = color.get("id")
-                if movement_type.get("id"):
-                    query_params["movement_type_id__in"] = movement_type.get("id")
-                if strap_material.get("id"):
-                    query_params["strap_material_id__in"] = strap_material.get("id")
-                if gender_code is not None:
-                    query_params["gender__in"] = gender_code
+                filters: Dict[str, Any] = {
+                    field: value for field, value in (
+                        ("brand_id", brand.get("id")),
+                        ("category_id", category.get("id")),
+                        ("color_id", color.get("id")),
+                        ("movement_type_id", movement_type.get("id")),
+                        ("strap_material_id", strap_material.get("id")),
+                        ("gender", gender_code),
+                        ("rating_min", rating_min),
+                        ("price_range", price_range),
+                    ) if value is not None and value != ""
+                }
+                labels: Dict[str, str] = {}
+                if brand.get("name"): labels["brand_id"] = f"thương hiệu {brand.get('name')}"
+                if category.get("name"): labels["category_id"] = f"danh mục {category.get('name')}"
+                if color.get("name"): labels["color_id"] = f"màu {color.get('name')}"
+                if movement_type.get("name"): labels["movement_type_id"] = f"loại máy {movement_type.get('name')}"
+                if strap_material.get("name"): labels["strap_material_id"] = f"dây {strap_material.get('name')}"
+                if gender_code is not None: labels["gender"] = "nam" if gender_code == "0" else "nữ"
+                if style_tokens: labels["style"] = ", ".join(style_tokens)
                 if rating_min is not None:
-                    # Add rating filter even if 0 (rating__gte=0 means all including unrated)
-                    query_params["rating__gte"] = rating_min
+                    labels["rating_min"] = rating_text(rating_min)
                 if price_range:
-                    min_price, max_price = price_range
-                    if max_price is not None:
-                        query_params["base_price__range"] = f"{min_price}:{max_price}"
-                    else:
-                        # For "trên X", set a high upper limit (e.g., 100 million)
-                        query_params["base_price__range"] = f"{min_price}:100000000"
-
-                # Do not send q when we already have structured filters
-
-                response = requests.get(
-                    f"{API_BASE_URL}/v1/search",
-                    headers=headers,
-                    params=query_params,
-                    timeout=10,
-                )
-                response.raise_for_status()
-                data = response.json()
-                watches = data.get("watches", {}).get("items", [])
+                    labels["price_range"] = price_range_text(price_range)
+
+                # A follow-up that only adds constraints filters the previous
+                # results, the API is asked when too few of them are left
+                search = refinements.refine(previous_search, filters, labels)
+                if search is not None and search.items is not None:
+                    watches = search.items
+                else:
+                    if search is None:
+                        search = SearchState(filters, labels, [], False)
+                    # Do not send q when we already have structured filters
+                    query_params = search_params(**search.filters)
+
+                    # [] without a request when this search recently found nothing
+                    watches = search_watches(token, query_params)
+                    search = search._replace(items=watches, complete=is_complete(watches))
 
                 if not watches:
                     dispatcher.utter_message(text="Không tìm thấy sản phẩm theo yêu cầu của bạn. Thay vào đó hãy xem thử các sản phẩm bán chạy bên shop:")
                     # Fallback to recommendations
                     try:
-                        rec_headers = {"Content-Type": "application/json"}
-                        if token:
-                            rec_headers["Authorization"] = f"Bearer {token}"
-                            rec_resp = requests.get(
-                                f"{API_BASE_URL}/v1/recommendations",
-                                headers=rec_headers,
-                                params={"limit": 5},
-                                timeout=10,
-                            )
-                        else:
-                            rec_resp = requests.get(
-                                f"{API_BASE_URL}/v1/recommendations/public",
-                                headers=rec_headers,
-                                params={"limit": 5},
-                                timeout=10,
-                            )
-                        rec_resp.raise_for_status()
-                        rec_data = rec_resp.json()
+                        rec_data = get_recommendations(token, 5)
                         recs = rec_data.get("data", {}).get("data", {}).get("recommendations", [])
-                        cards: List[Dict[str, Any]] = []
-                        for rec in recs:
-                            gender_val = rec.get("gender") or rec.get("gender_target")
-                            if gender_val in ("M", "F"):
-                                gender_val = "0" if gender_val == "M" else "1"
-                            slider_raw = rec.get("slider")
-                            if isinstance(slider_raw, str):
-                                slider_list = [s.strip() for s in slider_raw.split(",") if s.strip()]
-                            elif isinstance(slider_raw, list):
-                                slider_list = slider_raw
-                            else:
-                                slider_list = rec.get("images", [])
-                            thumbnail = rec.get("thumbnail") or (rec.get("images", [None])[0] if rec.get("images") else None)
-                            movement_type_name = (rec.get("movement_type") or {}).get("name") or ", ".join(rec.get("movement_type_tags", []))
-                            case_material = rec.get("case_material") or ", ".join(rec.get("material_tags", []))
-                            cards.append({
-                                "id": rec.get("watch_id"),
-                                "code": rec.get("code") or f"REC-{rec.get('watch_id')}",
-                                "name": rec.get("name"),
-                                "description": rec.get("description"),
-                                "model": rec.get("model") or rec.get("name"),
-                                "caseMaterial": case_material,
-                                "caseSize": rec.get("case_size"),
-                                "strapSize": rec.get("strap_size"),
-                                "gender": gender_val,
-                                "waterResistance": rec.get("water_resistance"),
-                                "releaseDate": rec.get("release_date"),
-                                "sold": rec.get("sold"),
-                                "basePrice": rec.get("base_price"),
-                                "rating": rec.get("rating"),
-                                "thumbnail": thumbnail,
-                                "slider": slider_list,
-                                "brandId": (rec.get("brand", {}) or {}).get("id"),
-                                "brandName": (rec.get("brand", {}) or {}).get("name"),
-                                "categoryId": (rec.get("category", {}) or {}).get("id"),
-                                "categoryName": (rec.get("category", {}) or {}).get("name"),
-                                "movementTypeName": movement_type_name,
-                                "colorTags": rec.get("color_tags", []),
-                                "styleTags": rec.get("style_tags", []),
-                                "isAiRecommended": rec.get("is_ai_recommended"),
-                                "score": rec.get("score")
-                            })
+                        cards: List[Dict[str, Any]] = [recommendation_card(rec) for rec in recs]
                         if cards:
                             dispatcher.utter_message(
                                 custom={"type": "cards", "cards": cards}
                             )
+                    except DeadlineExceeded:
+                        utter_degraded(dispatcher, tracker)
                     except Exception:
                         pass
                     return []
 
-                cards: List[Dict[str, Any]] = []
-                for watch in watches:
-                    cards.append({
-                        "id": watch.get("id"),
-                        "code": watch.get("code"),
-                        "name": watch.get("name"),
-                        "description": watch.get("description"),
-                        "model": watch.get("model"),
-                        "caseMaterial": watch.get("case_material"),
-                        "caseSize": watch.get("case_size"),
-                        "strapSize": watch.get("strap_size"),
-                        "gender": watch.get("gender"),
-                        "waterResistance": watch.get("water_resistance"),
-                        "releaseDate": watch.get("release_date"),
-                        "sold": watch.get("sold"),
-                        "basePrice": watch.get("base_price"),
-                        "rating": watch.get("rating"),
-                        "status": watch.get("status"),
-                        "thumbnail": watch.get("thumbnail"),
-                        "slider": (watch.get("slider") or "").split(",") if watch.get("slider") else [],
-                        "brandId": watch.get("brand_id"),
-                        "brandName": watch.get("brand_name"),
-                        "categoryId": watch.get("category_id"),
-                        "categoryName": watch.get("category_name"),
-                        "movementTypeId": watch.get("movement_type_id"),
-                        "movementTypeName": watch.get("movement_type_name"),
-                        "createdAt": watch.get("created_at"),
-                        "updatedAt": watch.get("updated_at")
-                    })
-
-                desc_parts = []
-                if brand.get("name"): desc_parts.append(f"thương hiệu {brand.get('name')}")
-                if category.get("name"): desc_parts.append(f"danh mục {category.get('name')}")
-                if color.get("name"): desc_parts.append(f"màu {color.get('name')}")
-                if movement_type.get("name"): desc_parts.append(f"loại máy {movement_type.get('name')}")
-                if strap_material.get("name"): desc_parts.append(f"dây {strap_material.get('name')}")
-                if gender_code is not None: desc_parts.append("nam" if gender_code == "0" else "nữ")
-                if style_tokens: desc_parts.append(", ".join(style_tokens))
-                if rating_min is not None:
-                    if rating_min == 0:
-                        desc_parts.append("chưa đánh giá")
-                    else:
-                        desc_parts.append(f"đánh giá từ {rating_min} sao")
-                if price_range:
-                    min_price, max_price = price_range
-                    if max_price is not None:
-                        if not min_price or min_price == 0:
-                            desc_parts.append(f"dưới {format_price_value(max_price)}")
-                        else:
-                            desc_parts.append(f"giá từ {format_price_value(min_price)} đến {format_price_value(max_price)}")
-                    elif min_price is not None:
-                        desc_parts.append(f"trên {format_price_value(min_price)}")
-                filter_text = ", ".join([p for p in desc_parts if p]) or "bộ lọc"
+                cards: List[Dict[str, Any]] = watch_cards.cards(watches)
+                filter_text = describe(search.labels) or "bộ lọc"
 
                 dispatcher.utter_message(
                     text=f"Kết quả lọc theo {filter_text}:",
@@ -1319,46 +797,17 @@ class ActionSearchProducts(Action):
                         "cards": cards
                     }
                 )
+                return [SlotSet(LAST_SEARCH_SLOT, refinements.save(tracker.sender_id, search))]
 
             else:
-                # Fallback: pure q search like original
+                # Fallback: pure q search like original, with the user's own
+                # words (the backend does its own matching)
                 search_query = "đồng hồ" if "đồng hồ" in user_text else (user_text.strip() or "đồng hồ")
-                response = requests.get(f"{API_BASE_URL}/v1/search?page=1&limit=12&q={search_query}", headers=headers, timeout=10)
-                response.raise_for_status()
-                data = response.json()
-                watches = data.get("watches", {}).get("items", [])
+                watches = search_watches(token, {"page": 1, "limit": 12, "q": search_query})
                 if not watches:
                     dispatcher.utter_message(text=f"Không tìm thấy sản phẩm nào với từ khóa '{search_query}'.")
                     return []
-                cards: List[Dict[str, Any]] = []
-                for watch in watches:
-                    cards.append({
-                        "id": watch.get("id"),
-                        "code": watch.get("code"),
-                        "name": watch.get("name"),
-                        "description": watch.get("description"),
-                        "model": watch.get("model"),
-                        "caseMaterial": watch.get("case_material"),
-                        "caseSize": watch.get("case_size"),
-                        "strapSize": watch.get("strap_size"),
-                        "gender": watch.get("gender"),
-                        "waterResistance": watch.get("water_resistance"),
-                        "releaseDate": watch.get("release_date"),
-                        "sold": watch.get("sold"),
-                        "basePrice": watch.get("base_price"),
-                        "rating": watch.get("rating"),
-                        "status": watch.get("status"),
-                        "thumbnail": watch.get("thumbnail"),
-                        "slider": (watch.get("slider") or "").split(",") if watch.get("slider") else [],
-                        "brandId": watch.get("brand_id"),
-                        "brandName": watch.get("brand_name"),
-                        "categoryId": watch.get("category_id"),
-                        "categoryName": watch.get("category_name"),
-                        "movementTypeId": watch.get("movement_type_id"),
-                        "movementTypeName": watch.get("movement_type_name"),
-                        "createdAt": watch.get("created_at"),
-                        "updatedAt": watch.get("updated_at")
-                    })
+                cards: List[Dict[str, Any]] = watch_cards.cards(watches)
 
                 dispatcher.utter_message(
                     text=f"Đây là kết quả tìm kiếm cho '{search_query}':",
@@ -1368,6 +817,8 @@ class ActionSearchProducts(Action):
                     }
                 )
 
+        except DeadlineExceeded:
+            utter_degraded(dispatcher, tracker)
         except requests.exceptions.RequestException as e:
             # Fallback to mock cards on API error
             dispatcher.utter_message(
@@ -1419,6 +870,7 @@ class ActionFilterProducts(Action):
     def name(self) -> Text:
         return "action_filter_products"
 
+    @with_deadline
     def run(self, dispatcher: CollectingDispatcher,
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
@@ -1437,15 +889,16 @@ class ActionFilterProducts(Action):
             strap_material_id = metadata.get("strap_material_id") or metadata.get("material_id")
             gender = metadata.get("gender")
             rating_min = metadata.get("rating_min")
+            # Buttons may send the rating as a string
+            try:
+                rating_min = int(rating_min) if rating_min is not None else None
+            except (TypeError, ValueError):
+                rating_min = None
             base_price_range = metadata.get("base_price__range") or metadata.get("base_price_range")
             
             # Get token from metadata
             token = metadata.get("token")
             
-            headers = {"Content-Type": "application/json"}
-            if token:
-                headers["Authorization"] = f"Bearer {token}"
-            
             # Build query parameters safely (requests will encode values)
             query_params: Dict[str, Any] = {
                 "page": 1,
@@ -1467,123 +920,44 @@ class ActionFilterProducts(Action):
                 query_params["rating__gte"] = rating_min
             if base_price_range:
                 query_params["base_price__range"] = base_price_range
+            # Filters of this search for typed follow-ups (actions.refinement),
+            # the price range is added once parsed below
+            filters: Dict[str, Any] = {
+                field: value for field, value in (
+                    ("brand_id", brand_id),
+                    ("category_id", category_id),
+                    ("color_id", color_id),
+                    ("movement_type_id", movement_type_id),
+                    ("strap_material_id", strap_material_id),
+                    ("gender", gender),
+                    ("rating_min", rating_min),
+                ) if value is not None and value != ""
+            }
             # Note: do not include free-text q when using ID filters to avoid narrowing incorrectly
 
             # Call search API with filter parameters
-            response = requests.get(
-                f"{API_BASE_URL}/v1/search",
-                headers=headers,
-                params=query_params,
-                timeout=10,
-            )
-            response.raise_for_status()
-            
-            data = response.json()
-            watches = data.get("watches", {}).get("items", [])
+            # [] without a request when this search recently found nothing
+            watches = search_watches(token, query_params)
             
             if not watches:
                 dispatcher.utter_message(text="Không tìm thấy sản phẩm theo yêu cầu của bạn. Thay vào đó hãy xem thử các sản phẩm bán chạy bên shop:")
                 # Fallback to recommendations
                 try:
-                    rec_headers = {"Content-Type": "application/json"}
-                    if token:
-                        rec_headers["Authorization"] = f"Bearer {token}"
-                        rec_resp = requests.get(
-                            f"{API_BASE_URL}/v1/recommendations",
-                            headers=rec_headers,
-                            params={"limit": 5},
-                            timeout=10,
-                        )
-                    else:
-                        rec_resp = requests.get(
-                            f"{API_BASE_URL}/v1/recommendations/public",
-                            headers=rec_headers,
-                            params={"limit": 5},
-                            timeout=10,
-                        )
-                    rec_resp.raise_for_status()
-                    rec_data = rec_resp.json()
+                    rec_data = get_recommendations(token, 5)
                     recs = rec_data.get("data", {}).get("data", {}).get("recommendations", [])
-                    cards: List[Dict[str, Any]] = []
-                    for rec in recs:
-                        gender_val = rec.get("gender") or rec.get("gender_target")
-                        if gender_val in ("M", "F"):
-                            gender_val = "0" if gender_val == "M" else "1"
-                        slider_raw = rec.get("slider")
-                        if isinstance(slider_raw, str):
-                            slider_list = [s.strip() for s in slider_raw.split(",") if s.strip()]
-                        elif isinstance(slider_raw, list):
-                            slider_list = slider_raw
-                        else:
-                            slider_list = rec.get("images", [])
-                        thumbnail = rec.get("thumbnail") or (rec.get("images", [None])[0] if rec.get("images") else None)
-                        movement_type_name = (rec.get("movement_type") or {}).get("name") or ", ".join(rec.get("movement_type_tags", []))
-                        case_material = rec.get("case_material") or ", ".join(rec.get("material_tags", []))
-                        cards.append({
-                            "id": rec.get("watch_id"),
-                            "code": rec.get("code") or f"REC-{rec.get('watch_id')}",
-                            "name": rec.get("name"),
-                            "description": rec.get("description"),
-                            "model": rec.get("model") or rec.get("name"),
-                            "caseMaterial": case_material,
-                            "caseSize": rec.get("case_size"),
-                            "strapSize": rec.get("strap_size"),
-                            "gender": gender_val,
-                            "waterResistance": rec.get("water_resistance"),
-                            "releaseDate": rec.get("release_date"),
-                            "sold": rec.get("sold"),
-                            "basePrice": rec.get("base_price"),
-                            "rating": rec.get("rating"),
-                            "thumbnail": thumbnail,
-                            "slider": slider_list,
-                            "brandId": (rec.get("brand", {}) or {}).get("id"),
-                            "brandName": (rec.get("brand", {}) or {}).get("name"),
-                            "categoryId": (rec.get("category", {}) or {}).get("id"),
-                            "categoryName": (rec.get("category", {}) or {}).get("name"),
-                            "movementTypeName": movement_type_name,
-                            "colorTags": rec.get("color_tags", []),
-                            "styleTags": rec.get("style_tags", []),
-                            "isAiRecommended": rec.get("is_ai_recommended"),
-                            "score": rec.get("score")
-                        })
+                    cards: List[Dict[str, Any]] = [recommendation_card(rec) for rec in recs]
                     if cards:
                         dispatcher.utter_message(
                             custom={"type": "cards", "cards": cards}
                         )
+                except DeadlineExceeded:
+                    utter_degraded(dispatcher, tracker)
                 except Exception:
                     pass
                 return []
 
             # Build cards payload for FE
-            cards: List[Dict[str, Any]] = []
-            for watch in watches:
-                cards.append({
-                    "id": watch.get("id"),
-                    "code": watch.get("code"),
-                    "name": watch.get("name"),
-                    "description": watch.get("description"),
-                    "model": watch.get("model"),
-                    "caseMaterial": watch.get("case_material"),
-                    "caseSize": watch.get("case_size"),
-                    "strapSize": watch.get("strap_size"),
-                    "gender": watch.get("gender"),
-                    "waterResistance": watch.get("water_resistance"),
-                    "releaseDate": watch.get("release_date"),
-                    "sold": watch.get("sold"),
-                    "basePrice": watch.get("base_price"),
-                    "rating": watch.get("rating"),
-                    "status": watch.get("status"),
-                    "thumbnail": watch.get("thumbnail"),
-                    "slider": (watch.get("slider") or "").split(",") if watch.get("slider") else [],
-                    "brandId": watch.get("brand_id"),
-                    "brandName": watch.get("brand_name"),
-                    "categoryId": watch.get("category_id"),
-                    "categoryName": watch.get("category_name"),
-                    "movementTypeId": watch.get("movement_type_id"),
-                    "movementTypeName": watch.get("movement_type_name"),
-                    "createdAt": watch.get("created_at"),
-                    "updatedAt": watch.get("updated_at")
-                })
+            cards: List[Dict[str, Any]] = watch_cards.cards(watches)
 
             # Create filter description with names instead of IDs
             # Try to resolve color name when color_id is provided
@@ -1595,12 +969,7 @@ class ActionFilterProducts(Action):
                 # 2) If not present, fetch colors list and map id -> name
                 if not color_name_resolved:
                     try:
-                        color_headers = {"Content-Type": "application/json"}
-                        if token:
-                            color_headers["Authorization"] = f"Bearer {token}"
-                        colors_resp = requests.get(f"{API_BASE_URL}/v1/colors", headers=color_headers, timeout=10)
-                        colors_resp.raise_for_status()
-                        colors_data = colors_resp.json()
+                        colors_data = get_json("/v1/colors", token, ttl=TAXONOMY_TTL, persist=True)
                         colors_items = colors_data.get("colors", {}).get("items", [])
                         for c in colors_items:
                             if str(c.get("id")) == str(color_id):
@@ -1618,12 +987,7 @@ class ActionFilterProducts(Action):
                 # 2) If not present, fetch strap-materials list and map id -> name
                 if not material_name_resolved:
                     try:
-                        sm_headers = {"Content-Type": "application/json"}
-                        if token:
-                            sm_headers["Authorization"] = f"Bearer {token}"
-                        sm_resp = requests.get(f"{API_BASE_URL}/v1/strap-materials", headers=sm_headers, timeout=10)
-                        sm_resp.raise_for_status()
-                        sm_data = sm_resp.json()
+                        sm_data = get_json("/v1/strap-materials", token, ttl=TAXONOMY_TTL, persist=True)
                         sm_items = sm_data.get("strapMaterials", {}).get("items", [])
                         for m in sm_items:
                             if str(m.get("id")) == str(strap_material_id):
@@ -1632,32 +996,32 @@ class ActionFilterProducts(Action):
                     except Exception:
                         pass
 
-            filter_desc = []
+            labels: Dict[str, str] = {}
             if brand_id:
                 # Try to get brand name from first watch result
                 brand_name = watches[0].get("brand_name", f"ID {brand_id}") if watches else f"ID {brand_id}"
-                filter_desc.append(f"thương hiệu {brand_name}")
+                labels["brand_id"] = f"thương hiệu {brand_name}"
             if category_id:
                 category_name = watches[0].get("category_name", f"ID {category_id}") if watches else f"ID {category_id}"
-                filter_desc.append(f"danh mục {category_name}")
+                labels["category_id"] = f"danh mục {category_name}"
             if color_id:
                 if color_name_resolved:
-                    filter_desc.append(f"màu sắc {color_name_resolved}")
+                    labels["color_id"] = f"màu sắc {color_name_resolved}"
                 else:
-                    filter_desc.append(f"màu sắc ID {color_id}")
+                    labels["color_id"] = f"màu sắc ID {color_id}"
             if movement_type_id:
                 movement_name = watches[0].get("movement_type_name", f"ID {movement_type_id}") if watches else f"ID {movement_type_id}"
-                filter_desc.append(f"loại máy {movement_name}")
+                labels["movement_type_id"] = f"loại máy {movement_name}"
             if strap_material_id:
                 if material_name_resolved:
-                    filter_desc.append(f"dây {material_name_resolved}")
+                    labels["strap_material_id"] = f"dây {material_name_resolved}"
                 else:
-                    filter_desc.append(f"dây ID {strap_material_id}")
+                    labels["strap_material_id"] = f"dây ID {strap_material_id}"
             if gender is not None:
                 gender_text = "nam" if gender == "0" else "nữ" if gender == "1" else f"{gender}"
-                filter_desc.append(f"giới tính {gender_text}")
+                labels["gender"] = f"giới tính {gender_text}"
             if rating_min is not None and rating_min > 0:
-                filter_desc.append(f"đánh giá từ {rating_min} sao")
+                labels["rating_min"] = f"đánh giá từ {rating_min} sao"
             if base_price_range:
                 # Parse price range string (format: "min:max")
                 try:
@@ -1665,17 +1029,12 @@ class ActionFilterProducts(Action):
                         min_price_str, max_price_str = base_price_range.split(":", 1)
                         min_price = int(min_price_str)
                         max_price = int(max_price_str) if max_price_str else None
-                        if max_price is not None:
-                            if not min_price or min_price == 0:
-                                filter_desc.append(f"dưới {format_price_value(max_price)}")
-                            else:
-                                filter_desc.append(f"giá từ {format_price_value(min_price)} đến {format_price_value(max_price)}")
-                        elif min_price is not None:
-                            filter_desc.append(f"trên {format_price_value(min_price)}")
+                        filters["price_range"] = (min_price, max_price)
+                        labels["price_range"] = price_range_text((min_price, max_price))
                 except:
-                    filter_desc.append(f"giá {base_price_range}")
+                    labels["price_range"] = f"giá {base_price_range}"
 
-            filter_text = ", ".join(filter_desc) if filter_desc else "bộ lọc"
+            filter_text = describe(labels) or "bộ lọc"
 
             dispatcher.utter_message(
                 text=f"Kết quả lọc theo {filter_text}:",
@@ -1685,6 +1044,14 @@ class ActionFilterProducts(Action):
                 }
             )
 
+            # A click on a filter button starts a new search, typed follow-ups
+            # narrow it (see ActionSearchProducts)
+            if not base_price_range or "price_range" in filters:
+                search = SearchState(filters, labels, watches, is_complete(watches))
+                return [SlotSet(LAST_SEARCH_SLOT, refinements.save(tracker.sender_id, search))]
+
+        except DeadlineExceeded:
+            utter_degraded(dispatcher, tracker)
         except requests.exceptions.RequestException as e:
             # Fallback to mock cards on API error
             dispatcher.utter_message(
@@ -1736,6 +1103,7 @@ class ActionShowOrderStatus(Action):
     def name(self) -> Text:
         return "action_show_order_status"
 
+    @with_deadline
     def run(self, dispatcher: CollectingDispatcher,
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
@@ -1752,108 +1120,23 @@ class ActionShowOrderStatus(Action):
                 )
                 return []
 
-            # Call orders API with token
-            headers = {
-                "Authorization": f"Bearer {token}",
-                "Content-Type": "application/json"
-            }
-            
-            # Fetch orders (limit 5)
-            orders_response = requests.get(f"{API_BASE_URL}/v1/orders?limit=5", 
-                                         headers=headers, timeout=10)
-            orders_response.raise_for_status()
-            
-            # Fetch order statuses
-            status_response = requests.get(f"{API_BASE_URL}/v1/order-status", 
-                                         headers=headers, timeout=10)
-            status_response.raise_for_status()
-            
-            orders_data = orders_response.json()
-            status_data = status_response.json()
-            
-            orders = orders_data.get("orders", {}).get("items", [])
-            order_statuses = status_data.get("orderStatuses", {}).get("items", [])
+            # A cancel request since the last order reply makes the cached orders stale
+            if cancel_requested(tracker.events):
+                invalidate_orders(token)
+
+            # Recent orders are cached per user; the status definitions are
+            # kept per process and only fetched (concurrently with the
+            # orders) when they expired
+            orders, statuses = fetch_orders_with_statuses(token)
+            # Latest 5 orders
+            orders = orders[:5]
             
             if not orders:
                 dispatcher.utter_message(text="Bạn chưa có đơn hàng nào.")
                 return []
 
-            # Create status mapping for easy lookup (support both string and int keys)
-            status_map = {}
-            for status in order_statuses:
-                status_id = status.get("id")
-                # Store with string key since current_status_id from orders is string
-                status_map[str(status_id)] = {
-                    "name": status.get("name"),
-                    "description": status.get("description"),
-                    "color": status.get("color"),
-                    "hex_code": status.get("hex_code")
-                }
-
-            # Map hex codes to color names for currentStatus objects
-            hex_to_color = {
-                "#008000": "Green",
-                "#00FF00": "Green",
-                "#F44336": "Red",
-                "#2196F3": "Blue",
-                "#FD7E14": "Orange",
-                "#FFC107": "Yellow"
-            }
-
             # Create order cards with buttons
-            order_cards = []
-            for order in orders:
-                order_id = order.get("id")
-                order_code = order.get("code")
-                total_amount = order.get("total_amount", 0)
-                final_amount = order.get("final_amount", 0)
-                current_status_id = order.get("current_status_id")
-                created_at = order.get("created_at")
-                guess_name = order.get("guess_name", "")
-                current_status = order.get("currentStatus", {})
-                
-                # Get status info - prioritize currentStatus from order, then fallback to status_map
-                if current_status and current_status.get("name"):
-                    status_name = current_status.get("name", "Không xác định")
-                    # Get color from hex_code mapping
-                    hex_code = current_status.get("hex_code", "").upper()
-                    status_color = hex_to_color.get(hex_code, "Gray")
-                else:
-                    # Fallback to status_map lookup
-                    status_id_key = str(current_status_id) if current_status_id else None
-                    status_info = status_map.get(status_id_key, {}) if status_id_key else {}
-                    status_name = status_info.get("name", "Không xác định")
-                    status_color = status_info.get("color", "Gray")
-                
-                # Format amount
-                formatted_amount = f"{final_amount:,}".replace(",", ".") + " VNĐ"
-                
-                # Format date
-                formatted_date = created_at[:4] + "-" + created_at[4:6] + "-" + created_at[6:8] if created_at else "N/A"
-                
-                order_card = {
-                    "id": order_id,
-                    "code": order_code,
-                    "customer_name": guess_name,
-                    "total_amount": formatted_amount,
-                    "status": status_name,
-                    "status_color": status_color,
-                    "created_date": formatted_date,
-                    "buttons": [
-                        {
-                            "title": f"#{order_id} - {order_code} - {status_name}",
-                            "payload": f"xem chi tiết đơn hàng {order_code}",
-                            "metadata": {
-                                "order_id": order_id,
-                                "order_code": order_code,
-                                "status_name": status_name,
-                                "status_color": status_color,
-                                "intent": "view_order_detail"
-                            }
-                        }
-                    ]
-                }
-                order_cards.append(order_card)
+            order_cards = [order_card(order, statuses) for order in orders]
 
             # Send message with order cards
             dispatcher.utter_message(
@@ -1883,6 +1166,7 @@ class ActionShowOrderStatuses(Action):
     def name(self) -> Text:
         return "action_show_order_statuses"
 
+    @with_deadline
     def run(self, dispatcher: CollectingDispatcher,
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
@@ -1899,18 +1183,8 @@ class ActionShowOrderStatuses(Action):
                 )
                 return []
 
-            # Call order-status API with token
-            headers = {
-                "Authorization": f"Bearer {token}",
-                "Content-Type": "application/json"
-            }
-            
-            response = requests.get(f"{API_BASE_URL}/v1/order-status", 
-                                 headers=headers, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
-            order_statuses = data.get("orderStatuses", {}).get("items", [])
+            # Status definitions are the same for every user, kept per process
+            order_statuses = status_definitions.get(token).items
             
             if not order_statuses:
                 dispatcher.utter_message(text="Hiện tại chưa có trạng thái đơn hàng nào.")
@@ -1955,12 +1229,162 @@ class ActionShowOrderStatuses(Action):
         return []
 
 
+class ActionShowOrderDetail(Action):
+    """Action to show one order (view_order_detail) or its status (track_order)"""
+
+    def name(self) -> Text:
+        return "action_show_order_detail"
+
+    @with_deadline
+    def run(self, dispatcher: CollectingDispatcher,
+            tracker: Tracker,
+            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+
+        try:
+            latest_message = tracker.latest_message
+            metadata = latest_message.get("metadata", {})
+            token = metadata.get("token")
+            
+            if not token:
+                # Fallback message if no token
+                dispatcher.utter_message(
+                    text="Để xem tình trạng đơn hàng, bạn cần đăng nhập trước."
+                )
+                return []
+
+            if cancel_requested(tracker.events):
+                invalidate_orders(token)
+
+            # The order cards send order_id/order_code, a typed message may contain the code
+            orders, statuses = fetch_orders_with_statuses(token)
+            order_id = metadata.get("order_id")
+            order = find_order(orders, order_id, metadata.get("order_code"), latest_message.get("text", ""))
+            if order is None and order_id is not None:
+                # Older than the recent orders
+                order = order_detail(token, order_id)
+            if order is None and orders and order_id is None and not metadata.get("order_code"):
+                # "theo dõi đơn hàng" without saying which one: the latest order
+                order = orders[0]
+
+            if order is None:
+                dispatcher.utter_message(text="Không tìm thấy đơn hàng bạn yêu cầu.")
+                return []
+
+            card = order_card(order, statuses)
+            status_name, _ = order_status(order, statuses)
+            if latest_message.get("intent", {}).get("name") == "track_order":
+                description = (statuses.by_id.get(status_of(order)) or {}).get("description")
+                text = f"Đơn hàng {card['code']} đang ở trạng thái: {status_name}."
+                if description:
+                    text += f"\n{description}"
+            else:
+                text = (
+                    f"Chi tiết đơn hàng #{card['id']} - {card['code']}:\n"
+                    f"- Người nhận: {card['customer_name']}\n"
+                    f"- Ngày đặt: {card['created_date']}\n"
+                    f"- Tổng tiền: {card['total_amount']}\n"
+                    f"- Trạng thái: {status_name}"
+                )
+
+            dispatcher.utter_message(
+                text=text,
+                custom={
+                    "type": "order_cards",
+                    "orders": [card]
+                }
+            )
+
+        except requests.exceptions.RequestException as e:
+            # Fallback message on API error
+            dispatcher.utter_message(
+                text="Không thể tải thông tin đơn hàng. Vui lòng thử lại sau."
+            )
+        except Exception as e:
+            dispatcher.utter_message(
+                text="Có lỗi xảy ra khi tải thông tin đơn hàng."
+            )
+
+        return []
+
+
+class ActionFilterOrdersByStatus(Action):
+    """Action to show the user's recent orders having one status"""
+
+    def name(self) -> Text:
+        return "action_filter_orders_by_status"
+
+    @with_deadline
+    def run(self, dispatcher: CollectingDispatcher,
+            tracker: Tracker,
+            domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+
+        try:
+            latest_message = tracker.latest_message
+            metadata = latest_message.get("metadata", {})
+            token = metadata.get("token")
+            
+            if not token:
+                # Fallback message if no token
+                dispatcher.utter_message(
+                    text="Để xem tình trạng đơn hàng, bạn cần đăng nhập trước."
+                )
+                return []
+
+            if cancel_requested(tracker.events):
+                invalidate_orders(token)
+
+            # Filtered from the cached recent orders, no download per status
+            orders, statuses = fetch_orders_with_statuses(token)
+
+            # The status buttons send status_id, a typed message names the status
+            status = statuses.by_id.get(str(metadata.get("status_id")))
+            status_id = str(metadata.get("status_id")) if status else None
+            if status is None:
+                matched = match_name(normalize_query(latest_message.get("text", "")), statuses.items)
+                if matched:
+                    status_id, status = str(matched.get("id")), statuses.by_id.get(str(matched.get("id")))
+
+            if status is None:
+                # No status given: offer the status buttons
+                return ActionShowOrderStatuses().run(dispatcher, tracker, domain)
+
+            status_name = status.get("name")
+            matching = [
+                order for order in orders
+                if status_of(order) == status_id or order_status(order, statuses)[0] == status_name
+            ]
+            if not matching:
+                dispatcher.utter_message(text=f"Bạn không có đơn hàng nào ở trạng thái {status_name}.")
+                return []
+
+            dispatcher.utter_message(
+                text=f"Đây là các đơn hàng ở trạng thái {status_name} của bạn:",
+                custom={
+                    "type": "order_cards",
+                    "orders": [order_card(order, statuses) for order in matching]
+                }
+            )
+
+        except requests.exceptions.RequestException as e:
+            # Fallback message on API error
+            dispatcher.utter_message(
+                text="Không thể tải thông tin đơn hàng. Vui lòng thử lại sau."
+            )
+        except Exception as e:
+            dispatcher.utter_message(
+                text="Có lỗi xảy ra khi tải thông tin đơn hàng."
+            )
+
+        return []
+
+
 class ActionShowPromotions(Action):
     """Action to fetch and display promotions/discounts from API"""
 
     def name(self) -> Text:
         return "action_show_promotions"
 
+    @with_deadline
     def run(self, dispatcher: CollectingDispatcher,
             tracker: Tracker,
             domain: Dict[Text, Any]) -> List[Dict[Text, Any]]:
@@ -1977,65 +1401,14 @@ class ActionShowPromotions(Action):
                 )
                 return []
 
-            # Call discounts API with token
-            headers = {
-                "Authorization": f"Bearer {token}",
-                "Content-Type": "application/json"
-            }
-            
-            response = requests.get(f"{API_BASE_URL}/v1/discounts", 
-                                 headers=headers, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
-            discounts = data.get("discounts", {}).get("items", [])
+            # Preformatted cards of the discounts valid now, the API is only
+            # asked in the background when a discount starts or ends
+            promotion_cards = promotions.cards(token)
             
-            if not discounts:
+            if not promotion_cards:
                 dispatcher.utter_message(text="Hiện tại chưa có khuyến mãi nào.")
                 return []
 
-            # Create promotion cards
-            promotion_cards = []
-            for discount in discounts:
-                discount_id = discount.get("id")
-                discount_code = discount.get("code")
-                discount_name = discount.get("name")
-                description = discount.get("description")
-                min_order_value = discount.get("min_order_value", 0)
-                max_discount_amount = discount.get("max_discount_amount", 0)
-                discount_type = discount.get("discount_type")
-                discount_value = discount.get("discount_value", 0)
-                effective_date = discount.get("effective_date")
-                valid_until = discount.get("valid_until")
-                
-                # Format amounts
-                formatted_min_order = f"{min_order_value:,}".replace(",", ".") + " VNĐ"
-                formatted_max_discount = f"{max_discount_amount:,}".replace(",", ".") + " VNĐ"
-                
-                # Format discount value based on type
-                if discount_type == "0":  # Fixed amount
-                    formatted_discount_value = f"{discount_value:,}".replace(",", ".") + " VNĐ"
-                else:  # Percentage
-                    formatted_discount_value = f"{discount_value}%"
-                
-                # Format dates
-                formatted_effective_date = effective_date[:4] + "-" + effective_date[4:6] + "-" + effective_date[6:8] if effective_date else "N/A"
-                formatted_valid_until = valid_until[:4] + "-" + valid_until[4:6] + "-" + valid_until[6:8] if valid_until else "N/A"
-                
-                promotion_card = {
-                    "id": discount_id,
-                    "code": discount_code,
-                    "name": discount_name,
-                    "description": description,
-                    "discount_value": formatted_discount_value,
-                    "min_order_value": formatted_min_order,
-                    "max_discount_amount": formatted_max_discount,
-                    "effective_date": formatted_effective_date,
-                    "valid_until": formatted_valid_until,
-                    "discount_type": "Giảm cố định" if discount_type == "0" else "Giảm phần trăm"
-                }
-                promotion_cards.append(promotion_card)
-
             # Send message with promotion cards
             dispatcher.utter_message(
                 text="Đây là các chương trình khuyến mãi hiện tại:",
@@ -0,0 +1,402 @@
+# Access to the watch-shop API for the custom actions.
+#
+# All GET requests go through one requests.Session (connection reuse) and,
+# when a TTL is given, through the SharedCache, so catalog data fetched by one
+# action-server process is reused by every other process on the host.
+# Responses requested with `persist` are also kept in the SQLite
+# ResponseStore, which survives restarts. Once they expire, they are asked
+# again with conditional requests (actions.conditional). Bodies are
+# downloaded gzip or deflate compressed when the API supports it
+# (actions.compression counts the bytes on the wire). Requests made by an
+# action only get the time left of its budget (actions.deadline). Slow
+# searches and recommendations are sent twice (actions.hedging).
+
+import contextvars
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Text, Tuple
+from urllib.parse import urlencode
+
+import requests
+
+from actions.compression import upstream_transfers
+from actions.conditional import ConditionalCache
+from actions.deadline import DeadlineExceeded, request_timeout
+from actions.hedging import Hedger
+from actions.payloads import decode_recommendations, decode_search
+from actions.prefetch import Prefetcher
+from actions.response_store import ResponseStore
+from actions.shared_cache import SharedCache, default_cache_path
+
+logger = logging.getLogger(__name__)
+
+# Get API URL from environment variable, default to backend API for production
+API_BASE_URL = os.getenv("API_URL", "https://watch-shop-uzr4.onrender.com")
+
+# Upper bound of every request; within an action, its budget is the bound
+REQUEST_TIMEOUT = 10
+
+# Seconds a response is reused
+TAXONOMY_TTL = 600
+RECOMMENDATIONS_TTL = 120
+SEARCH_TTL = 60
+DISCOUNTS_TTL = 300
+ORDER_STATUS_TTL = 3600
+# Orders of a user change (payment, shipping, cancel), keep them briefly
+ORDERS_TTL = 30
+# Searches without results are retried after this many seconds
+EMPTY_SEARCH_TTL = 120
+
+SEARCH_PAGE_SIZE = 12
+# Upper bound sent for open price ranges ("trên 15 triệu")
+MAX_PRICE = 100000000
+
+# Sends "Accept-Encoding: gzip, deflate" and decodes compressed bodies
+session = requests.Session()
+# Independent requests of one action run in parallel (fetch_concurrently)
+_request_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="api")
+
+
+def _create_cache() -> Optional[SharedCache]:
+    # ACTION_CACHE_PATH="" disables the cache
+    path = os.getenv("ACTION_CACHE_PATH", default_cache_path())
+    if not path:
+        return None
+    try:
+        return SharedCache(
+            path,
+            slots=int(os.getenv("ACTION_CACHE_SLOTS", "1024")),
+            slot_size=int(os.getenv("ACTION_CACHE_SLOT_SIZE", str(32 * 1024))),
+        )
+    except (OSError, ValueError) as e:
+        logger.warning(f"Shared action cache disabled, could not open '{path}': {e}")
+        return None
+
+
+def _create_store() -> Optional[ResponseStore]:
+    # ACTION_STORE_PATH="" disables the persistent store
+    path = os.getenv("ACTION_STORE_PATH", os.path.join("cache", "responses.sqlite3"))
+    if not path:
+        return None
+    try:
+        return ResponseStore(
+            path, max_bytes=int(os.getenv("ACTION_STORE_MAX_BYTES", str(50 * 1024 * 1024)))
+        )
+    except (OSError, ValueError, sqlite3.Error) as e:
+        logger.warning(f"Persistent response store disabled, could not open '{path}': {e}")
+        return None
+
+
+class NegativeCache:
+    """Bounded set of request keys known to return nothing, with a TTL.
+
+    The least recently added key is dropped when `max_size` is reached.
+    """
+
+    def __init__(self, max_size: int = 2048, ttl: float = EMPTY_SEARCH_TTL) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self._expires_at: "OrderedDict[Text, float]" = OrderedDict()
+        # Prefetch threads add keys too
+        self._lock = threading.Lock()
+        self.hits = 0
+
+    def __contains__(self, key: Text) -> bool:
+        if not self.peek(key):
+            return False
+        with self._lock:
+            self.hits += 1
+        return True
+
+    def peek(self, key: Text) -> bool:
+        """`key in self` without counting a hit"""
+        with self._lock:
+            expires_at = self._expires_at.get(key)
+            if expires_at is None:
+                return False
+            if expires_at <= time.monotonic():
+                del self._expires_at[key]
+                return False
+            return True
+
+    def add(self, key: Text) -> None:
+        with self._lock:
+            self._expires_at[key] = time.monotonic() + self.ttl
+            self._expires_at.move_to_end(key)
+            while len(self._expires_at) > self.max_size:
+                self._expires_at.popitem(last=False)
+
+
+cache = _create_cache()
+# Opened by the first get_json that persists, not on import
+_store: Optional[ResponseStore] = None
+_store_opened = False
+_store_lock = threading.Lock()
+empty_searches = NegativeCache()
+validators = ConditionalCache()
+hedger = Hedger()
+
+
+def get_store() -> Optional[ResponseStore]:
+    """The persistent ResponseStore, opened on first use; None if disabled"""
+    global _store, _store_opened
+    if not _store_opened:
+        with _store_lock:
+            if not _store_opened:
+                _store = _create_store()
+                _store_opened = True
+    return _store
+
+
+def auth_headers(token: Optional[Text]) -> Dict[Text, Text]:
+    headers = {"Content-Type": "application/json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    return headers
+
+
+def cache_key(path: Text, params: Optional[Dict[Text, Any]] = None, token: Optional[Text] = None) -> Text:
+    key = path
+    if params:
+        key += "?" + urlencode(sorted(params.items()))
+    if token:
+        # Responses for a logged in user are never shared with other users
+        key += "#" + hashlib.sha256(token.encode("utf-8")).hexdigest()[:16]
+    return key
+
+
+def _request(path: Text, headers: Dict[Text, Text], params: Optional[Dict[Text, Any]]) -> requests.Response:
+    """session.get within the budget of the running action"""
+    timeout = request_timeout(REQUEST_TIMEOUT)
+    try:
+        return session.get(f"{API_BASE_URL}{path}", headers=headers, params=params, timeout=timeout)
+    except requests.exceptions.Timeout as e:
+        if timeout < REQUEST_TIMEOUT:
+            # Cut short by the budget
+            raise DeadlineExceeded(f"{path}: no reply within the {timeout:.2f}s left") from e
+        raise
+
+
+def get_json(
+    path: Text,
+    token: Optional[Text] = None,
+    params: Optional[Dict[Text, Any]] = None,
+    ttl: Optional[float] = None,
+    per_user: bool = False,
+    persist: bool = False,
+    cache_if: Optional[Callable[[Any], bool]] = None,
+    refresh: bool = False,
+    decode: Optional[Callable[[bytes], Any]] = None,
+    allow_stale: Optional[bool] = None,
+    hedge: bool = False,
+) -> Any:
+    """GET `path` on the API and return the decoded JSON body.
+
+    With `ttl`, the response is cached for that many seconds. Set `per_user`
+    when the response depends on the token, and `persist` to also keep it in
+    the ResponseStore (never done for per-user responses). `cache_if` can
+    reject responses that should not be cached, `refresh` skips the cached
+    copies and replaces them. `decode` turns the body bytes into the
+    returned (and cached) object instead of response.json() (see
+    actions.payloads). Raises requests.exceptions.RequestException like
+    requests.get.
+
+    Cached responses with an ETag or Last-Modified are revalidated; on a 304
+    the parsed object of the previous response is returned as is, callers
+    must not modify it.
+
+    Within an action the request gets the time left of the action's budget.
+    When it is spent, the previous (expired) response is returned if
+    `allow_stale` (default: for responses shared by all users) and one is
+    known; otherwise DeadlineExceeded is raised.
+
+    With `hedge`, a request slower than usual is sent a second time and the
+    first response is used (actions.hedging); only for GETs that can be
+    repeated and where a reply waits for the response.
+    """
+    key = None
+    store = get_store() if persist and not per_user else None
+    persist = store is not None
+    if ttl and (cache is not None or persist):
+        key = cache_key(path, params, token if per_user else None)
+    if key is not None and not refresh:
+        data = cache.get(key) if cache is not None else None
+        if data is not None:
+            return data
+        if persist:
+            stored = store.get(key)
+            if stored is not None:
+                data, remaining = stored
+                if cache is not None:
+                    cache.set(key, data, remaining)
+                return data
+
+    headers = auth_headers(token)
+    validated = validators.get(key) if key is not None else None
+    if validated is not None:
+        headers.update(validated.request_headers())
+    if allow_stale is None:
+        allow_stale = not per_user
+    stale = validated if allow_stale else None
+
+    try:
+        if hedge:
+            response = hedger.run(path, lambda: _request(path, headers, params))
+        else:
+            response = _request(path, headers, params)
+    except DeadlineExceeded as e:
+        if stale is None:
+            raise
+        logger.debug(f"{e}, serving the previous response")
+        return stale.data
+    if validated is not None and response.status_code == 304:
+        data = validators.reuse(validated)
+        logger.debug(f"{path} not modified, {validators.stats()}")
+    else:
+        response.raise_for_status()
+        start = time.perf_counter()
+        if decode is not None:
+            data = decode(response.content)
+        else:
+            # JSON is always UTF-8, some endpoints send a wrong charset
+            response.encoding = "utf-8"
+            data = response.json()
+        if key is not None:
+            validators.update(key, response.headers, data, len(response.content), time.perf_counter() - start)
+        upstream_transfers.record_response(response)
+        logger.debug(f"{path} downloaded ({response.headers.get('Content-Encoding') or 'identity'}), "
+                     f"{upstream_transfers.stats()}")
+
+    if key is not None and (cache_if is None or cache_if(data)):
+        if cache is not None:
+            cache.set(key, data, ttl)
+        if persist:
+            store.put(key, data, ttl)
+    return data
+
+
+def invalidate(path: Text, token: Optional[Text] = None, params: Optional[Dict[Text, Any]] = None) -> None:
+    """Drop the cached per-user response of get_json(path, token, params, per_user=True)"""
+    if cache is not None:
+        cache.delete(cache_key(path, params, token))
+
+
+def fetch_concurrently(*calls: Callable[[], Any]) -> List[Any]:
+    """Results of the `calls`, run in parallel threads.
+
+    An action needing several independent responses waits for the slowest
+    one instead of their sum. The first exception (in call order) is raised.
+    """
+    # The calls run with the caller's context (the action's deadline)
+    futures = [_request_executor.submit(contextvars.copy_context().run, call) for call in calls[1:]]
+    # The first call runs in the calling thread
+    results = [calls[0]()] if calls else []
+    return results + [future.result() for future in futures]
+
+
+def get_recommendations(token: Optional[Text], limit: int) -> Any:
+    """Personal recommendations for a logged in user, public ones otherwise"""
+    if token:
+        return get_json(
+            "/v1/recommendations", token, {"limit": limit}, ttl=RECOMMENDATIONS_TTL, per_user=True,
+            decode=decode_recommendations, allow_stale=True, hedge=True,
+        )
+    return get_json(
+        "/v1/recommendations/public", params={"limit": limit}, ttl=RECOMMENDATIONS_TTL, persist=True,
+        decode=decode_recommendations, hedge=True,
+    )
+
+
+def _search_items(data: Any) -> List[Dict[Text, Any]]:
+    return data.get("watches", {}).get("items", [])
+
+
+def search_params(
+    brand_id: Any = None,
+    category_id: Any = None,
+    color_id: Any = None,
+    movement_type_id: Any = None,
+    strap_material_id: Any = None,
+    gender: Optional[Text] = None,
+    rating_min: Optional[int] = None,
+    price_range: Optional[Tuple[int, Optional[int]]] = None,
+) -> Dict[Text, Any]:
+    """First /v1/search result page for these filters.
+
+    The same filters always give the same parameters, so a search built here
+    by one action hits the cache entries filled by another (or by prefetch).
+    """
+    params: Dict[Text, Any] = {"page": 1, "limit": SEARCH_PAGE_SIZE}
+    if brand_id:
+        params["brand_id__in"] = brand_id
+    if category_id:
+        params["category_id__in"] = category_id
+    if color_id:
+        params["color_id__in"] = color_id
+    if movement_type_id:
+        params["movement_type_id__in"] = movement_type_id
+    if strap_material_id:
+        params["strap_material_id__in"] = strap_material_id
+    if gender is not None:
+        params["gender__in"] = gender
+    if rating_min is not None:
+        # Add rating filter even if 0 (rating__gte=0 means all including unrated)
+        params["rating__gte"] = rating_min
+    if price_range:
+        min_price, max_price = price_range
+        params["base_price__range"] = f"{min_price}:{max_price if max_price is not None else MAX_PRICE}"
+    return params
+
+
+def search_watches(
+    token: Optional[Text], params: Dict[Text, Any], prefetching: bool = False
+) -> List[Dict[Text, Any]]:
+    """Watches matching the /v1/search `params`.
+
+    Searches that recently returned nothing are answered with [] without a
+    request, so callers go straight to their fallback.
+    """
+    key = cache_key("/v1/search", params)
+    if not prefetching:
+        prefetcher.requested(key)
+    if key in empty_searches:
+        return []
+
+    # Empty results are kept in the negative cache only, not in the caches
+    # sized for full result pages. Prefetches are not hedged, no reply
+    # waits for them.
+    data = get_json(
+        "/v1/search", token, params, ttl=SEARCH_TTL, persist=True,
+        cache_if=lambda d: bool(_search_items(d)), decode=decode_search, hedge=not prefetching,
+    )
+    watches = _search_items(data)
+    if not watches:
+        empty_searches.add(key)
+    return watches
+
+
+def _is_search_cached(key: Text) -> bool:
+    return empty_searches.peek(key) or (cache is not None and cache.get(key) is not None)
+
+
+prefetcher = Prefetcher(
+    lambda token, params: search_watches(token, params, prefetching=True), _is_search_cached, ttl=SEARCH_TTL
+)
+
+
+def prefetch_searches(token: Optional[Text], params_list: List[Dict[Text, Any]]) -> int:
+    """Prefetch the first result page of the most clicked of these searches.
+
+    Call after sending filter buttons, with the search parameters of each
+    button in display order.
+    """
+    options = [(cache_key("/v1/search", params), params) for params in params_list]
+    started = prefetcher.prefetch(token, options)
+    logger.debug(f"Prefetching {started} searches, {prefetcher.stats()}")
+    return started
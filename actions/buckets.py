@@ -0,0 +1,173 @@
+# Prebuilt replies for the fixed price and rating buttons.
+#
+# ActionShowPrice and ActionShowProductReviews offer fixed buttons whose
+# payloads lead to the same /v1/search query for every user. A daemon thread
+# runs these searches every `interval` seconds and keeps the finished replies
+# (text and cards), so a click on such a button is answered with a dictionary
+# lookup of the message text: no NLU filters, no taxonomy matching, no request.
+# Each reply comes with its search state, so a typed follow-up narrows it
+# (actions.refinement).
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Text, Tuple
+
+from actions.api import search_params, search_watches
+from actions.cards import price_range_text, rating_text, watch_cards
+from actions.refinement import SearchState, is_complete
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REFRESH_INTERVAL = 300
+# A reply whose refresh keeps failing is dropped after this many intervals
+MAX_STALE_INTERVALS = 3
+
+
+class Bucket(NamedTuple):
+    title: Text
+    payload: Text
+    price_range: Optional[Tuple[int, Optional[int]]] = None
+    rating_min: Optional[int] = None
+
+    def filters(self) -> Dict[Text, Any]:
+        """Filters of the search, as ActionSearchProducts resolves them"""
+        if self.price_range is not None:
+            return {"price_range": self.price_range}
+        return {"rating_min": self.rating_min}
+
+    def params(self) -> Dict[Text, Any]:
+        return search_params(**self.filters())
+
+    def description(self) -> Text:
+        if self.price_range is not None:
+            return price_range_text(self.price_range)
+        return rating_text(self.rating_min)
+
+
+# Buttons of ActionShowPrice, the ranges are what actions.parsing.parse_price
+# returns for the payloads
+PRICE_BUCKETS = (
+    Bucket("Dưới 1 triệu", "tôi muốn mua đồng hồ giá dưới 1 triệu", price_range=(0, 1000000)),
+    Bucket("1-3 triệu", "tôi muốn mua đồng hồ giá từ 1 triệu đến 3 triệu", price_range=(1000000, 3000000)),
+    Bucket("3-7 triệu", "tôi muốn mua đồng hồ giá từ 3 triệu đến 7 triệu", price_range=(3000000, 7000000)),
+    Bucket("7-15 triệu", "tôi muốn mua đồng hồ giá từ 7 triệu đến 15 triệu", price_range=(7000000, 15000000)),
+    Bucket("Trên 15 triệu", "tôi muốn mua đồng hồ giá trên 15 triệu", price_range=(15000000, None)),
+)
+
+# Buttons of ActionShowProductReviews (parse_rating of the payloads)
+RATING_BUCKETS = (
+    Bucket("Chưa đánh giá", "tôi muốn mua đồng hồ từ 0 sao trở lên", rating_min=0),
+    Bucket("Trên 1 sao", "tôi muốn mua đồng hồ từ 1 sao trở lên", rating_min=1),
+    Bucket("Trên 2 sao", "tôi muốn mua đồng hồ từ 2 sao trở lên", rating_min=2),
+    Bucket("Trên 3 sao", "tôi muốn mua đồng hồ từ 3 sao trở lên", rating_min=3),
+    Bucket("Trên 4 sao", "tôi muốn mua đồng hồ từ 4 sao trở lên", rating_min=4),
+    Bucket("Trên 5 sao", "tôi muốn mua đồng hồ từ 5 sao trở lên", rating_min=5),
+)
+
+
+def bucket_buttons(buckets: Sequence[Bucket]) -> List[Dict[Text, Any]]:
+    return [{"title": bucket.title, "payload": bucket.payload} for bucket in buckets]
+
+
+def _text_key(text: Text) -> Text:
+    return " ".join(text.casefold().split())
+
+
+class BucketReplies:
+    """Replies of the bucket buttons, rebuilt by a daemon thread.
+
+    Only searches with results get a reply; an empty bucket goes through
+    the search action, which falls back to recommendations.
+    """
+
+    def __init__(
+        self,
+        buckets: Sequence[Bucket],
+        interval: float = DEFAULT_REFRESH_INTERVAL,
+        fetch: Optional[Callable[[Dict[Text, Any]], List[Dict[Text, Any]]]] = None,
+    ) -> None:
+        self.buckets = list(buckets)
+        self.interval = interval
+        # Background searches must not count as clicks for the prefetcher
+        self.fetch = fetch or (lambda params: search_watches(None, params, prefetching=True))
+        # text key -> (built at, reply, search state)
+        self._replies: Dict[Text, Tuple[float, Dict[Text, Any], SearchState]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.refreshes = 0
+        self.failures = 0
+        self.served = 0
+
+    def refresh(self) -> None:
+        """Rebuild every bucket's reply; a failed search keeps the previous one"""
+        replies = dict(self._replies)
+        now = time.monotonic()
+        for bucket in self.buckets:
+            key = _text_key(bucket.payload)
+            try:
+                watches = self.fetch(bucket.params())
+            except Exception as e:
+                self.failures += 1
+                logger.warning(f"Refreshing the reply of '{bucket.title}' failed: {e}")
+                built_at = replies[key][0] if key in replies else now
+                if now - built_at > MAX_STALE_INTERVALS * self.interval:
+                    replies.pop(key, None)
+                continue
+            if not watches:
+                replies.pop(key, None)
+                continue
+            filters = bucket.filters()
+            replies[key] = (now, {
+                "text": f"Kết quả lọc theo {bucket.description()}:",
+                "custom": {
+                    "type": "cards",
+                    "cards": watch_cards.cards(watches)
+                }
+            }, SearchState(filters, {field: bucket.description() for field in filters}, watches, is_complete(watches)))
+        # One assignment, readers see either the old or the new replies
+        self._replies = replies
+        self.refreshes += 1
+
+    def search(self, text: Text) -> Optional[SearchState]:
+        """Search state of the prebuilt reply of `text`, None without one"""
+        entry = self._replies.get(_text_key(text))
+        return entry[2] if entry is not None else None
+
+    def reply(self, text: Text) -> Optional[Dict[Text, Any]]:
+        """utter_message kwargs when `text` is a bucket payload with a prebuilt reply"""
+        entry = self._replies.get(_text_key(text))
+        if entry is None:
+            return None
+        self.served += 1
+        return entry[1]
+
+    def start(self) -> None:
+        if self._thread is not None or self.interval <= 0:
+            return
+        self._thread = threading.Thread(target=self._run, name="bucket-replies", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            start = time.monotonic()
+            self.refresh()
+            logger.debug(
+                f"Bucket replies refreshed in {time.monotonic() - start:.2f}s, "
+                f"{len(self._replies)}/{len(self.buckets)} ready"
+            )
+            self._stop.wait(self.interval)
+
+
+def _create_bucket_replies() -> BucketReplies:
+    """ACTION_BUCKET_REFRESH sets the interval in seconds, 0 disables the replies"""
+    interval = float(os.getenv("ACTION_BUCKET_REFRESH", DEFAULT_REFRESH_INTERVAL))
+    return BucketReplies(PRICE_BUCKETS + RATING_BUCKETS, interval)
+
+
+bucket_replies = _create_bucket_replies()
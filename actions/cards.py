@@ -0,0 +1,218 @@
+# Product and order cards and filter descriptions sent to the FE.
+#
+# Replies with products are custom {"type": "cards", "cards": [...]} payloads.
+# The card of a /v1/search item and the wording of price and rating filters
+# are built here, so actions and prebuilt replies (actions.buckets) match.
+# Orders are sent as {"type": "order_cards", "orders": [...]}, discounts as
+# {"type": "promotion_cards", "promotions": [...]}. Watch cards are built and
+# JSON-encoded once per item content (watch_cards, actions.encoding).
+
+from typing import Any, Dict, Optional, Text, Tuple
+
+from actions.encoding import CardCache
+from actions.orders import OrderStatusTable
+
+
+def format_price_value(value: Optional[int]) -> Text:
+    """Format a price in VND into a concise human-readable string."""
+    if value is None:
+        return ""
+
+    def format_number(num: float) -> Text:
+        return str(int(num)) if num.is_integer() else f"{num:.1f}".rstrip("0").rstrip(".")
+
+    if value >= 1_000_000:
+        millions = value / 1_000_000
+        return f"{format_number(millions)} triệu"
+
+    thousands = value / 1000
+    return f"{format_number(thousands)}k"
+
+
+def price_range_text(price_range: Tuple[Optional[int], Optional[int]]) -> Text:
+    """"dưới 1 triệu", "giá từ 1 triệu đến 3 triệu" or "trên 15 triệu" """
+    min_price, max_price = price_range
+    if max_price is not None:
+        if not min_price:
+            return f"dưới {format_price_value(max_price)}"
+        return f"giá từ {format_price_value(min_price)} đến {format_price_value(max_price)}"
+    if min_price is not None:
+        return f"trên {format_price_value(min_price)}"
+    return ""
+
+
+def rating_text(rating_min: int) -> Text:
+    """"chưa đánh giá" for 0 (all watches), "đánh giá từ N sao" otherwise"""
+    if rating_min == 0:
+        return "chưa đánh giá"
+    return f"đánh giá từ {rating_min} sao"
+
+
+def watch_card(watch: Dict[Text, Any]) -> Dict[Text, Any]:
+    """Card of a /v1/search item"""
+    return {
+        "id": watch.get("id"),
+        "code": watch.get("code"),
+        "name": watch.get("name"),
+        "description": watch.get("description"),
+        "model": watch.get("model"),
+        "caseMaterial": watch.get("case_material"),
+        "caseSize": watch.get("case_size"),
+        "strapSize": watch.get("strap_size"),
+        "gender": watch.get("gender"),
+        "waterResistance": watch.get("water_resistance"),
+        "releaseDate": watch.get("release_date"),
+        "sold": watch.get("sold"),
+        "basePrice": watch.get("base_price"),
+        "rating": watch.get("rating"),
+        "status": watch.get("status"),
+        "thumbnail": watch.get("thumbnail"),
+        "slider": (watch.get("slider") or "").split(",") if watch.get("slider") else [],
+        "brandId": watch.get("brand_id"),
+        "brandName": watch.get("brand_name"),
+        "categoryId": watch.get("category_id"),
+        "categoryName": watch.get("category_name"),
+        "movementTypeId": watch.get("movement_type_id"),
+        "movementTypeName": watch.get("movement_type_name"),
+        "createdAt": watch.get("created_at"),
+        "updatedAt": watch.get("updated_at")
+    }
+
+
+watch_cards = CardCache(watch_card)
+
+
+def recommendation_card(rec: Dict[Text, Any]) -> Dict[Text, Any]:
+    """Card of a /v1/recommendations item"""
+    # Normalize gender value
+    gender_val = rec.get("gender") or rec.get("gender_target")
+    if gender_val in ("M", "F"):
+        gender_val = "0" if gender_val == "M" else "1"
+    # Normalize slider list
+    slider_raw = rec.get("slider")
+    if isinstance(slider_raw, str):
+        slider_list = [s.strip() for s in slider_raw.split(",") if s.strip()]
+    elif isinstance(slider_raw, list):
+        slider_list = slider_raw
+    else:
+        slider_list = rec.get("images", [])
+    # Thumbnail fallback
+    thumbnail = rec.get("thumbnail") or (rec.get("images", [None])[0] if rec.get("images") else None)
+    # Movement type name
+    movement_type_name = (rec.get("movement_type") or {}).get("name") or ", ".join(rec.get("movement_type_tags", []))
+    # Case material
+    case_material = rec.get("case_material") or ", ".join(rec.get("material_tags", []))
+
+    return {
+        "id": rec.get("watch_id"),
+        "code": rec.get("code") or f"REC-{rec.get('watch_id')}",
+        "name": rec.get("name"),
+        "description": rec.get("description"),
+        "model": rec.get("model") or rec.get("name"),
+        "caseMaterial": case_material,
+        "caseSize": rec.get("case_size"),
+        "strapSize": rec.get("strap_size"),
+        "gender": gender_val,
+        "waterResistance": rec.get("water_resistance"),
+        "releaseDate": rec.get("release_date"),
+        "sold": rec.get("sold"),
+        "basePrice": rec.get("base_price"),
+        "rating": rec.get("rating"),
+        "status": rec.get("status", True),
+        "thumbnail": thumbnail,
+        "slider": slider_list,
+        "brandId": (rec.get("brand", {}) or {}).get("id"),
+        "brandName": (rec.get("brand", {}) or {}).get("name"),
+        "categoryId": (rec.get("category", {}) or {}).get("id"),
+        "categoryName": (rec.get("category", {}) or {}).get("name"),
+        "movementTypeId": None,
+        "movementTypeName": movement_type_name,
+        "colorTags": rec.get("color_tags", []),
+        "styleTags": rec.get("style_tags", []),
+        "priceTier": rec.get("price_tier"),
+        "sizeCategory": rec.get("size_category"),
+        "isAiRecommended": rec.get("is_ai_recommended"),
+        "score": rec.get("score")
+    }
+
+
+def order_status(order: Dict[Text, Any], statuses: OrderStatusTable) -> Tuple[Text, Text]:
+    """(name, color) of the order's current status"""
+    current_status_id = order.get("current_status_id")
+    current_status = order.get("currentStatus", {})
+
+    # Get status info - prioritize currentStatus from order, then fallback to status_map
+    if current_status and current_status.get("name"):
+        status_name = current_status.get("name", "Không xác định")
+        # Get color from hex_code mapping
+        hex_code = current_status.get("hex_code", "").upper()
+        status_color = statuses.hex_to_color.get(hex_code, "Gray")
+    else:
+        # Fallback to status_map lookup
+        status_id_key = str(current_status_id) if current_status_id else None
+        status_info = statuses.by_id.get(status_id_key, {}) if status_id_key else {}
+        status_name = status_info.get("name", "Không xác định")
+        status_color = status_info.get("color", "Gray")
+    return status_name, status_color
+
+
+def format_amount(amount: Optional[int]) -> Text:
+    return f"{amount or 0:,}".replace(",", ".") + " VNĐ"
+
+
+def format_api_date(value: Optional[Text]) -> Text:
+    """"2025-10-17" from "20251017182236" """
+    return value[:4] + "-" + value[4:6] + "-" + value[6:8] if value else "N/A"
+
+
+def order_card(order: Dict[Text, Any], statuses: OrderStatusTable) -> Dict[Text, Any]:
+    """Card of an order with its "view detail" button"""
+    order_id = order.get("id")
+    order_code = order.get("code")
+    status_name, status_color = order_status(order, statuses)
+    return {
+        "id": order_id,
+        "code": order_code,
+        "customer_name": order.get("guess_name", ""),
+        "total_amount": format_amount(order.get("final_amount", 0)),
+        "status": status_name,
+        "status_color": status_color,
+        "created_date": format_api_date(order.get("created_at")),
+        "buttons": [
+            {
+                "title": f"#{order_id} - {order_code} - {status_name}",
+                "payload": f"xem chi tiết đơn hàng {order_code}",
+                "metadata": {
+                    "order_id": order_id,
+                    "order_code": order_code,
+                    "status_name": status_name,
+                    "status_color": status_color,
+                    "intent": "view_order_detail"
+                }
+            }
+        ]
+    }
+
+
+def promotion_card(discount: Dict[Text, Any]) -> Dict[Text, Any]:
+    """Card of a /v1/discounts item"""
+    discount_type = discount.get("discount_type")
+    discount_value = discount.get("discount_value", 0)
+    # Format discount value based on type
+    if discount_type == "0":  # Fixed amount
+        formatted_discount_value = format_amount(discount_value)
+    else:  # Percentage
+        formatted_discount_value = f"{discount_value}%"
+
+    return {
+        "id": discount.get("id"),
+        "code": discount.get("code"),
+        "name": discount.get("name"),
+        "description": discount.get("description"),
+        "discount_value": formatted_discount_value,
+        "min_order_value": format_amount(discount.get("min_order_value", 0)),
+        "max_discount_amount": format_amount(discount.get("max_discount_amount", 0)),
+        "effective_date": format_api_date(discount.get("effective_date")),
+        "valid_until": format_api_date(discount.get("valid_until")),
+        "discount_type": "Giảm cố định" if discount_type == "0" else "Giảm phần trăm"
+    }
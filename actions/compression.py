@@ -0,0 +1,154 @@
+# Negotiated compression of API responses and webhook replies.
+#
+# requests already asks the API for gzip or deflate bodies and decodes them
+# before get_json parses them; TransferStats compares the bytes received with
+# the decoded sizes, so the logs show whether the API really compresses.
+# Replies of the action server are compressed here when the Rasa server
+# accepts it (its aiohttp client sends "Accept-Encoding: gzip, deflate") and
+# they are large enough to gain from it: a 12-card search reply is ~10 kB of
+# repetitive JSON.
+
+import gzip
+import logging
+import os
+import threading
+import zlib
+from typing import Any, Dict, Optional, Text
+
+logger = logging.getLogger(__name__)
+
+# Replies smaller than this are sent as they are
+COMPRESS_MIN_BYTES = int(os.getenv("ACTION_COMPRESS_MIN_BYTES", "1024"))
+# zlib level of replies, 0 disables the compression
+COMPRESS_LEVEL = int(os.getenv("ACTION_COMPRESS_LEVEL", "6"))
+# Encodings produced for replies, preferred first at equal q
+ENCODINGS = ("gzip", "deflate")
+# Name of the action-server app in rasa_sdk.endpoint.create_app
+ACTION_SERVER_APP = "rasa_sdk"
+
+
+def negotiate(accept_encoding: Optional[Text]) -> Optional[Text]:
+    """The encoding of ENCODINGS with the highest q in an Accept-Encoding
+    header, None when the body must be sent as is"""
+    if not accept_encoding:
+        return None
+    weights: Dict[Text, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, parameters = item.partition(";")
+        weight = 1.0
+        for parameter in parameters.split(";"):
+            key, _, value = parameter.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name.strip().lower()] = weight
+    best = None
+    for encoding in ENCODINGS:
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > 0 and (best is None or weight > best[1]):
+            best = (encoding, weight)
+    return best[0] if best else None
+
+
+def compress(body: bytes, encoding: Text, level: int = COMPRESS_LEVEL) -> bytes:
+    """`body` encoded for a Content-Encoding of `encoding` (gzip or deflate)"""
+    if encoding == "gzip":
+        # mtime=0: the same reply always gives the same bytes
+        return gzip.compress(body, compresslevel=level, mtime=0)
+    # HTTP "deflate" is the zlib format
+    return zlib.compress(body, level)
+
+
+class TransferStats:
+    """Bytes on the wire against decoded bytes, for logs and benchmarks"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.messages = 0
+        self.compressed = 0
+        self.wire_bytes = 0
+        self.body_bytes = 0
+
+    def add(self, wire_bytes: int, body_bytes: int, compressed: bool) -> None:
+        with self._lock:
+            self.messages += 1
+            self.compressed += int(compressed)
+            self.wire_bytes += wire_bytes
+            self.body_bytes += body_bytes
+
+    def record_response(self, response: Any) -> None:
+        """Count a requests.Response whose body has been read"""
+        body_bytes = len(response.content)
+        try:
+            # Raw bytes read by urllib3, before decoding
+            wire_bytes = response.raw.tell()
+        except (AttributeError, OSError):
+            wire_bytes = 0
+        if not wire_bytes:
+            wire_bytes = int(response.headers.get("Content-Length") or body_bytes)
+        self.add(wire_bytes, body_bytes, bool(response.headers.get("Content-Encoding")))
+
+    def stats(self) -> Dict[Text, Any]:
+        return {
+            "messages": self.messages,
+            "compressed": self.compressed,
+            "wire_bytes": self.wire_bytes,
+            "body_bytes": self.body_bytes,
+            "ratio": round(self.wire_bytes / self.body_bytes, 3) if self.body_bytes else None,
+        }
+
+
+upstream_transfers = TransferStats()
+reply_transfers = TransferStats()
+
+
+async def compress_reply(request: Any, response: Any) -> None:
+    """Sanic response middleware compressing large replies"""
+    body = getattr(response, "body", None)
+    if (
+        COMPRESS_LEVEL <= 0
+        or not body
+        or response.status in (204, 304)
+        or "content-encoding" in response.headers
+    ):
+        return
+    encoding = negotiate(request.headers.get("accept-encoding"))
+    if len(body) < COMPRESS_MIN_BYTES or encoding is None:
+        reply_transfers.add(len(body), len(body), False)
+        return
+    compressed = compress(body, encoding)
+    response.body = compressed
+    response.headers["Content-Encoding"] = encoding
+    response.headers["Content-Length"] = str(len(compressed))
+    response.headers["Vary"] = "Accept-Encoding"
+    reply_transfers.add(len(compressed), len(body), True)
+
+
+def attach(app: Any) -> None:
+    """Compress the replies of the Sanic `app` (once per app)"""
+    if getattr(app.ctx, "reply_compression", False):
+        return
+    app.register_middleware(compress_reply, "response")
+    app.ctx.reply_compression = True
+
+
+def install_reply_compression() -> bool:
+    """Attach the compression to the running action server.
+
+    rasa_sdk creates its app before importing the actions package; False when
+    there is no such app (actions imported by a script or another server).
+    """
+    try:
+        from sanic import Sanic
+        from sanic.exceptions import SanicException
+    except ImportError:
+        return False
+    try:
+        app = Sanic.get_app(ACTION_SERVER_APP, force_create=False)
+    except SanicException:
+        logger.debug("No action-server app, webhook replies are not compressed")
+        return False
+    attach(app)
+    return True
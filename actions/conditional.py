@@ -0,0 +1,79 @@
+# Validators of API responses for conditional requests.
+#
+# When a cached response has expired, get_json asks again with the ETag
+# (If-None-Match) and Last-Modified (If-Modified-Since) of the last response.
+# A 304 Not Modified has no body: the parsed object of the last response is
+# reused, saving the download and the JSON decoding.
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Mapping, NamedTuple, Optional, Text
+
+
+class Validated(NamedTuple):
+    etag: Optional[Text]
+    last_modified: Optional[Text]
+    # Parsed body, shared by every 304 reuse: callers must not modify it
+    data: Any
+    size: int
+    parse_seconds: float
+
+    def request_headers(self) -> Dict[Text, Text]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ConditionalCache:
+    """Last validated response per cache key (LRU), with savings counters"""
+
+    def __init__(self, max_entries: int = 256) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Text, Validated]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.requests = 0
+        self.not_modified = 0
+        self.bytes_saved = 0
+        self.parse_seconds_saved = 0.0
+
+    def get(self, key: Text) -> Optional[Validated]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.requests += 1
+            return entry
+
+    def update(self, key: Text, headers: Mapping[Text, Text], data: Any, size: int, parse_seconds: float) -> None:
+        """Keep the response when it has validators, forget the key otherwise"""
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        with self._lock:
+            if not etag and not last_modified:
+                self._entries.pop(key, None)
+                return
+            self._entries[key] = Validated(etag, last_modified, data, size, parse_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def reuse(self, entry: Validated) -> Any:
+        """The parsed body of `entry` after a 304"""
+        with self._lock:
+            self.not_modified += 1
+            self.bytes_saved += entry.size
+            self.parse_seconds_saved += entry.parse_seconds
+        return entry.data
+
+    def stats(self) -> Dict[Text, Any]:
+        return {
+            "entries": len(self._entries),
+            "conditional_requests": self.requests,
+            "not_modified": self.not_modified,
+            "bytes_saved": self.bytes_saved,
+            "parse_ms_saved": round(self.parse_seconds_saved * 1000, 3),
+        }
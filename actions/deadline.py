@@ -0,0 +1,100 @@
+# Latency budgets of actions.
+#
+# An action decorated with `with_deadline` gets a budget when it starts
+# (ACTION_DEADLINE seconds, per-action values in ACTION_DEADLINES). get_json
+# gives every request only the time left, so a chain of calls (taxonomies,
+# then the search, then recommendations as fallback) ends within the budget
+# instead of adding up 10 s timeouts. Once too little time is left, requests
+# are not started: DeadlineExceeded is raised, cached responses are still
+# served.
+
+import contextvars
+import functools
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, Optional, Text
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Seconds an action may spend on API calls
+DEFAULT_DEADLINE = float(os.getenv("ACTION_DEADLINE", "5"))
+# A request is not started with less time left than this
+MIN_REQUEST_TIME = 0.25
+
+
+def _parse_deadlines(value: Text) -> Dict[Text, float]:
+    """"action_search_products=4,action_show_order_status=3" -> {name: seconds}"""
+    deadlines = {}
+    for item in value.split(","):
+        name, _, seconds = item.partition("=")
+        if not name.strip():
+            continue
+        try:
+            deadlines[name.strip()] = float(seconds)
+        except ValueError:
+            logger.warning(f"Ignoring invalid action deadline '{item.strip()}'")
+    return deadlines
+
+
+ACTION_DEADLINES = _parse_deadlines(os.getenv("ACTION_DEADLINES", ""))
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """The action's budget does not allow another request.
+
+    A requests Timeout, so the RequestException fallbacks of the actions
+    handle it like an API that did not answer in time.
+    """
+
+
+class Deadline:
+    def __init__(self, seconds: float, name: Text = "") -> None:
+        self.name = name
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return self.expires_at - time.monotonic()
+
+    def timeout(self, limit: float) -> float:
+        """Timeout of the next request, at most `limit`"""
+        remaining = self.remaining()
+        if remaining < MIN_REQUEST_TIME:
+            raise DeadlineExceeded(f"{self.name}: {self.seconds:g}s budget spent")
+        return min(limit, remaining)
+
+
+_current: "contextvars.ContextVar[Optional[Deadline]]" = contextvars.ContextVar("action_deadline", default=None)
+
+
+def request_timeout(limit: float) -> float:
+    """`limit`, or less when the running action has less time left"""
+    deadline = _current.get()
+    return limit if deadline is None else deadline.timeout(limit)
+
+
+def deadline_for(action_name: Text) -> float:
+    return ACTION_DEADLINES.get(action_name, DEFAULT_DEADLINE)
+
+
+def with_deadline(run: Callable[..., Any]) -> Callable[..., Any]:
+    """Decorator of Action.run setting the action's budget for its API calls.
+
+    An action run by another one (ActionSearchProducts running
+    ActionFilterProducts) shares the budget of the outer action.
+    """
+
+    @functools.wraps(run)
+    def run_with_deadline(self: Any, *args: Any, **kwargs: Any) -> Any:
+        if _current.get() is not None:
+            return run(self, *args, **kwargs)
+        token = _current.set(Deadline(deadline_for(self.name()), self.name()))
+        try:
+            return run(self, *args, **kwargs)
+        finally:
+            _current.reset(token)
+
+    return run_with_deadline
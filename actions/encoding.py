@@ -0,0 +1,176 @@
+# Fast JSON encoding of the action server's replies.
+#
+# The action server's replies are serialized with orjson instead of Sanic's
+# default encoder, which also sends UTF-8 text instead of \u escapes. Cards
+# are the bulk of a reply and the same cards go out again and again (the same
+# search pages, prebuilt bucket replies, promotions), so a card is an
+# EncodedCard: a read-only dict that keeps its JSON once it is reused, which
+# orjson splices into later replies (orjson.Fragment, orjson >= 3.9) without
+# encoding it again. Without orjson, EncodedCards are plain dicts to every
+# encoder.
+
+import functools
+import json
+import logging
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Sequence, Text, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+Fragment = getattr(orjson, "Fragment", None)
+if orjson is not None:
+    # Subclasses (EncodedCard) go to _default; Rasa events may have int keys
+    _OPTIONS = orjson.OPT_PASSTHROUGH_SUBCLASS | orjson.OPT_NON_STR_KEYS
+
+
+def _read_only(self: Any, *args: Any, **kwargs: Any) -> None:
+    raise TypeError("EncodedCard is read-only, copy it with dict(card)")
+
+
+class EncodedCard(dict):
+    """A read-only card and its JSON encoding, once it has one"""
+
+    # Unset until _encode(), EncodedCard(card) is a plain dict copy
+    __slots__ = ("encoded",)
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # Copies and unpickled cards are plain dicts
+        return dict, (dict(self),)
+
+
+def _encode(card: EncodedCard) -> None:
+    if Fragment is not None:
+        card.encoded = Fragment(orjson.dumps(card, option=orjson.OPT_NON_STR_KEYS))
+
+
+def encode_card(card: Dict[Text, Any]) -> Dict[Text, Any]:
+    """`card` as an EncodedCard, with its JSON when fragments are supported"""
+    encoded = EncodedCard(card)
+    _encode(encoded)
+    return encoded
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, EncodedCard):
+        encoded = getattr(value, "encoded", None)
+        return encoded if encoded is not None else dict(value)
+    for base in (dict, list, str, int):
+        if isinstance(value, base):
+            return base(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(value: Any, **kwargs: Any) -> Any:
+    """JSON of an action-server reply (bytes with orjson, str otherwise)"""
+    if orjson is None or kwargs:
+        return json.dumps(value, **kwargs)
+    return orjson.dumps(value, default=_default, option=_OPTIONS)
+
+
+class CardCache:
+    """Read-only cards (EncodedCard) of API items by item id (LRU).
+
+    A cached card is reused while the item is equal to the one it was built
+    from, so a card is built once for every reply showing that item until
+    the item changes, and encoded once when it is first reused. A miss
+    returns the built card and caches a read-only copy, so it costs no more
+    to send than an uncached card. Items without an id get a fresh card.
+    """
+
+    def __init__(
+        self,
+        build: Callable[[Dict[Text, Any]], Dict[Text, Any]],
+        key: Text = "id",
+        max_entries: int = 4096,
+    ) -> None:
+        self.build = build
+        self.key = key
+        self.max_entries = max_entries
+        # id -> (item, card)
+        self._cards: "OrderedDict[Any, Tuple[Dict[Text, Any], Dict[Text, Any]]]" = OrderedDict()
+        # Bucket replies and prefetches build cards in other threads
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def card(self, item: Dict[Text, Any]) -> Dict[Text, Any]:
+        return self.cards((item,))[0]
+
+    def cards(self, items: Sequence[Dict[Text, Any]]) -> List[Dict[Text, Any]]:
+        """Cards of `items`, cached ones are looked up under one lock"""
+        key = self.key
+        cards: List[Any] = [None] * len(items)
+        with self._lock:
+            for i, item in enumerate(items):
+                item_id = item.get(key)
+                entry = self._cards.get(item_id)
+                # Comparing the dicts is much cheaper than building the card
+                if entry is not None and entry[0] == item:
+                    self._cards.move_to_end(item_id)
+                    cards[i] = entry[1]
+            self.hits += len(items) - cards.count(None)
+
+        for card in cards:
+            if card is not None and not hasattr(card, "encoded"):
+                # Reused: worth encoding once (a second thread may do it too)
+                _encode(card)
+
+        built = []
+        for i, item in enumerate(items):
+            if cards[i] is None:
+                cards[i] = self.build(item)
+                built.append(i)
+        if not built:
+            return cards
+
+        with self._lock:
+            for i in built:
+                item_id = items[i].get(key)
+                if item_id is None:
+                    continue
+                self.misses += 1
+                self._cards[item_id] = (items[i], EncodedCard(cards[i]))
+                self._cards.move_to_end(item_id)
+            while len(self._cards) > self.max_entries:
+                self._cards.popitem(last=False)
+        return cards
+
+
+def install_reply_encoding() -> bool:
+    """Encode the JSON replies of rasa_sdk's action endpoints with dumps().
+
+    Only rasa_sdk.endpoint's response.json() is replaced, other Sanic apps
+    and routes of this process keep their encoder. False (replies keep
+    Sanic's encoder) without orjson or without the action server.
+    """
+    if orjson is None:
+        return False
+    endpoint = sys.modules.get("rasa_sdk.endpoint")
+    responses = getattr(endpoint, "response", None)
+    if responses is None or not hasattr(responses, "json"):
+        logger.debug("No action server, webhook replies keep Sanic's encoder")
+        return False
+    if not isinstance(responses, _ReplyResponses):
+        endpoint.response = _ReplyResponses(responses)
+    return True
+
+
+class _ReplyResponses:
+    """sanic.response as seen by rasa_sdk.endpoint, json() encodes with dumps()"""
+
+    def __init__(self, responses: Any) -> None:
+        self._responses = responses
+        self.json = functools.partial(responses.json, dumps=dumps)
+
+    def __getattr__(self, name: Text) -> Any:
+        return getattr(self._responses, name)
@@ -0,0 +1,119 @@
+# Typo-tolerant lookup of catalog names ("rolx" -> "Rolex").
+#
+# Names are indexed by their character trigrams (diacritic-free canonical key,
+# padded with spaces so short names still have several trigrams). A lookup
+# only scores the names that share trigrams with the query, the best
+# candidates are then verified with the edit distance. Cost depends on the
+# posting lists touched, not on the catalog size.
+
+import functools
+import heapq
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Text, Tuple
+
+NGRAM = 3
+# Candidates (by shared trigrams) verified with the edit distance
+MAX_CANDIDATES = 16
+# Words shorter than this are never fuzzy matched ("nam", "da", ...)
+MIN_FUZZY_LENGTH = 4
+DEFAULT_CUTOFF = 0.75
+
+
+def ngrams(key: Text, n: int = NGRAM) -> List[Text]:
+    padded = f" {key} "
+    return [padded[i:i + n] for i in range(len(padded) - n + 1)]
+
+
+def edit_distance(a: Text, b: Text, max_distance: int) -> int:
+    """Edit distance counting a swap of two neighbouring characters as one
+    edit ("omgea" -> "omega"), or max_distance + 1 once it is exceeded"""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    before_previous: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            distance = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b),
+            )
+            if i > 1 and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                distance = min(distance, before_previous[j - 2] + 1)
+            current.append(distance)
+        if min(current) > max_distance:
+            return max_distance + 1
+        before_previous, previous = previous, current
+    return previous[-1]
+
+
+def similarity(a: Text, b: Text, cutoff: float = 0.0) -> float:
+    """1 - edit distance / length of the longer text, 0.0 below `cutoff`"""
+    longest = max(len(a), len(b))
+    if not longest:
+        return 0.0
+    max_distance = int((1 - cutoff) * longest)
+    distance = edit_distance(a, b, max_distance)
+    if distance > max_distance:
+        return 0.0
+    return 1 - distance / longest
+
+
+class FuzzyIndex:
+    """Trigram index over name keys (see actions.normalizer.NormalizedQuery.key)"""
+
+    def __init__(self, keys: Sequence[Text], cutoff: float = DEFAULT_CUTOFF) -> None:
+        self.keys = list(keys)
+        self.cutoff = cutoff
+        self.postings: Dict[Text, List[int]] = {}
+        self.sizes = [len(ngrams(key)) for key in self.keys]
+        for index, key in enumerate(self.keys):
+            if not key:
+                continue
+            for gram in set(ngrams(key)):
+                self.postings.setdefault(gram, []).append(index)
+        self.max_words = max((len(key.split()) for key in self.keys), default=1)
+
+    def lookup(self, phrase: Text) -> Optional[Tuple[int, float]]:
+        """(index, score) of the name closest to `phrase`, None below the cutoff"""
+        if len(phrase) < MIN_FUZZY_LENGTH:
+            return None
+
+        shared: Counter = Counter()
+        for gram in set(ngrams(phrase)):
+            shared.update(self.postings.get(gram, ()))
+
+        # Rank by the share of the name's trigrams found in the phrase (Dice
+        # coefficient), so long names sharing common trigrams do not crowd
+        # out the right one
+        query_size = len(ngrams(phrase))
+        candidates = heapq.nlargest(
+            MAX_CANDIDATES,
+            shared,
+            key=lambda index: shared[index] / (self.sizes[index] + query_size),
+        )
+
+        best = None
+        for index in candidates:
+            score = similarity(phrase, self.keys[index], self.cutoff)
+            if score >= self.cutoff and (best is None or score > best[1]):
+                best = (index, score)
+        return best
+
+    def search(self, key: Text) -> Optional[Tuple[int, float]]:
+        """Best match of any word sequence in the query `key`"""
+        words = key.split()
+        best = None
+        for size in range(1, self.max_words + 1):
+            for start in range(len(words) - size + 1):
+                match = self.lookup(" ".join(words[start:start + size]))
+                if match and (best is None or match[1] > best[1]):
+                    best = match
+        return best
+
+
+@functools.lru_cache(maxsize=16)
+def fuzzy_index(keys: Tuple[Text, ...], cutoff: float = DEFAULT_CUTOFF) -> FuzzyIndex:
+    """Index for these keys, built once per catalog list"""
+    return FuzzyIndex(keys, cutoff)
@@ -0,0 +1,205 @@
+# Hedged requests against the latency tail of the API.
+#
+# The API answers most requests quickly but a few take seconds, and the
+# slowest call decides how long a reply takes. A hedged GET (search and
+# recommendations, which are idempotent) is sent a second time when the first
+# request has not answered within the HEDGE_PERCENTILE of the endpoint's
+# recent latencies; the first response wins. Hedges are capped to
+# HEDGE_MAX_RATE of the requests, so a slow API never gets much more than its
+# usual load. The stats compare the p99 of the first requests (what replies
+# would wait without hedging) with the p99 of what they actually waited.
+
+import contextvars
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional, Sequence, Text, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Hedges per request at most, 0 disables hedging
+HEDGE_MAX_RATE = float(os.getenv("ACTION_HEDGE_MAX_RATE", "0.05"))
+# Percentile of an endpoint's latencies after which a request is hedged
+HEDGE_PERCENTILE = float(os.getenv("ACTION_HEDGE_PERCENTILE", "95"))
+# Requests are never hedged sooner than this
+HEDGE_MIN_DELAY = 0.05
+# Latencies of an endpoint known before its requests are hedged
+MIN_SAMPLES = 20
+# Hedges saved up by quiet periods, sent at once at most
+HEDGE_BURST = 5
+
+
+def percentile(values: Sequence[float], percent: float) -> float:
+    """Nearest-rank percentile of non-empty `values`"""
+    ordered = sorted(values)
+    rank = math.ceil(percent / 100 * len(ordered))
+    return ordered[min(len(ordered), max(rank, 1)) - 1]
+
+
+class LatencyWindow:
+    """The last `size` latencies (seconds) of an endpoint"""
+
+    def __init__(self, size: int = 512) -> None:
+        self._latencies: "deque[float]" = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._latencies)
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        with self._lock:
+            latencies = list(self._latencies)
+        return percentile(latencies, percent) if latencies else None
+
+
+class HedgeBudget:
+    """Token bucket of hedges: every request earns `rate`, a hedge costs one"""
+
+    def __init__(self, rate: float, burst: float = HEDGE_BURST) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._tokens = 0.0
+        self._lock = threading.Lock()
+
+    def earn(self) -> None:
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + self.rate)
+
+    def spend(self) -> bool:
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class Hedger:
+    """Runs `send()` and, once it is slower than usual, a second `send()`.
+
+    - The delay is the `percent` percentile of the endpoint's last first
+      requests; until MIN_SAMPLES are known, requests are not hedged.
+    - At most `max_rate` hedges per request are sent (HedgeBudget), further
+      slow requests are waited for.
+    - The first successful response is returned; the exception of the first
+      request is raised when both fail. The other request is not cancelled,
+      its response is dropped.
+    """
+
+    def __init__(
+        self,
+        max_rate: float = HEDGE_MAX_RATE,
+        percent: float = HEDGE_PERCENTILE,
+        min_delay: float = HEDGE_MIN_DELAY,
+        max_workers: int = 8,
+    ) -> None:
+        self.max_rate = max_rate
+        self.percent = percent
+        self.min_delay = min_delay
+        self.budget = HedgeBudget(max_rate)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+        # Endpoint -> latencies of first requests, and of the responses used
+        self._first: Dict[Text, LatencyWindow] = {}
+        self._served: Dict[Text, LatencyWindow] = {}
+        self._lock = threading.Lock()
+
+        self.requests = 0
+        self.hedged = 0
+        self.won = 0
+        self.denied = 0
+
+    def _windows(self, name: Text) -> Tuple[LatencyWindow, LatencyWindow]:
+        with self._lock:
+            if name not in self._first:
+                self._first[name] = LatencyWindow()
+                self._served[name] = LatencyWindow()
+            return self._first[name], self._served[name]
+
+    def delay(self, name: Text) -> Optional[float]:
+        """Seconds after which a `name` request is hedged, None while too
+        few of its latencies are known"""
+        first, _ = self._windows(name)
+        if len(first) < MIN_SAMPLES:
+            return None
+        return max(self.min_delay, first.percentile(self.percent))
+
+    def _submit(self, send: Callable[[], T]) -> "Future[T]":
+        # With the caller's context (the action's deadline)
+        return self._executor.submit(contextvars.copy_context().run, send)
+
+    def run(self, name: Text, send: Callable[[], T]) -> T:
+        """The result of the first `send()` to succeed, `name` is the endpoint"""
+        if self.max_rate <= 0:
+            return send()
+        first, served = self._windows(name)
+        self.budget.earn()
+        with self._lock:
+            self.requests += 1
+        delay = self.delay(name)
+        start = time.perf_counter()
+        if delay is None:
+            try:
+                return send()
+            finally:
+                elapsed = time.perf_counter() - start
+                first.add(elapsed)
+                served.add(elapsed)
+
+        primary = self._submit(send)
+        # Failed first requests are part of the tail too
+        primary.add_done_callback(lambda _: first.add(time.perf_counter() - start))
+        try:
+            if wait((primary,), timeout=delay).done:
+                return primary.result()
+            if not self.budget.spend():
+                with self._lock:
+                    self.denied += 1
+                return primary.result()
+            with self._lock:
+                self.hedged += 1
+            hedge = self._submit(send)
+            done, _ = wait((primary, hedge), return_when=FIRST_COMPLETED)
+            winner = primary if primary in done else hedge
+            if winner.exception() is not None:
+                other = hedge if winner is primary else primary
+                # Both failed: the error of the first request
+                winner = other if other.exception() is None else primary
+            if winner is hedge:
+                with self._lock:
+                    self.won += 1
+                logger.debug(f"{name}: the hedge answered first, {self.stats()}")
+            return winner.result()
+        finally:
+            served.add(time.perf_counter() - start)
+
+    def stats(self) -> Dict[Text, Any]:
+        with self._lock:
+            names = list(self._first)
+        endpoints = {}
+        for name in names:
+            first, served = self._windows(name)
+            endpoints[name] = {
+                key: round(seconds * 1000, 1) if seconds is not None else None
+                for key, seconds in (
+                    ("delay_ms", self.delay(name)),
+                    ("p99_first_ms", first.percentile(99)),
+                    ("p99_served_ms", served.percentile(99)),
+                )
+            }
+        return {
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "won": self.won,
+            "denied": self.denied,
+            "hedge_rate": round(self.hedged / self.requests, 4) if self.requests else 0.0,
+            "endpoints": endpoints,
+        }
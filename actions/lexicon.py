@@ -0,0 +1,156 @@
+# Single-pass keyword scanner for search hints.
+#
+# Phrases of all categories (search_lexicon.yml, plus strap-material phrases
+# built from the API names) are stored in one word trie. A scan walks the trie
+# from every word of the message once, so its cost grows with the message
+# length and the longest phrase, not with the size of the vocabulary. The few
+# entries matched at a word start or anywhere in a word (the keyword checks
+# of actions.parsing) are searched for one by one.
+
+import functools
+import os
+import re
+import unicodedata
+from typing import Any, Dict, Iterable, List, NamedTuple, Sequence, Text, Tuple
+
+import yaml
+
+DEFAULT_LEXICON_PATH = os.path.join(os.path.dirname(__file__), "search_lexicon.yml")
+
+WORD_REGEX = re.compile(r"\w+")
+
+VAGUE_PRICE = "vague_price"
+STYLE = "style"
+STRAP_MATERIAL = "strap_material"
+# Keywords of actions.parsing
+PRICE_WORD = "price_word"
+RATING_WORD = "rating_word"
+GENDER_WORD = "gender_word"
+
+# Match modes of an entry: whole words, at the start of a word, anywhere
+WORD = "word"
+PREFIX = "prefix"
+SUBSTRING = "substring"
+
+# Trie key holding the entries that end at a node
+_END = ""
+
+# (category, phrase, value), optionally followed by a match mode (WORD)
+Entry = Tuple[Any, ...]
+
+
+class Hit(NamedTuple):
+    phrase: Text
+    value: Any
+    start: int
+    end: int
+
+
+def _words(text: Text) -> List[Text]:
+    return WORD_REGEX.findall(unicodedata.normalize("NFC", text).casefold())
+
+
+class Lexicon:
+    """Phrases grouped by category, found with one scan of the text"""
+
+    def __init__(self, entries: Iterable[Entry]) -> None:
+        self.entries: List[Entry] = list(entries)
+        self._trie: Dict[Text, Any] = {}
+        # NFC, case-folded text -> (category, phrase, value, match) of the
+        # PREFIX and SUBSTRING entries
+        self._fragments: Dict[Text, List[Tuple[Text, Text, Any, Text]]] = {}
+        for entry in self.entries:
+            category, phrase, value = entry[:3]
+            match = entry[3] if len(entry) > 3 else WORD
+            if match == WORD:
+                node = self._trie
+                for word in _words(phrase):
+                    node = node.setdefault(word, {})
+                node.setdefault(_END, []).append((category, phrase, value))
+            elif match in (PREFIX, SUBSTRING):
+                fragment = unicodedata.normalize("NFC", phrase).casefold()
+                self._fragments.setdefault(fragment, []).append((category, phrase, value, match))
+            else:
+                raise ValueError(f"Unknown match mode '{match}' of lexicon phrase '{phrase}'")
+
+    @classmethod
+    def load(cls, path: Text = DEFAULT_LEXICON_PATH) -> "Lexicon":
+        with open(path, encoding="utf-8") as f:
+            data = yaml.safe_load(f) or {}
+        entries = []
+        for category, phrases in data.items():
+            for phrase in phrases or []:
+                if isinstance(phrase, dict):
+                    text = str(phrase["phrase"])
+                    entries.append((category, text, phrase.get("value", text), phrase.get("match", WORD)))
+                else:
+                    entries.append((category, phrase, phrase))
+        return cls(entries)
+
+    def extend(self, entries: Iterable[Entry]) -> "Lexicon":
+        """A new lexicon with these entries added"""
+        return Lexicon(self.entries + list(entries))
+
+    def scan(self, text: Text) -> Dict[Text, List[Hit]]:
+        """Every phrase found in `text`, by category, in text order.
+
+        Overlapping phrases are all reported ("rẻ nhất" also yields "rẻ").
+        Spans refer to the NFC, case-folded text.
+        """
+        text = unicodedata.normalize("NFC", text).casefold()
+        tokens = [(m.group(), m.start(), m.end()) for m in WORD_REGEX.finditer(text)]
+        hits: Dict[Text, List[Hit]] = {}
+
+        for i, (_, start, _) in enumerate(tokens):
+            node = self._trie
+            for word, _, end in tokens[i:]:
+                node = node.get(word)
+                if node is None:
+                    break
+                for category, phrase, value in node.get(_END, ()):
+                    hits.setdefault(category, []).append(Hit(phrase, value, start, end))
+
+        if self._fragments:
+            found = set()
+            for fragment, entries in self._fragments.items():
+                start = text.find(fragment)
+                while start >= 0:
+                    at_word_start = start == 0 or not WORD_REGEX.match(text, start - 1)
+                    for category, phrase, value, match in entries:
+                        if match == SUBSTRING or at_word_start:
+                            hits.setdefault(category, []).append(
+                                Hit(phrase, value, start, start + len(fragment))
+                            )
+                            found.add(category)
+                    start = text.find(fragment, start + 1)
+            for category in found:
+                hits[category].sort(key=lambda hit: hit.start)
+        return hits
+
+
+@functools.lru_cache(maxsize=None)
+def search_lexicon() -> Lexicon:
+    return Lexicon.load()
+
+
+@functools.lru_cache(maxsize=32)
+def strap_material_lexicon(names: Tuple[Text, ...]) -> Lexicon:
+    """search_lexicon() plus strap-material phrases, hit values are indexes in `names`.
+
+    A bare material name is not enough ("đồng" is also in "đồng hồ"), it has
+    to appear as "dây <name>" or "<name> dây". "kim loại" also matches the
+    metal straps.
+    """
+    entries = []
+    for index, name in enumerate(names):
+        if not name:
+            continue
+        entries += [(STRAP_MATERIAL, f"dây {name}", index), (STRAP_MATERIAL, f"{name} dây", index)]
+        if name in ("kim loại", "thép"):
+            entries.append((STRAP_MATERIAL, "kim loại", index))
+    return search_lexicon().extend(entries)
+
+
+def distinct_phrases(hits: Sequence[Hit]) -> List[Text]:
+    """Distinct phrases of `hits` in text order"""
+    return list(dict.fromkeys(hit.phrase for hit in hits))
@@ -0,0 +1,193 @@
+# Canonical form of search queries and catalog names.
+#
+# One normalization stage for everything that matches or caches on user text:
+# Unicode NFC, case folding, synonym folding and stop-word removal (see
+# query_synonyms.yml), plus a diacritic-free key. Like actions.parsing, this
+# module must not import rasa or rasa_sdk.
+
+import functools
+import os
+import re
+import unicodedata
+from typing import Any, Dict, FrozenSet, List, NamedTuple, Optional, Sequence, Text, Tuple
+
+import yaml
+
+from actions.fuzzy_index import fuzzy_index
+
+DEFAULT_SYNONYMS_PATH = os.path.join(os.path.dirname(__file__), "query_synonyms.yml")
+
+WORD_REGEX = re.compile(r"\w+")
+
+# Lookup result for phrases that are neither synonyms nor stop words
+_NO_MATCH = object()
+
+
+def strip_diacritics(text: Text) -> Text:
+    """"đồng hồ vàng" -> "dong ho vang" """
+    decomposed = unicodedata.normalize("NFD", text)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return stripped.replace("đ", "d").replace("Đ", "D")
+
+
+class NormalizedQuery(NamedTuple):
+    # Canonical words, with diacritics
+    text: Text
+    # `text` without diacritics, for cache keys and accent-insensitive matching
+    key: Text
+    # Canonical synonym phrases found in the text
+    terms: FrozenSet[Text]
+    # `text` with the stop words kept, and without diacritics, to match
+    # catalog names ("Đồng hồ nam" must not match "đồng hồ việt nam")
+    full_text: Text
+    full_key: Text
+
+
+class QueryNormalizer:
+    """Folds synonyms and removes stop words, results are LRU cached"""
+
+    def __init__(self, path: Text = DEFAULT_SYNONYMS_PATH, cache_size: int = 4096) -> None:
+        with open(path, encoding="utf-8") as f:
+            data = yaml.safe_load(f) or {}
+
+        # word tuple -> canonical word tuple, or None for stop words
+        self.phrases: Dict[Tuple[Text, ...], Optional[Tuple[Text, ...]]] = {}
+        # the same for text typed without diacritics
+        self.plain_phrases: Dict[Tuple[Text, ...], Optional[Tuple[Text, ...]]] = {}
+
+        for canonical, variants in (data.get("synonyms") or {}).items():
+            canonical_words = self._words(canonical)
+            for phrase in [canonical] + list(variants):
+                self._add(phrase, canonical_words)
+        for phrase in data.get("stop_words") or []:
+            # Without diacritics short stop words collide with content words
+            # ("tìm" and "tím" are both "tim"), only longer ones are folded
+            self._add(phrase, None, plain=len(self._words(phrase)) > 1)
+
+        self.max_words = max((len(p) for p in self.phrases), default=1)
+        if cache_size:
+            self.normalize = functools.lru_cache(maxsize=cache_size)(self._normalize)
+        else:
+            self.normalize = self._normalize
+
+    @staticmethod
+    def _words(text: Text) -> Tuple[Text, ...]:
+        return tuple(WORD_REGEX.findall(unicodedata.normalize("NFC", text).casefold()))
+
+    def _add(
+        self, phrase: Text, replacement: Optional[Tuple[Text, ...]], plain: bool = True
+    ) -> None:
+        words = self._words(phrase)
+        self.phrases[words] = replacement
+        if plain:
+            self.plain_phrases.setdefault(tuple(strip_diacritics(w) for w in words), replacement)
+
+    def _lookup(self, words: Tuple[Text, ...]) -> Any:
+        replacement = self.phrases.get(words, _NO_MATCH)
+        if replacement is _NO_MATCH and all(w.isascii() for w in words):
+            replacement = self.plain_phrases.get(words, _NO_MATCH)
+        return replacement
+
+    def _normalize(self, text: Text) -> NormalizedQuery:
+        words = self._words(text)
+        canonical: List[Text] = []
+        full: List[Text] = []
+        terms = set()
+        i = 0
+        while i < len(words):
+            # Longest phrase first, so "rose gold" wins over "gold"
+            for n in range(min(self.max_words, len(words) - i), 0, -1):
+                replacement = self._lookup(words[i:i + n])
+                if replacement is not _NO_MATCH:
+                    break
+            else:
+                canonical.append(words[i])
+                full.append(words[i])
+                i += 1
+                continue
+
+            if replacement:
+                canonical.extend(replacement)
+                full.extend(replacement)
+                terms.add(" ".join(replacement))
+            else:
+                full.extend(words[i:i + n])
+            i += n
+
+        normalized = " ".join(canonical)
+        full_text = " ".join(full)
+        return NormalizedQuery(
+            normalized, strip_diacritics(normalized), frozenset(terms), full_text, strip_diacritics(full_text)
+        )
+
+
+def _mentions_plain(name: NormalizedQuery, query: NormalizedQuery) -> bool:
+    """Whether `name` appears in `query` once diacritics are ignored.
+
+    Like short stop words, one-word names collide with other words once
+    their diacritics are gone ("đến" and "Đen", "hỏng" and "Hồng"), so they
+    only match query words typed without diacritics.
+    """
+    name_words = name.full_key.split()
+    key_words = query.full_key.split()
+    text_words = query.full_text.split()
+    n = len(name_words)
+    for i in range(len(key_words) - n + 1):
+        if key_words[i:i + n] == name_words and (
+            n > 1 or all(word.isascii() for word in text_words[i:i + n])
+        ):
+            return True
+    return False
+
+
+def _only_terms(name: NormalizedQuery) -> bool:
+    """Whether every word of `name` belongs to one of its synonym phrases"""
+    term_words = {word for term in name.terms for word in term.split()}
+    return all(word in term_words for word in name.full_text.split())
+
+
+@functools.lru_cache(maxsize=None)
+def default_normalizer() -> QueryNormalizer:
+    return QueryNormalizer()
+
+
+def normalize_query(text: Text) -> NormalizedQuery:
+    """Canonical form of `text` with the default vocabulary"""
+    return default_normalizer().normalize(text or "")
+
+
+def match_name(
+    query: NormalizedQuery,
+    items: Sequence[Dict[Text, Any]],
+    field: Text = "name",
+    fuzzy: bool = False,
+) -> Dict[Text, Any]:
+    """First item whose `field` is mentioned in `query`, {} if none is.
+
+    Names keep their stop words ("Đồng hồ nam" is not "nam"), names made
+    of stop words only ("Đồng hồ") never match. All items are tried with the
+    exact canonical text first, then without diacritics (one-word names only
+    against words typed without them), then by synonyms: a name made of
+    synonym phrases only matches a message with all of them (a message with
+    "gold" matches a color named "Vàng gold" or "Gold", not a brand named
+    "Gold Star"). With `fuzzy`, misspelled names ("rolx") are found last
+    with a FuzzyIndex.
+    """
+    names = [(item, normalize_query(item.get(field) or "")) for item in items]
+    names = [(item, name) for item, name in names if name.text]
+
+    padded_text = f" {query.full_text} "
+    for item, name in names:
+        if f" {name.full_text} " in padded_text:
+            return item
+    for item, name in names:
+        if _mentions_plain(name, query):
+            return item
+    for item, name in names:
+        if name.terms and name.terms <= query.terms and _only_terms(name):
+            return item
+    if fuzzy and names:
+        match = fuzzy_index(tuple(name.full_key for _, name in names)).search(query.full_key)
+        if match:
+            return names[match[0]][0]
+    return {}
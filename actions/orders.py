@@ -0,0 +1,196 @@
+# Orders of the logged in user and the order-status definitions.
+#
+# The status definitions (/v1/order-status) are a small list that is the same
+# for every user. They are kept in this process for ORDER_STATUS_TTL seconds
+# together with the lookups built from them, so an order reply only waits
+# for /v1/orders.
+#
+# The user's recent orders are cached per token for ORDERS_TTL seconds and
+# serve the order list, order details, tracking and the filter by status.
+# They are dropped when the user asked to cancel an order since the last
+# order reply, or when an order is seen with another status than before.
+
+import hashlib
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Text, Tuple
+
+from actions.api import ORDER_STATUS_TTL, ORDERS_TTL, cache, fetch_concurrently, get_json, invalidate
+
+# Orders cached per user, enough to filter them by status
+RECENT_ORDERS_LIMIT = 20
+# Last seen status of each order of a user, kept longer than the orders
+SEEN_STATUSES_TTL = 24 * 3600
+
+# Actions replying with orders, a cancel request after the last one of them
+# makes the cached orders stale
+ORDER_ACTIONS = ("action_show_order_status", "action_show_order_detail", "action_filter_orders_by_status")
+CANCEL_INTENT = "cancel_order"
+
+# Color names of the status hex codes known to the FE, they win over the
+# names of the status definitions
+STATUS_HEX_COLORS = {
+    "#008000": "Green",
+    "#00FF00": "Green",
+    "#F44336": "Red",
+    "#2196F3": "Blue",
+    "#FD7E14": "Orange",
+    "#FFC107": "Yellow"
+}
+
+
+class OrderStatusTable(NamedTuple):
+    items: List[Dict[Text, Any]]
+    # Status info by string id (current_status_id of orders is a string)
+    by_id: Dict[Text, Dict[Text, Any]]
+    # Upper-case hex code -> color name
+    hex_to_color: Dict[Text, Text]
+
+    @classmethod
+    def build(cls, items: List[Dict[Text, Any]]) -> "OrderStatusTable":
+        by_id = {}
+        hex_to_color = {}
+        for status in items:
+            by_id[str(status.get("id"))] = {
+                "name": status.get("name"),
+                "description": status.get("description"),
+                "color": status.get("color"),
+                "hex_code": status.get("hex_code")
+            }
+            if status.get("hex_code") and status.get("color"):
+                hex_to_color[status["hex_code"].upper()] = status["color"]
+        hex_to_color.update(STATUS_HEX_COLORS)
+        return cls(items, by_id, hex_to_color)
+
+
+class OrderStatuses:
+    """Order-status definitions of this process, reloaded after `ttl` seconds"""
+
+    def __init__(self, ttl: float = ORDER_STATUS_TTL) -> None:
+        self.ttl = ttl
+        self._table: Optional[OrderStatusTable] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, token: Optional[Text]) -> OrderStatusTable:
+        table = self._table
+        if table is not None and time.monotonic() - self._loaded_at < self.ttl:
+            return table
+        with self._lock:
+            # Another thread may have reloaded meanwhile
+            if self._table is not table:
+                return self._table
+            data = get_json("/v1/order-status", token, ttl=ORDER_STATUS_TTL, persist=True)
+            self._table = OrderStatusTable.build(data.get("orderStatuses", {}).get("items", []))
+            self._loaded_at = time.monotonic()
+            return self._table
+
+
+status_definitions = OrderStatuses()
+
+
+def status_of(order: Dict[Text, Any]) -> Text:
+    """Status id of an order (the currentStatus name when there is none)"""
+    if order.get("current_status_id") is not None:
+        return str(order["current_status_id"])
+    return (order.get("currentStatus") or {}).get("name") or ""
+
+
+def _seen_key(token: Text) -> Text:
+    return "order-statuses-seen:" + hashlib.sha256(token.encode("utf-8")).hexdigest()[:24]
+
+
+def _order_path(order_id: Any) -> Text:
+    return f"/v1/orders/{order_id}"
+
+
+def invalidate_orders(token: Text, order_ids: Sequence[Any] = ()) -> None:
+    """Drop the cached order list and the cached details of `order_ids`"""
+    invalidate("/v1/orders", token, {"limit": RECENT_ORDERS_LIMIT})
+    for order_id in order_ids:
+        invalidate(_order_path(order_id), token)
+
+
+def _check_statuses(token: Text, orders: List[Dict[Text, Any]]) -> List[Any]:
+    """Record the statuses of `orders`, returns the ids of orders whose status changed"""
+    if cache is None:
+        return []
+    seen = cache.get(_seen_key(token)) or {}
+    changed = []
+    updated = False
+    for order in orders:
+        order_id = str(order.get("id"))
+        status = status_of(order)
+        if seen.get(order_id) == status:
+            continue
+        if order_id in seen:
+            changed.append(order.get("id"))
+        seen[order_id] = status
+        updated = True
+    if updated:
+        cache.set(_seen_key(token), seen, SEEN_STATUSES_TTL)
+    return changed
+
+
+def recent_orders(token: Text) -> List[Dict[Text, Any]]:
+    """The user's latest orders, newest first"""
+    data = get_json("/v1/orders", token, {"limit": RECENT_ORDERS_LIMIT}, ttl=ORDERS_TTL, per_user=True)
+    orders = data.get("orders", {}).get("items", [])
+    changed = _check_statuses(token, orders)
+    if changed:
+        # Details fetched before the change are stale
+        for order_id in changed:
+            invalidate(_order_path(order_id), token)
+    return orders
+
+
+def order_detail(token: Text, order_id: Any) -> Optional[Dict[Text, Any]]:
+    """An order that is not among the recent ones, None when it is unknown"""
+    data = get_json(_order_path(order_id), token, ttl=ORDERS_TTL, per_user=True)
+    order = data.get("order", data) if isinstance(data, dict) else None
+    if not order or order.get("id") is None:
+        return None
+    if _check_statuses(token, [order]):
+        # The cached list still has the old status
+        invalidate("/v1/orders", token, {"limit": RECENT_ORDERS_LIMIT})
+    return order
+
+
+def cancel_requested(events: List[Dict[Text, Any]]) -> bool:
+    """True when the user asked to cancel an order after the last order reply"""
+    for event in reversed(events):
+        if event.get("event") == "action" and event.get("name") in ORDER_ACTIONS:
+            return False
+        if event.get("event") == "user" and ((event.get("parse_data") or {}).get("intent") or {}).get("name") == CANCEL_INTENT:
+            return True
+    return False
+
+
+def find_order(
+    orders: List[Dict[Text, Any]],
+    order_id: Any = None,
+    order_code: Optional[Text] = None,
+    text: Text = "",
+) -> Optional[Dict[Text, Any]]:
+    """The order with this id or code, or whose code appears in `text`"""
+    for order in orders:
+        if order_id is not None and str(order.get("id")) == str(order_id):
+            return order
+        if order_code and order.get("code") == order_code:
+            return order
+    text = text.casefold()
+    # Longest codes first, "DH10" also contains "DH1"
+    for order in sorted(orders, key=lambda order: -len(order.get("code") or "")):
+        code = order.get("code")
+        if code and code.casefold() in text:
+            return order
+    return None
+
+
+def fetch_orders_with_statuses(token: Text) -> Tuple[List[Dict[Text, Any]], OrderStatusTable]:
+    """The user's recent orders and the status table, fetched concurrently
+    when neither is cached"""
+    return tuple(fetch_concurrently(
+        lambda: recent_orders(token),
+        lambda: status_definitions.get(token),
+    ))
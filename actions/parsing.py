@@ -0,0 +1,303 @@
+# Parsing of price, rating and gender filters from Vietnamese user text.
+#
+# These helpers are shared by the NLU pipeline (components.shop_entity_extractor)
+# and the action server, so this module must not import rasa or rasa_sdk.
+
+import functools
+import re
+from typing import Any, Dict, List, Optional, Text, Tuple
+
+from actions.lexicon import GENDER_WORD, PRICE_WORD, RATING_WORD, Hit, search_lexicon
+
+# Entity types produced by ShopEntityExtractor
+PRICE_MIN = "price_min"
+PRICE_MAX = "price_max"
+RATING_MIN = "rating_min"
+GENDER = "gender"
+
+# Entities from other extractors (e.g. DIET "gender": "nam") are ignored
+SHOP_ENTITY_EXTRACTOR = "ShopEntityExtractor"
+
+# Key set in the parse data when ShopEntityExtractor ran on the message
+SHOP_ENTITIES_PARSED = "shop_entities_parsed"
+
+# Thousand separators (1.000.000) and decimal commas (1,5 triệu)
+THOUSAND_SEP_REGEX = re.compile(r"(?<=\d)[\.,](?=\d{3}(?:\D|$))")
+DECIMAL_COMMA_REGEX = re.compile(r"(?<=\d),(?=\d)")
+
+
+@functools.lru_cache(maxsize=256)
+def _keywords(text: Text) -> Dict[Text, List[Hit]]:
+    """search_lexicon() hits of lower-cased `text`, shared by the parse_* calls
+    on one message"""
+    return search_lexicon().scan(text)
+
+
+def parse_price(text: Text) -> Optional[Tuple[int, Optional[int]]]:
+    """
+    Parse price from Vietnamese text.
+    Returns tuple (min_price, max_price) in VND, or None if no price found.
+    Examples:
+    - "250k" -> (0, 250000)
+    - "1 triệu" -> (0, 1000000)
+    - "từ 100k đến 500k" -> (100000, 500000)
+    - "dưới 1 triệu" -> (0, 1000000)
+    - "trên 5 triệu" -> (5000000, None)
+    """
+    # Skip price parsing ONLY if text contains rating-related keywords WITHOUT price keywords
+    # This allows parsing price even when rating is present, as long as price keywords exist
+    text_lower = text.lower()
+    # Keywords are in search_lexicon.yml
+    keywords = _keywords(text_lower)
+    has_price_keywords = PRICE_WORD in keywords
+    has_rating_keywords = RATING_WORD in keywords
+
+    # Only skip if rating keywords exist but NO price keywords (to avoid false matches)
+    if has_rating_keywords and not has_price_keywords:
+        return None
+
+    # Normalize formatting: remove thousand separators but keep decimals, handle decimal commas
+    text = THOUSAND_SEP_REGEX.sub("", text_lower)
+    text = DECIMAL_COMMA_REGEX.sub(".", text)
+
+    # Expand compact million notations (e.g., 2m4 -> 2.4 triệu, 1tr2 -> 1.2 triệu)
+    text = re.sub(r"(\d+)\s*m\s*(\d+)", r"\1.\2 triệu", text, flags=re.IGNORECASE)
+    text = re.sub(r"(\d+)\s*m\b", r"\1 triệu", text, flags=re.IGNORECASE)
+    text = re.sub(r"(\d+)\s*tr\s*(\d+)", r"\1.\2 triệu", text, flags=re.IGNORECASE)
+    text = re.sub(r"(\d+)\s*tr\b", r"\1 triệu", text, flags=re.IGNORECASE)
+    text = re.sub(r"(\d+)\s+triệu\s+(\d+)(?!\s*(?:nghìn|ngàn|k))", r"\1.\2 triệu", text)
+
+    number_token = r"\d+(?:[\.,]\d+)?(?:\s*(?:m|tr|triệu|k|nghìn|ngàn))?(?:\s+\d+\s*(?:nghìn|ngàn|k))?"
+
+    # Helper to convert text to number
+    def text_to_number(s):
+        s = s.strip().lower()
+        if not s:
+            return None
+        s = THOUSAND_SEP_REGEX.sub("", s)
+        s = DECIMAL_COMMA_REGEX.sub(".", s)
+        s = s.replace("ngàn", "nghìn")
+        s = re.sub(r"\s+", " ", s).strip()
+
+        # Remove currency words for easier parsing
+        for currency_word in ["vnd", "vnđ", "đồng", "đ"]:
+            if s.endswith(currency_word):
+                s = s[: -len(currency_word)].strip()
+
+        # Patterns for million-based expressions
+        match = re.fullmatch(r"(\d+)\s*(?:triệu|tr)\s+(\d+)\s*(?:nghìn|k)", s)
+        if match:
+            return int(match.group(1)) * 1000000 + int(match.group(2)) * 1000
+
+        match = re.fullmatch(r"(\d+)\s*(?:triệu|tr)\s+(\d+)", s)
+        if match:
+            combined = float(f"{match.group(1)}.{match.group(2)}")
+            return int(combined * 1000000)
+
+        match = re.fullmatch(r"(\d+(?:\.\d+)?)\s*(?:triệu|tr|m)", s)
+        if match:
+            return int(float(match.group(1)) * 1000000)
+
+        # Thousand-based expressions
+        match = re.fullmatch(r"(\d+(?:\.\d+)?)\s*(?:k|nghìn)", s)
+        if match:
+            return int(float(match.group(1)) * 1000)
+
+        # Plain number with optional decimal
+        try:
+            val = float(s)
+            if val < 10000:
+                return int(val * 1000)
+            return int(val)
+        except:
+            pass
+
+        # Handle "k" suffix (thousand)
+        if s.endswith("k"):
+            return int(float(s[:-1]) * 1000)
+        # Handle "nghìn" fallback (if still present)
+        if "nghìn" in s:
+            num_part = s.replace("nghìn", "").strip()
+            if num_part:
+                return int(float(num_part) * 1000)
+
+        return None
+
+    # Pattern 1: "từ X đến Y" or "khoảng từ X đến Y" or "trong khoảng từ X đến Y"
+    range_pattern = rf"(?:từ|khoảng từ|trong khoảng từ)\s+({number_token})\s+đến\s+({number_token})"
+    match = re.search(range_pattern, text)
+    if match:
+        min_val = text_to_number(match.group(1))
+        max_val = text_to_number(match.group(2))
+        if min_val is not None and max_val is not None:
+            return (min_val, max_val)
+
+    # Pattern 1b: "X đến Y" or "X - Y"
+    range_pattern_simple = rf"({number_token})\s+(?:đến|-)\s+({number_token})"
+    match = re.search(range_pattern_simple, text)
+    if match:
+        min_val = text_to_number(match.group(1))
+        max_val = text_to_number(match.group(2))
+        if min_val is not None and max_val is not None:
+            return (min_val, max_val)
+
+    # Pattern 2: "dưới X" or "dưới X triệu" or "dưới Xk"
+    below_pattern = rf"dưới\s+({number_token})"
+    match = re.search(below_pattern, text)
+    if match:
+        max_val = text_to_number(match.group(1))
+        if max_val is not None:
+            return (0, max_val)
+
+    # Pattern 3: "trên X" or "từ X trở lên"
+    above_pattern = rf"(?:trên|từ)\s+({number_token})(?:\s+trở lên)?"
+    match = re.search(above_pattern, text)
+    if match:
+        min_val = text_to_number(match.group(1))
+        if min_val is not None:
+            return (min_val, None)  # No upper limit
+
+    # Pattern 4: "tầm X" or "khoảng X" or "cỡ X" or "còn có X"
+    exact_pattern = rf"(?:tầm|khoảng|cỡ|còn có)\s+({number_token})"
+    match = re.search(exact_pattern, text)
+    if match:
+        val = text_to_number(match.group(1))
+        if val is not None:
+            # For exact price, use small range (e.g., ±10%)
+            return (int(val * 0.9), int(val * 1.1))
+
+    # Pattern 5: Just a number with k/tr/triệu/nghìn (e.g., "250k", "1 triệu")
+    simple_pattern = r"([\d\.\,\s]+(?:k|tr|triệu|nghìn|m))"
+    matches = re.findall(simple_pattern, text)
+    if matches:
+        # Try to find price context
+        if "giá" in text or "còn có" in text or "có" in text[:50] or "mua" in text:
+            val = text_to_number(matches[0])
+            if val is not None:
+                return (0, val)
+
+    # Pattern 6: Just a number without unit (e.g., "250 mua", "500 mua được")
+    # Assume it's in thousands if number is reasonable (100-9999)
+    number_pattern = r"^(\d{2,4})\s+(?:mua|đồng|k|triệu|nghìn)"
+    match = re.search(number_pattern, text)
+    if match:
+        num = int(match.group(1))
+        if 100 <= num <= 9999:
+            # Assume it's thousands (250 → 250k)
+            return (0, num * 1000)
+
+    # Pattern 7: Number at start/end with "mua" context
+    number_with_context = r"(\d{2,4})\s+(?:mua|đồng|k|triệu|nghìn|được)"
+    match = re.search(number_with_context, text)
+    if match:
+        num = int(match.group(1))
+        if 100 <= num <= 9999:
+            # Assume it's thousands (250 → 250k)
+            return (0, num * 1000)
+
+    return None
+
+
+
+def parse_rating(text: Text) -> Optional[int]:
+    """
+    Parse rating from Vietnamese text.
+    Returns rating value (0-5) or None if no rating found.
+    Examples:
+    - "đồng hồ 4 sao" -> 4
+    - "rating từ 4" -> 4
+    - "đánh giá từ 4 sao trở lên" -> 4
+    - "4 sao trở lên" -> 4
+    - "từ 4 sao" -> 4
+    - "từ 0 sao trở lên" -> 0 (chưa đánh giá)
+    """
+    text = text.lower()
+
+    # Pattern 1: "X sao" or "X sao trở lên" or "từ X sao"
+    rating_pattern = r"(?:từ\s+)?(\d)\s*sao(?:\s+trở\s+lên)?"
+    match = re.search(rating_pattern, text)
+    if match:
+        rating = int(match.group(1))
+        if 0 <= rating <= 5:  # Allow 0 for "chưa đánh giá"
+            return rating
+
+    # Pattern 2: "rating X" or "đánh giá X" or "rating từ X"
+    rating_pattern2 = r"(?:rating|đánh giá)(?:\s+từ)?\s+(\d)"
+    match = re.search(rating_pattern2, text)
+    if match:
+        rating = int(match.group(1))
+        if 0 <= rating <= 5:  # Allow 0 for "chưa đánh giá"
+            return rating
+
+    # Pattern 3: "X sao" standalone (if rating-related keywords present)
+    if RATING_WORD in _keywords(text):
+        rating_pattern3 = r"\b(\d)\s*sao"
+        match = re.search(rating_pattern3, text)
+        if match:
+            rating = int(match.group(1))
+            if 0 <= rating <= 5:  # Allow 0 for "chưa đánh giá"
+                return rating
+
+    return None
+
+
+def parse_gender(text: Text) -> Optional[Text]:
+    """
+    Parse gender from Vietnamese text.
+    Returns "0" (nam), "1" (nữ) or None. "nữ" wins when both are present.
+    """
+    codes = {hit.value for hit in _keywords(text.lower()).get(GENDER_WORD, [])}
+    for code in ("1", "0"):
+        if code in codes:
+            return code
+    return None
+
+
+def parse_shop_entities(text: Text) -> List[Dict[Text, Any]]:
+    """Parse price, rating and gender from text into normalized entities"""
+    entities: List[Dict[Text, Any]] = []
+
+    price_range = parse_price(text)
+    if price_range:
+        min_price, max_price = price_range
+        entities.append({"entity": PRICE_MIN, "value": min_price})
+        if max_price is not None:
+            entities.append({"entity": PRICE_MAX, "value": max_price})
+
+    rating_min = parse_rating(text)
+    if rating_min is not None:
+        entities.append({"entity": RATING_MIN, "value": rating_min})
+
+    gender_code = parse_gender(text)
+    if gender_code is not None:
+        entities.append({"entity": GENDER, "value": gender_code})
+
+    return entities
+
+
+def get_shop_filters(latest_message: Dict[Text, Any]) -> Tuple[Optional[Tuple[int, Optional[int]]], Optional[int], Optional[Text]]:
+    """
+    Return (price_range, rating_min, gender_code) for the latest message.
+    Reads the entities from ShopEntityExtractor and only parses the text
+    when the extractor did not run (e.g. a model trained without it).
+    """
+    if not latest_message.get(SHOP_ENTITIES_PARSED):
+        text = (latest_message.get("text") or "").lower()
+        return parse_price(text), parse_rating(text), parse_gender(text)
+
+    values = {
+        e.get("entity"): e.get("value")
+        for e in latest_message.get("entities", [])
+        if e.get("extractor") == SHOP_ENTITY_EXTRACTOR
+    }
+
+    price_range = None
+    if values.get(PRICE_MIN) is not None:
+        max_price = values.get(PRICE_MAX)
+        price_range = (int(values[PRICE_MIN]), int(max_price) if max_price is not None else None)
+    rating_min = int(values[RATING_MIN]) if values.get(RATING_MIN) is not None else None
+    gender_code = values.get(GENDER)
+    if gender_code is not None:
+        gender_code = str(gender_code)
+
+    return price_range, rating_min, gender_code
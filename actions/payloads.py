@@ -0,0 +1,66 @@
+# Decoding of the large API payloads (/v1/search, /v1/recommendations).
+#
+# Bodies are parsed with orjson when it is installed (ujson, which comes with
+# Rasa, otherwise) straight from the downloaded bytes. Only the item fields
+# read by the cards (actions.cards), the refinement filters and the reply
+# descriptions are kept, so the caches store and the card builders walk a
+# fraction of each item. A field missing from an item stays missing, callers
+# keep reading items with .get().
+
+from typing import AbstractSet, Any, Dict, List, Text
+
+try:
+    from orjson import loads
+except ImportError:
+    try:
+        from ujson import loads
+    except ImportError:
+        from json import loads
+
+# /v1/search item fields used by watch_card, actions.refinement and the
+# filter descriptions of ActionFilterProducts
+SEARCH_ITEM_FIELDS = frozenset((
+    "id", "code", "name", "description", "model", "case_material", "case_size", "strap_size",
+    "gender", "water_resistance", "release_date", "sold", "base_price", "rating", "status",
+    "thumbnail", "slider", "brand_id", "brand_name", "category_id", "category_name",
+    "movement_type_id", "movement_type_name", "color_id", "color_name", "strap_material_id",
+    "strap_material_name", "material_name", "created_at", "updated_at",
+))
+# Recommendation fields used by the recommendation cards
+RECOMMENDATION_FIELDS = frozenset((
+    "watch_id", "code", "name", "description", "model", "case_material", "material_tags",
+    "case_size", "strap_size", "gender", "gender_target", "water_resistance", "release_date",
+    "sold", "base_price", "rating", "status", "thumbnail", "images", "slider", "brand",
+    "category", "movement_type", "movement_type_tags", "color_tags", "style_tags",
+    "price_tier", "size_category", "is_ai_recommended", "score",
+))
+
+
+def project(items: Any, fields: AbstractSet[Text]) -> List[Dict[Text, Any]]:
+    """`items` reduced to `fields`, non-dict entries dropped"""
+    if not isinstance(items, list):
+        return []
+    # One pass over each item's keys, faster than looking up every field
+    return [
+        {field: value for field, value in item.items() if field in fields}
+        for item in items if isinstance(item, dict)
+    ]
+
+
+def decode_search(body: bytes) -> Any:
+    """/v1/search body as {"watches": {"items": [...], "total": n}}"""
+    data = loads(body)
+    if not isinstance(data, dict):
+        return data
+    watches = data.get("watches") or {}
+    return {"watches": {"items": project(watches.get("items"), SEARCH_ITEM_FIELDS), "total": watches.get("total")}}
+
+
+def decode_recommendations(body: bytes) -> Any:
+    """/v1/recommendations body as {"data": {"data": {"recommendations": [...]}}}"""
+    data = loads(body)
+    if not isinstance(data, dict):
+        return data
+    recommendations = ((data.get("data") or {}).get("data") or {}).get("recommendations")
+    return {"data": {"data": {"recommendations": project(recommendations, RECOMMENDATION_FIELDS)}}}
+
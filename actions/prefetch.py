@@ -0,0 +1,140 @@
+# Speculative prefetch of the searches behind buttons we just showed.
+#
+# After an action sends option buttons (brands, colors, price ranges, ...),
+# the next message is almost always a click on one of them. The Prefetcher
+# runs the searches of the most clicked options in background threads so the
+# click is answered from the cache.
+
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Sequence, Text, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (key, request) pairs; the key identifies the request in the caches
+Option = Tuple[Text, Any]
+
+
+class Prefetcher:
+    """Runs `fetch(token, request)` ahead of time within a fixed budget.
+
+    - At most `per_message` options are prefetched per call, ranked by how
+      often their key was requested before (ties keep the button order).
+    - At most `max_pending` prefetches are queued or running at a time,
+      further options are dropped.
+    - `requested(key)` must be called for every real request. It counts the
+      click and reports whether a prefetch had already fetched that key.
+    - A prefetched key is not prefetched again for `ttl` seconds, the time
+      its response stays cached.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[Optional[Text], Any], Any],
+        is_cached: Callable[[Text], bool],
+        per_message: int = 3,
+        max_pending: int = 6,
+        max_workers: int = 2,
+        max_tracked: int = 4096,
+        ttl: float = 60,
+    ) -> None:
+        self.fetch = fetch
+        self.is_cached = is_cached
+        self.ttl = ttl
+        self.per_message = per_message
+        self.max_pending = max_pending
+        self.max_tracked = max_tracked
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self._lock = threading.Lock()
+        self._pending = set()
+        # Prefetched keys not requested yet -> expiry, oldest first
+        self._done: "OrderedDict[Text, float]" = OrderedDict()
+        self._clicks: Counter = Counter()
+
+        self.submitted = 0
+        self.skipped = 0
+        self.failed = 0
+        self.used = 0
+
+    def prefetch(self, token: Optional[Text], options: Sequence[Option]) -> int:
+        """Start prefetching the most clicked options, returns how many were started"""
+        with self._lock:
+            clicks = self._clicks
+        # sorted() is stable, options without clicks keep the button order
+        ranked = sorted(options, key=lambda option: -clicks[option[0]])
+
+        started = 0
+        for key, request in ranked:
+            if started >= self.per_message:
+                break
+            with self._lock:
+                if key in self._pending or self._is_done(key):
+                    continue
+                if len(self._pending) >= self.max_pending:
+                    self.skipped += self.per_message - started
+                    break
+                self._pending.add(key)
+            if self.is_cached(key):
+                with self._lock:
+                    self._pending.discard(key)
+                continue
+            self._executor.submit(self._run, token, key, request)
+            with self._lock:
+                self.submitted += 1
+            started += 1
+        return started
+
+    def _run(self, token: Optional[Text], key: Text, request: Any) -> None:
+        try:
+            self.fetch(token, request)
+        except Exception as e:
+            logger.debug(f"Prefetch of '{key}' failed: {e}")
+            with self._lock:
+                self.failed += 1
+                self._pending.discard(key)
+            return
+
+        with self._lock:
+            self._pending.discard(key)
+            self._done[key] = time.monotonic() + self.ttl
+            self._done.move_to_end(key)
+            while len(self._done) > self.max_tracked:
+                self._done.popitem(last=False)
+
+    def _is_done(self, key: Text) -> bool:
+        # Called with the lock held; expired prefetches are forgotten
+        expires_at = self._done.get(key)
+        if expires_at is None:
+            return False
+        if expires_at <= time.monotonic():
+            del self._done[key]
+            return False
+        return True
+
+    def requested(self, key: Text) -> bool:
+        """Count a real request for `key`, True if it was prefetched"""
+        with self._lock:
+            self._clicks[key] += 1
+            if len(self._clicks) > self.max_tracked:
+                self._clicks = Counter(dict(self._clicks.most_common(self.max_tracked // 2)))
+            if not self._is_done(key):
+                return False
+            del self._done[key]
+            self.used += 1
+        return True
+
+    def stats(self) -> Dict[Text, Any]:
+        """Counters of this process; hit_rate is the share of prefetches used"""
+        with self._lock:
+            submitted, skipped, failed, used = self.submitted, self.skipped, self.failed, self.used
+        completed = submitted - failed
+        return {
+            "submitted": submitted,
+            "skipped": skipped,
+            "failed": failed,
+            "used": used,
+            "hit_rate": used / completed if completed else 0.0,
+        }
@@ -0,0 +1,158 @@
+# Promotion cards valid by the discounts' own dates.
+#
+# /v1/discounts is formatted into promotion cards once per download. Each
+# card keeps the window given by its effective_date and valid_until, so a
+# query only picks the cards valid at that moment. The first query after the
+# next discount starts or ends (or after PROMOTIONS_MAX_AGE seconds, for
+# edited ones) downloads the discounts again in the background with its own
+# token; it and later queries are answered from the cards already loaded, so
+# only the first queries wait for the API, for a single download. User tokens
+# are never kept.
+
+import datetime
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Text
+
+from actions.api import DISCOUNTS_TTL, get_json
+from actions.cards import promotion_card
+from actions.encoding import encode_card
+
+logger = logging.getLogger(__name__)
+
+# Seconds before discounts are downloaded again without a start or end
+PROMOTIONS_MAX_AGE = int(os.getenv("PROMOTIONS_MAX_AGE", "3600"))
+# Wait after a failed background download before the next one
+RETRY_DELAY = 60
+# The API's dates are Vietnam time (UTC+7, no daylight saving time),
+# whatever the timezone of the action server's host
+API_TIMEZONE = datetime.timezone(datetime.timedelta(hours=float(os.getenv("API_UTC_OFFSET", "7"))))
+
+
+def parse_api_time(value: Optional[Text], end: bool = False) -> Optional[float]:
+    """Epoch seconds of an API date ("20251017" or "20251017182236", in
+    API_TIMEZONE). A date without time ends at the end of that day."""
+    if not value:
+        return None
+    digits = "".join(char for char in str(value) if char.isdigit())
+    try:
+        if len(digits) >= 14:
+            moment = datetime.datetime.strptime(digits[:14], "%Y%m%d%H%M%S")
+        else:
+            moment = datetime.datetime.strptime(digits[:8], "%Y%m%d")
+            if end:
+                moment += datetime.timedelta(days=1)
+    except ValueError:
+        return None
+    return moment.replace(tzinfo=API_TIMEZONE).timestamp()
+
+
+class Promotion(NamedTuple):
+    card: Dict[Text, Any]
+    # Valid from starts_at until ends_at (None: no bound)
+    starts_at: Optional[float]
+    ends_at: Optional[float]
+
+    def is_valid(self, now: float) -> bool:
+        return (self.starts_at is None or self.starts_at <= now) and (self.ends_at is None or now < self.ends_at)
+
+
+def _download(token: Optional[Text], refresh: bool) -> List[Dict[Text, Any]]:
+    # Discounts are shop-wide, not per user
+    data = get_json("/v1/discounts", token, ttl=DISCOUNTS_TTL, persist=True, refresh=refresh)
+    return data.get("discounts", {}).get("items", [])
+
+
+class PromotionCache:
+    """Preformatted promotion cards of this process"""
+
+    def __init__(
+        self,
+        download: Callable[[Optional[Text], bool], List[Dict[Text, Any]]] = _download,
+        max_age: float = PROMOTIONS_MAX_AGE,
+    ) -> None:
+        self.download = download
+        self.max_age = max_age
+        self._promotions: Optional[List[Promotion]] = None
+        self._loaded_at = 0.0
+        # Epoch seconds after which the next query downloads the discounts
+        self._reload_at = 0.0
+        self._reloading = False
+        self._lock = threading.Lock()
+        # Held during a download, so concurrent first queries download once
+        self._download_lock = threading.Lock()
+
+        self.downloads = 0
+        self.served = 0
+
+    def cards(self, token: Optional[Text]) -> List[Dict[Text, Any]]:
+        """Cards of the discounts valid now; downloads only when nothing is loaded"""
+        promotions = self._promotions
+        if promotions is None:
+            promotions = self._load(token, refresh=False)
+        elif time.time() >= self._reload_at:
+            # The discounts endpoint requires a logged in user, the download
+            # uses this query's token and drops it
+            self._reload_in_background(token)
+        self.served += 1
+        now = time.time()
+        return [promotion.card for promotion in promotions if promotion.is_valid(now)]
+
+    def _load(self, token: Optional[Text], refresh: bool) -> List[Promotion]:
+        with self._download_lock:
+            if not refresh and self._promotions is not None:
+                # Loaded by a concurrent first query while this one waited
+                return self._promotions
+            discounts = self.download(token, refresh)
+            promotions = [
+                Promotion(
+                    # Encoded once, sent with every promotion reply
+                    encode_card(promotion_card(discount)),
+                    parse_api_time(discount.get("effective_date")),
+                    parse_api_time(discount.get("valid_until"), end=True),
+                )
+                for discount in discounts
+            ]
+            # Queries never wait for _lock during a download
+            with self._lock:
+                self._promotions = promotions
+                self._loaded_at = time.time()
+                self._reload_at = self.next_change()
+                self.downloads += 1
+            return promotions
+
+    def next_change(self) -> float:
+        """Epoch seconds of the next start or end of a discount, or of the
+        periodic download"""
+        now = time.time()
+        moments = [self._loaded_at + self.max_age]
+        for promotion in self._promotions or []:
+            moments += [moment for moment in (promotion.starts_at, promotion.ends_at) if moment and moment > now]
+        return min(moments)
+
+    def _reload_in_background(self, token: Optional[Text]) -> None:
+        with self._lock:
+            # Another query may have started the reload, or finished it
+            # since this one read _reload_at
+            if self._reloading or time.time() < self._reload_at:
+                return
+            self._reloading = True
+        threading.Thread(target=self._reload, args=(token,), name="promotions", daemon=True).start()
+
+    def _reload(self, token: Optional[Text]) -> None:
+        try:
+            self._load(token, refresh=True)
+            logger.debug(f"Promotions downloaded, next change in {self._reload_at - time.time():.0f}s")
+        except Exception as e:
+            logger.warning(f"Downloading promotions failed: {e}")
+            with self._lock:
+                # Cards whose window is over still disappear, a later query retries
+                self._reload_at = time.time() + RETRY_DELAY
+        finally:
+            with self._lock:
+                self._reloading = False
+
+
+promotions = PromotionCache()
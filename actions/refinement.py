@@ -0,0 +1,188 @@
+# Step-by-step narrowing of a search ("Rolex", then "dây da", then "dưới 5 triệu").
+#
+# The resolved filters of a conversation's last search are kept in the
+# tracker (slot `last_search`), so any action server behind a load balancer
+# sees them. Its result set is cached in the SharedCache of the host that ran
+# it. When a follow-up search only adds constraints, they are applied to
+# these items instead of calling /v1/search again; the API is asked with the
+# merged filters when too few local items are left or the items are not
+# cached on this host.
+
+import hashlib
+import json
+import logging
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Text
+
+from actions.api import SEARCH_PAGE_SIZE, cache
+from actions.shared_cache import SharedCache
+
+logger = logging.getLogger(__name__)
+
+# Slot holding the last search, see domain.yml
+LAST_SEARCH_SLOT = "last_search"
+# Seconds after the last search before a follow-up starts a new search
+REFINEMENT_TTL = 600
+# Fewer local results than this ask the API (unless the set was complete)
+MIN_LOCAL_RESULTS = 3
+
+# Filters in the order of the reply description, keyword arguments of
+# actions.api.search_params. "style" only describes, it filters nothing.
+FILTER_FIELDS = (
+    "brand_id", "category_id", "color_id", "movement_type_id", "strap_material_id",
+    "gender", "style", "rating_min", "price_range",
+)
+# Filters compared with the field of the same name of /v1/search items
+ID_FIELDS = ("brand_id", "category_id", "color_id", "movement_type_id", "strap_material_id", "gender")
+
+
+class SearchState(NamedTuple):
+    filters: Dict[Text, Any]
+    # Description of each filter, e.g. {"brand_id": "thương hiệu Rolex"}
+    labels: Dict[Text, Text]
+    # None when the result set is not known on this host
+    items: Optional[List[Dict[Text, Any]]]
+    # True when `items` is the whole result set, not just its first page
+    complete: bool
+
+
+def merge_filters(previous: Dict[Text, Any], filters: Dict[Text, Any]) -> Optional[Dict[Text, Any]]:
+    """`previous` narrowed by `filters`, None when `filters` replaces one of
+    them (another brand, a wider price range, ...), i.e. a new search"""
+    for field, value in filters.items():
+        old = previous.get(field)
+        if old is None:
+            continue
+        if field == "price_range":
+            old_min, old_max = old
+            new_min, new_max = value
+            if (new_min or 0) < (old_min or 0) or (old_max is not None and (new_max is None or new_max > old_max)):
+                return None
+        elif field == "rating_min":
+            # Metadata gives strings, entities ints
+            if int(value) < int(old):
+                return None
+        elif str(value) != str(old):
+            return None
+    return {**previous, **filters}
+
+
+def _number(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def filter_items(items: List[Dict[Text, Any]], filters: Dict[Text, Any]) -> Optional[List[Dict[Text, Any]]]:
+    """Items matching all `filters`, None when the items lack a filtered field"""
+    result = items
+    for field in ID_FIELDS:
+        value = filters.get(field)
+        if value is None:
+            continue
+        if any(field not in item for item in result):
+            return None
+        result = [item for item in result if str(item.get(field)) == str(value)]
+
+    rating_min = _number(filters.get("rating_min"))
+    if rating_min:
+        result = [item for item in result if (_number(item.get("rating")) or 0) >= rating_min]
+
+    price_range = filters.get("price_range")
+    if price_range:
+        min_price, max_price = price_range
+        prices = [_number(item.get("base_price")) for item in result]
+        if any(price is None for price in prices):
+            return None
+        result = [
+            item for item, price in zip(result, prices)
+            if price >= (min_price or 0) and (max_price is None or price <= max_price)
+        ]
+    return result
+
+
+def describe(labels: Dict[Text, Text]) -> Text:
+    return ", ".join(labels[field] for field in FILTER_FIELDS if labels.get(field))
+
+
+class RefinementStore:
+    """Last search of each conversation: filters in the tracker slot, items
+    in the SharedCache of this host"""
+
+    def __init__(self, shared_cache: Optional[SharedCache], ttl: float = REFINEMENT_TTL) -> None:
+        self.cache = shared_cache
+        self.ttl = ttl
+        self.local = 0
+        self.remote = 0
+
+    @staticmethod
+    def _key(sender_id: Text, filters: Dict[Text, Any]) -> Text:
+        # The items of this search, not of an older one of the conversation
+        search = json.dumps([sender_id, filters], sort_keys=True, default=str)
+        return "refine:" + hashlib.sha256(search.encode("utf-8")).hexdigest()[:24]
+
+    def load(self, sender_id: Optional[Text], slot: Any) -> Optional[SearchState]:
+        """State of the `last_search` slot value, None when there is none or
+        it is older than the TTL"""
+        if not isinstance(slot, dict) or slot.get("expires_at", 0) <= time.time():
+            return None
+        filters = dict(slot.get("filters") or {})
+        if filters.get("price_range") is not None:
+            filters["price_range"] = tuple(filters["price_range"])
+        items = None
+        if self.cache is not None and sender_id:
+            items = self.cache.get(self._key(sender_id, filters))
+        return SearchState(filters, slot.get("labels") or {}, items, bool(slot.get("complete")))
+
+    def save(self, sender_id: Optional[Text], state: SearchState) -> Dict[Text, Any]:
+        """Value of the `last_search` slot for `state`, its items are cached"""
+        if self.cache is not None and sender_id and state.items is not None:
+            key = self._key(sender_id, state.filters)
+            if not self.cache.set(key, state.items, self.ttl):
+                # Larger than a cache slot, a follow-up asks the API
+                logger.debug(f"Search results of {len(state.items)} items are too large to keep")
+        return {
+            "filters": state.filters,
+            "labels": state.labels,
+            "complete": state.complete,
+            "expires_at": time.time() + self.ttl,
+        }
+
+    @staticmethod
+    def replaces(previous: Optional[SearchState], filters: Dict[Text, Any]) -> bool:
+        """Whether a search with `filters` ignores `previous`: there is none,
+        `filters` replace its filters or narrowing it gives `filters` alone"""
+        if previous is None:
+            return True
+        merged = merge_filters(previous.filters, filters)
+        return merged is None or merged == filters
+
+    def refine(
+        self, previous: Optional[SearchState], filters: Dict[Text, Any], labels: Dict[Text, Text]
+    ) -> Optional[SearchState]:
+        """The narrowed state when `filters` refine `previous`.
+
+        Its items are None when they have to be fetched again with the merged
+        filters, the state is None for a new search.
+        """
+        if previous is None:
+            return None
+        merged = merge_filters(previous.filters, filters)
+        if merged is None:
+            return None
+        labels = {**previous.labels, **labels}
+        items = filter_items(previous.items, merged) if previous.items is not None else None
+        if items is not None and (len(items) >= MIN_LOCAL_RESULTS or (previous.complete and items)):
+            self.local += 1
+            return SearchState(merged, labels, items, previous.complete)
+        self.remote += 1
+        return SearchState(merged, labels, None, False)
+
+
+def is_complete(items: List[Dict[Text, Any]]) -> bool:
+    """A first page shorter than the page size holds the whole result set"""
+    return len(items) < SEARCH_PAGE_SIZE
+
+
+refinements = RefinementStore(cache)
@@ -0,0 +1,202 @@
+# Persistent cache of API responses in a local SQLite file.
+#
+# The SharedCache lives in memory and is lost when the host recycles the
+# action server. This store keeps catalog responses on disk so a fresh process
+# starts warm:
+#
+# - Reads go straight to SQLite (WAL mode, readers never wait for the writer).
+# - Writes and hit counts are queued and applied in batches by a background
+#   thread, the request path never waits for a disk write.
+# - Rows carry an absolute expiry time. When the stored bytes grow past
+#   `max_bytes`, expired rows go first, then the least recently used ones.
+#   Triggers keep the total size in responses_size, so a write never sums
+#   the table.
+
+import atexit
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Optional, Text, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    used_at REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS responses_expiry ON responses (expires_at);
+CREATE INDEX IF NOT EXISTS responses_lru ON responses (used_at);
+
+CREATE TABLE IF NOT EXISTS responses_size (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    total INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO responses_size (id, total) SELECT 0, COALESCE(SUM(size), 0) FROM responses;
+CREATE TRIGGER IF NOT EXISTS responses_size_insert AFTER INSERT ON responses BEGIN
+    UPDATE responses_size SET total = total + NEW.size WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS responses_size_update AFTER UPDATE OF size ON responses BEGIN
+    UPDATE responses_size SET total = total + NEW.size - OLD.size WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS responses_size_delete AFTER DELETE ON responses BEGIN
+    UPDATE responses_size SET total = total - OLD.size WHERE id = 0;
+END;
+"""
+
+# Operations queued for the writer thread
+_PUT = "put"
+_HIT = "hit"
+_FLUSH = "flush"
+
+WRITE_BATCH = 100
+# Rows deleted per query while evicting
+EVICT_BATCH = 256
+
+
+class ResponseStore:
+    """Read-through/write-behind response cache in SQLite.
+
+    `get` returns the value and its remaining TTL so callers can refill
+    faster caches with the same expiry.
+    """
+
+    def __init__(self, path: Text, max_bytes: int = 50 * 1024 * 1024) -> None:
+        self.path = path
+        self.max_bytes = int(max_bytes)
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._local = threading.local()
+        with self._connect() as connection:
+            connection.executescript(SCHEMA)
+
+        self._queue: "queue.Queue[Tuple]" = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="response-store", daemon=True)
+        self._writer.start()
+        atexit.register(self.flush)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _reader(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = self._connect()
+        return connection
+
+    def get(self, key: Text) -> Optional[Tuple[Any, float]]:
+        """(value, seconds until expiry) or None if missing or expired"""
+        try:
+            row = self._reader().execute(
+                "SELECT value, expires_at FROM responses WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Response store read failed: {e}")
+            row = None
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._queue.put((_HIT, key, time.time()))
+        return json.loads(row[0]), row[1] - time.time()
+
+    def put(self, key: Text, value: Any, ttl: float) -> None:
+        """Queue `value` to be stored for `ttl` seconds"""
+        serialised = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+        self._queue.put((_PUT, key, serialised, time.time() + ttl))
+
+    def flush(self, timeout: float = 5) -> None:
+        """Wait until all queued writes are on disk"""
+        done = threading.Event()
+        self._queue.put((_FLUSH, done))
+        done.wait(timeout)
+
+    def _write_loop(self) -> None:
+        connection = self._connect()
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < WRITE_BATCH:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                self._apply(connection, batch)
+            except sqlite3.Error as e:
+                logger.warning(f"Response store write failed, dropped {len(batch)} operations: {e}")
+
+            for operation in batch:
+                if operation[0] == _FLUSH:
+                    operation[1].set()
+
+    def _apply(self, connection: sqlite3.Connection, batch: list) -> None:
+        now = time.time()
+        puts = [(op[1], op[2], len(op[2].encode("utf-8")), op[3], now) for op in batch if op[0] == _PUT]
+        hits = [(op[2], op[1]) for op in batch if op[0] == _HIT]
+        if not puts and not hits:
+            return
+
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.executemany(
+                "INSERT INTO responses (key, value, size, expires_at, used_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, size = excluded.size, "
+                "expires_at = excluded.expires_at, used_at = excluded.used_at",
+                puts,
+            )
+            connection.executemany(
+                "UPDATE responses SET hits = hits + 1, used_at = MAX(used_at, ?) WHERE key = ?", hits
+            )
+            if puts:
+                self._evict(connection)
+
+    @staticmethod
+    def _total(connection: sqlite3.Connection) -> int:
+        (total,) = connection.execute("SELECT total FROM responses_size WHERE id = 0").fetchone()
+        return total
+
+    def _evict(self, connection: sqlite3.Connection) -> None:
+        if self._total(connection) <= self.max_bytes:
+            return
+        connection.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+        total = self._total(connection)
+        if total <= self.max_bytes:
+            return
+
+        # Drop the least recently used rows until the store is back under 90%
+        # of the limit
+        excess = total - int(self.max_bytes * 0.9)
+        removed = 0
+        while removed < excess:
+            rows = connection.execute(
+                "SELECT key, size FROM responses ORDER BY used_at LIMIT ?", (EVICT_BATCH,)
+            ).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                if removed >= excess:
+                    break
+                connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                removed += size
+        logger.debug(f"Evicted {removed} bytes from the response store.")
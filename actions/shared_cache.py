@@ -0,0 +1,221 @@
+# Cache shared by all action-server processes on one host.
+#
+# The cache is a memory-mapped file holding a fixed number of fixed-size slots,
+# so its memory use is bounded by `slots * slot_size` no matter how many
+# processes map it. Every process that opens the same file sees the same
+# entries, a worker started later is warm immediately.
+#
+# - Writes take an exclusive file lock and wrap the slot in a sequence counter
+#   (odd while the slot is being written).
+# - Reads take no lock: they copy the slot and retry if the sequence counter
+#   changed in between (a seqlock).
+# - Each entry has an absolute expiry time. When all slots a key can use are
+#   taken, the one that expires first is overwritten.
+
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Iterator, Optional, Text, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: writes are only serialized within the process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"WSC1"
+# magic, slot count, slot size
+FILE_HEADER = struct.Struct("<4sII")
+FILE_HEADER_SIZE = 64
+# sequence, key hash, expires at (unix time), key length, value length
+SLOT_HEADER = struct.Struct("<QQdII")
+SEQUENCE = struct.Struct("<Q")
+
+# Number of neighbouring slots a key may be stored in
+PROBES = 4
+READ_RETRIES = 3
+
+
+def _hash_key(key: bytes) -> int:
+    # hash() is randomized per process, the slot must be the same in all of them
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+
+class SharedCache:
+    """Bounded key/value cache with TTLs in a memory-mapped file.
+
+    Values must be JSON serializable. Entries larger than a slot are not
+    cached. If the file already exists its slot layout is used, so all
+    processes agree on it regardless of their own settings.
+    """
+
+    def __init__(self, path: Text, slots: int = 1024, slot_size: int = 32 * 1024) -> None:
+        self.path = path
+        self._thread_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        with self._write_lock():
+            self.slots, self.slot_size = self._init_file(slots, slot_size)
+        self._mmap = mmap.mmap(self._fd, FILE_HEADER_SIZE + self.slots * self.slot_size)
+
+    def _init_file(self, slots: int, slot_size: int) -> Tuple[int, int]:
+        os.lseek(self._fd, 0, os.SEEK_SET)
+        header = os.read(self._fd, FILE_HEADER.size)
+        if len(header) == FILE_HEADER.size:
+            magic, existing_slots, existing_size = FILE_HEADER.unpack(header)
+            if magic == MAGIC:
+                return existing_slots, existing_size
+
+        size = FILE_HEADER_SIZE + slots * slot_size
+        os.ftruncate(self._fd, 0)
+        os.ftruncate(self._fd, size)
+        os.lseek(self._fd, 0, os.SEEK_SET)
+        os.write(self._fd, FILE_HEADER.pack(MAGIC, slots, slot_size))
+        logger.info(f"Created shared cache '{self.path}' ({slots} slots of {slot_size} bytes).")
+        return slots, slot_size
+
+    def _write_lock(self) -> "_FileLock":
+        return _FileLock(self._fd, self._thread_lock)
+
+    def _offsets(self, key_hash: int) -> Iterator[int]:
+        first = key_hash % self.slots
+        for i in range(PROBES):
+            yield FILE_HEADER_SIZE + ((first + i) % self.slots) * self.slot_size
+
+    def get(self, key: Text) -> Optional[Any]:
+        """Value stored under `key`, None if missing or expired"""
+        key_bytes = key.encode("utf-8")
+        key_hash = _hash_key(key_bytes)
+        for offset in self._offsets(key_hash):
+            value = self._read_slot(offset, key_bytes, key_hash)
+            if value is not None:
+                self.hits += 1
+                return json.loads(value)
+        self.misses += 1
+        return None
+
+    def _read_slot(self, offset: int, key_bytes: bytes, key_hash: int) -> Optional[bytes]:
+        buffer = self._mmap
+        for _ in range(READ_RETRIES):
+            (sequence,) = SEQUENCE.unpack_from(buffer, offset)
+            if sequence & 1:
+                continue
+            _, slot_hash, expires_at, key_len, value_len = SLOT_HEADER.unpack_from(buffer, offset)
+            if slot_hash != key_hash or expires_at <= time.time():
+                return None
+            start = offset + SLOT_HEADER.size
+            slot_key = buffer[start:start + key_len]
+            value = buffer[start + key_len:start + key_len + value_len]
+            if SEQUENCE.unpack_from(buffer, offset)[0] != sequence:
+                # A writer changed the slot while we copied it
+                continue
+            return value if slot_key == key_bytes else None
+        return None
+
+    def set(self, key: Text, value: Any, ttl: float) -> bool:
+        """Store `value` for `ttl` seconds, False if it does not fit in a slot"""
+        key_bytes = key.encode("utf-8")
+        value_bytes = json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        if SLOT_HEADER.size + len(key_bytes) + len(value_bytes) > self.slot_size:
+            logger.debug(f"Not caching '{key}', {len(value_bytes)} bytes exceed the slot size.")
+            return False
+
+        key_hash = _hash_key(key_bytes)
+        now = time.time()
+        buffer = self._mmap
+        with self._write_lock():
+            target = self._find(key_bytes, key_hash)
+            if target is None:
+                # Free and expired slots have the smallest expiry, after them
+                # the live entry that expires soonest is replaced
+                target = min(
+                    self._offsets(key_hash),
+                    key=lambda offset: SLOT_HEADER.unpack_from(buffer, offset)[2],
+                )
+
+            (sequence,) = SEQUENCE.unpack_from(buffer, target)
+            SEQUENCE.pack_into(buffer, target, sequence + 1)
+            start = target + SLOT_HEADER.size
+            buffer[start:start + len(key_bytes)] = key_bytes
+            buffer[start + len(key_bytes):start + len(key_bytes) + len(value_bytes)] = value_bytes
+            SLOT_HEADER.pack_into(
+                buffer, target, sequence + 1, key_hash, now + ttl, len(key_bytes), len(value_bytes)
+            )
+            SEQUENCE.pack_into(buffer, target, sequence + 2)
+        return True
+
+    def _find(self, key_bytes: bytes, key_hash: int) -> Optional[int]:
+        """Offset of the slot holding `key_bytes`, call with the write lock held"""
+        for offset in self._offsets(key_hash):
+            _, slot_hash, _, key_len, _ = SLOT_HEADER.unpack_from(self._mmap, offset)
+            start = offset + SLOT_HEADER.size
+            if slot_hash == key_hash and self._mmap[start:start + key_len] == key_bytes:
+                return offset
+        return None
+
+    def delete(self, key: Text) -> None:
+        key_bytes = key.encode("utf-8")
+        with self._write_lock():
+            offset = self._find(key_bytes, _hash_key(key_bytes))
+            if offset is not None:
+                self._clear_slot(offset)
+
+    def _clear_slot(self, offset: int) -> None:
+        (sequence,) = SEQUENCE.unpack_from(self._mmap, offset)
+        SLOT_HEADER.pack_into(self._mmap, offset, sequence + 2, 0, 0.0, 0, 0)
+
+    def clear(self) -> None:
+        with self._write_lock():
+            for i in range(self.slots):
+                self._clear_slot(FILE_HEADER_SIZE + i * self.slot_size)
+
+    def stats(self) -> Dict[Text, Any]:
+        """Hit/miss counters of this process and the number of live entries"""
+        now = time.time()
+        entries = 0
+        for i in range(self.slots):
+            offset = FILE_HEADER_SIZE + i * self.slot_size
+            if SLOT_HEADER.unpack_from(self._mmap, offset)[2] > now:
+                entries += 1
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": entries,
+            "slots": self.slots,
+            "bytes": self.slots * self.slot_size,
+        }
+
+
+class _FileLock:
+    """Exclusive lock on the cache file across processes and threads"""
+
+    def __init__(self, fd: int, thread_lock: threading.Lock) -> None:
+        self._fd = fd
+        self._thread_lock = thread_lock
+
+    def __enter__(self) -> None:
+        self._thread_lock.acquire()
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+
+    def __exit__(self, *exc_info: Any) -> None:
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._thread_lock.release()
+
+
+def default_cache_path() -> Text:
+    return os.path.join(tempfile.gettempdir(), "watchshop-action-cache.bin")
@@ -0,0 +1 @@
+# This package contains the custom NLU components used in config.yml
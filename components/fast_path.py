@@ -0,0 +1,39 @@
+from typing import List
+
+from rasa.engine.recipes.default_recipe import DefaultV1Recipe
+from rasa.nlu.classifiers.diet_classifier import DIETClassifier
+from rasa.shared.nlu.training_data.message import Message
+
+# Message attribute set by the components that already classified a message.
+# The value is the component name, it is part of the parse output so logs and
+# evaluation scripts can see which tier answered.
+FAST_PATH = "fast_path"
+
+
+def mark_fast_path(message: Message, source: str) -> None:
+    """Mark a message as classified so FastPathDIETClassifier skips it"""
+    message.set(FAST_PATH, source, add_to_output=True)
+
+
+def is_fast_path(message: Message) -> bool:
+    return bool(message.get(FAST_PATH))
+
+
+@DefaultV1Recipe.register(
+    [
+        DefaultV1Recipe.ComponentType.INTENT_CLASSIFIER,
+        DefaultV1Recipe.ComponentType.ENTITY_EXTRACTOR,
+    ],
+    is_trainable=True,
+)
+class FastPathDIETClassifier(DIETClassifier):
+    """DIETClassifier that skips inference for messages marked as fast path.
+
+    Training is unchanged. Place it where DIETClassifier was in config.yml.
+    """
+
+    def process(self, messages: List[Message]) -> List[Message]:
+        pending = [message for message in messages if not is_fast_path(message)]
+        if pending:
+            super().process(pending)
+        return messages
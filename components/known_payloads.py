@@ -0,0 +1,147 @@
+import logging
+import os
+import re
+import unicodedata
+from typing import Any, Dict, List, Optional, Text, Tuple
+
+import yaml
+
+from rasa.engine.graph import ExecutionContext, GraphComponent
+from rasa.engine.recipes.default_recipe import DefaultV1Recipe
+from rasa.engine.storage.resource import Resource
+from rasa.engine.storage.storage import ModelStorage
+from rasa.shared.nlu.constants import (
+    ENTITIES,
+    ENTITY_ATTRIBUTE_END,
+    ENTITY_ATTRIBUTE_START,
+    ENTITY_ATTRIBUTE_TYPE,
+    ENTITY_ATTRIBUTE_VALUE,
+    EXTRACTOR,
+    INTENT,
+    INTENT_NAME_KEY,
+    INTENT_RANKING_KEY,
+    PREDICTED_CONFIDENCE_KEY,
+    TEXT,
+)
+from rasa.shared.nlu.training_data.message import Message
+
+from components.fast_path import mark_fast_path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAYLOADS_PATH = os.path.join(os.path.dirname(__file__), "known_payloads.yml")
+
+WORD_REGEX = re.compile(r"\S+")
+
+
+def normalize_payload(text: Text) -> Text:
+    """Lookup key for a payload: NFC, case-folded, single spaces"""
+    return " ".join(unicodedata.normalize("NFC", text).casefold().split())
+
+
+@DefaultV1Recipe.register(
+    [DefaultV1Recipe.ComponentType.INTENT_CLASSIFIER], is_trainable=False
+)
+class KnownPayloadClassifier(GraphComponent):
+    """Classify our own button payloads with a hash lookup.
+
+    Matched messages get their intent (and the template entity) directly and
+    are marked as fast path, so FastPathDIETClassifier does not run on them.
+    Put this component first in the pipeline.
+    """
+
+    @staticmethod
+    def get_default_config() -> Dict[Text, Any]:
+        return {
+            # YAML file with `payloads` and `templates`, see known_payloads.yml
+            "payloads_path": DEFAULT_PAYLOADS_PATH,
+            # Longest template value accepted, longer texts are left to DIET
+            "max_template_words": 3,
+        }
+
+    def __init__(self, config: Dict[Text, Any]) -> None:
+        self.component_config = config
+        self.max_template_words = config["max_template_words"]
+        self.payloads: Dict[Text, Text] = {}
+        self.templates: Dict[Text, Dict[Text, Text]] = {}
+        self._load_payloads(config["payloads_path"])
+
+    @classmethod
+    def create(
+        cls,
+        config: Dict[Text, Any],
+        model_storage: ModelStorage,
+        resource: Resource,
+        execution_context: ExecutionContext,
+    ) -> "KnownPayloadClassifier":
+        return cls(config)
+
+    def _load_payloads(self, path: Text) -> None:
+        with open(path, encoding="utf-8") as f:
+            data = yaml.safe_load(f) or {}
+
+        for item in data.get("payloads", []):
+            self.payloads[normalize_payload(item["text"])] = item["intent"]
+        for item in data.get("templates", []):
+            self.templates[normalize_payload(item["prefix"])] = {
+                "intent": item["intent"],
+                "entity": item["entity"],
+            }
+
+        logger.debug(
+            f"Loaded {len(self.payloads)} payloads and "
+            f"{len(self.templates)} templates from '{path}'."
+        )
+
+    def match(self, text: Text) -> Optional[Tuple[Text, Optional[Dict[Text, Any]]]]:
+        """Return (intent, entity) for a known payload, or None"""
+        key = normalize_payload(text)
+        intent = self.payloads.get(key)
+        if intent:
+            return intent, None
+
+        if not self.templates:
+            return None
+
+        # Try every word boundary as template prefix, longest prefix first
+        words = list(WORD_REGEX.finditer(text))
+        keys = key.split(" ")
+        for split in range(len(words) - 1, 0, -1):
+            if len(words) - split > self.max_template_words:
+                break
+            template = self.templates.get(" ".join(keys[:split]))
+            if template:
+                start = words[split].start()
+                end = words[-1].end()
+                entity = {
+                    ENTITY_ATTRIBUTE_TYPE: template["entity"],
+                    ENTITY_ATTRIBUTE_VALUE: text[start:end],
+                    ENTITY_ATTRIBUTE_START: start,
+                    ENTITY_ATTRIBUTE_END: end,
+                    EXTRACTOR: self.__class__.__name__,
+                }
+                return template["intent"], entity
+
+        return None
+
+    def process(self, messages: List[Message]) -> List[Message]:
+        for message in messages:
+            text = message.get(TEXT)
+            if not text:
+                continue
+
+            result = self.match(text)
+            if not result:
+                continue
+
+            intent_name, entity = result
+            intent = {INTENT_NAME_KEY: intent_name, PREDICTED_CONFIDENCE_KEY: 1.0}
+            message.set(INTENT, intent, add_to_output=True)
+            message.set(INTENT_RANKING_KEY, [intent], add_to_output=True)
+            if entity:
+                message.set(
+                    ENTITIES, message.get(ENTITIES, []) + [entity], add_to_output=True
+                )
+            mark_fast_path(message, self.__class__.__name__)
+
+        return messages
@@ -0,0 +1,173 @@
+import logging
+from typing import Any, Dict, List, Optional, Text, Type
+
+import numpy as np
+import scipy.sparse
+from sklearn.linear_model import LogisticRegression
+
+import rasa.utils.io as io_utils
+from rasa.engine.graph import ExecutionContext, GraphComponent
+from rasa.engine.recipes.default_recipe import DefaultV1Recipe
+from rasa.engine.storage.resource import Resource
+from rasa.engine.storage.storage import ModelStorage
+from rasa.nlu.classifiers.classifier import IntentClassifier
+from rasa.nlu.featurizers.sparse_featurizer.sparse_featurizer import SparseFeaturizer
+from rasa.shared.nlu.constants import (
+    INTENT,
+    INTENT_NAME_KEY,
+    INTENT_RANKING_KEY,
+    PREDICTED_CONFIDENCE_KEY,
+    TEXT,
+)
+from rasa.shared.nlu.training_data.message import Message
+from rasa.shared.nlu.training_data.training_data import TrainingData
+
+from components.fast_path import is_fast_path, mark_fast_path
+
+logger = logging.getLogger(__name__)
+
+
+@DefaultV1Recipe.register(
+    [DefaultV1Recipe.ComponentType.INTENT_CLASSIFIER], is_trainable=True
+)
+class LinearIntentClassifier(GraphComponent, IntentClassifier):
+    """First tier of intent classification: a sparse linear model.
+
+    Trained on the sentence features of the CountVectorsFeaturizers. When its
+    confidence reaches `confidence_threshold` the intent is set and the message
+    is marked as fast path, otherwise FastPathDIETClassifier classifies it.
+    Put it after the featurizers and before FastPathDIETClassifier.
+    """
+
+    @classmethod
+    def required_components(cls) -> List[Type]:
+        return [SparseFeaturizer]
+
+    @staticmethod
+    def get_default_config() -> Dict[Text, Any]:
+        return {
+            # Minimum probability to answer without DIET
+            "confidence_threshold": 0.9,
+            # Inverse regularization strength of the logistic regression
+            "C": 10.0,
+            "max_iter": 1000,
+            # Number of intents in the ranking, 0 for all
+            "ranking_length": 10,
+        }
+
+    def __init__(
+        self,
+        config: Dict[Text, Any],
+        model_storage: ModelStorage,
+        resource: Resource,
+        clf: Optional[LogisticRegression] = None,
+    ) -> None:
+        self.component_config = config
+        self._model_storage = model_storage
+        self._resource = resource
+        self.clf = clf
+
+    @classmethod
+    def create(
+        cls,
+        config: Dict[Text, Any],
+        model_storage: ModelStorage,
+        resource: Resource,
+        execution_context: ExecutionContext,
+    ) -> "LinearIntentClassifier":
+        return cls(config, model_storage, resource)
+
+    @staticmethod
+    def _get_features(message: Message) -> Optional[scipy.sparse.csr_matrix]:
+        sequence, sentence = message.get_sparse_features(TEXT)
+        if sentence is not None:
+            return sentence.features.tocsr()
+        if sequence is not None:
+            return scipy.sparse.csr_matrix(sequence.features.sum(axis=0))
+        return None
+
+    def train(self, training_data: TrainingData) -> Resource:
+        examples = [
+            e
+            for e in training_data.intent_examples
+            if self._get_features(e) is not None
+        ]
+        labels = [e.get(INTENT) for e in examples]
+        if len(set(labels)) < 2:
+            logger.warning(
+                f"{self.__class__.__name__} needs at least two intents with "
+                f"sparse features to train, it will not classify any message."
+            )
+            return self._resource
+
+        X = scipy.sparse.vstack([self._get_features(e) for e in examples])
+        self.clf = LogisticRegression(
+            C=self.component_config["C"],
+            max_iter=self.component_config["max_iter"],
+            class_weight="balanced",
+        )
+        self.clf.fit(X, labels)
+        self.persist()
+
+        return self._resource
+
+    def process(self, messages: List[Message]) -> List[Message]:
+        if self.clf is None:
+            return messages
+
+        threshold = self.component_config["confidence_threshold"]
+        for message in messages:
+            if is_fast_path(message):
+                continue
+            X = self._get_features(message)
+            if X is None:
+                continue
+
+            probabilities = self.clf.predict_proba(X)[0]
+            ranked = np.argsort(probabilities)[::-1]
+            if probabilities[ranked[0]] < threshold:
+                continue
+
+            ranking_length = self.component_config["ranking_length"]
+            if ranking_length:
+                ranked = ranked[:ranking_length]
+            ranking = [
+                {
+                    INTENT_NAME_KEY: str(self.clf.classes_[i]),
+                    PREDICTED_CONFIDENCE_KEY: float(probabilities[i]),
+                }
+                for i in ranked
+            ]
+            message.set(INTENT, ranking[0], add_to_output=True)
+            message.set(INTENT_RANKING_KEY, ranking, add_to_output=True)
+            mark_fast_path(message, self.__class__.__name__)
+
+        return messages
+
+    def persist(self) -> None:
+        with self._model_storage.write_to(self._resource) as model_dir:
+            io_utils.json_pickle(
+                model_dir / f"{self.__class__.__name__}_classifier.pkl", self.clf
+            )
+
+    @classmethod
+    def load(
+        cls,
+        config: Dict[Text, Any],
+        model_storage: ModelStorage,
+        resource: Resource,
+        execution_context: ExecutionContext,
+        **kwargs: Any,
+    ) -> "LinearIntentClassifier":
+        try:
+            with model_storage.read_from(resource) as model_dir:
+                clf = io_utils.json_unpickle(
+                    model_dir / f"{cls.__name__}_classifier.pkl"
+                )
+                return cls(config, model_storage, resource, clf)
+        except ValueError:
+            logger.debug(
+                f"Failed to load {cls.__name__} from model storage, "
+                f"resource '{resource.name}' doesn't exist."
+            )
+            return cls(config, model_storage, resource)
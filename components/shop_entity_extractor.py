@@ -0,0 +1,52 @@
+from typing import Any, Dict, List, Text
+
+from rasa.engine.graph import ExecutionContext, GraphComponent
+from rasa.engine.recipes.default_recipe import DefaultV1Recipe
+from rasa.engine.storage.resource import Resource
+from rasa.engine.storage.storage import ModelStorage
+from rasa.nlu.extractors.extractor import EntityExtractorMixin
+from rasa.shared.nlu.constants import ENTITIES, TEXT
+from rasa.shared.nlu.training_data.message import Message
+
+from actions.parsing import SHOP_ENTITIES_PARSED, parse_shop_entities
+
+
+@DefaultV1Recipe.register(
+    [DefaultV1Recipe.ComponentType.ENTITY_EXTRACTOR], is_trainable=False
+)
+class ShopEntityExtractor(GraphComponent, EntityExtractorMixin):
+    """Extract normalized price_min/price_max/rating_min/gender entities.
+
+    Values are numbers in VND, a 0-5 star rating and the API gender code
+    ("0" nam, "1" nữ). Put it after DIET and EntitySynonymMapper so its
+    entities are not overwritten.
+    """
+
+    @staticmethod
+    def get_default_config() -> Dict[Text, Any]:
+        return {}
+
+    @classmethod
+    def create(
+        cls,
+        config: Dict[Text, Any],
+        model_storage: ModelStorage,
+        resource: Resource,
+        execution_context: ExecutionContext,
+    ) -> "ShopEntityExtractor":
+        return cls()
+
+    def process(self, messages: List[Message]) -> List[Message]:
+        for message in messages:
+            text = message.get(TEXT)
+            if not text:
+                continue
+
+            entities = self.add_extractor_name(parse_shop_entities(text))
+            message.set(
+                ENTITIES, message.get(ENTITIES, []) + entities, add_to_output=True
+            )
+            # Tells the actions that a missing entity means "not mentioned"
+            message.set(SHOP_ENTITIES_PARSED, True, add_to_output=True)
+
+        return messages
@@ -0,0 +1,98 @@
+import functools
+from typing import Any, Dict, List, Optional, Text, Tuple
+
+from rasa.engine.graph import ExecutionContext
+from rasa.engine.recipes.default_recipe import DefaultV1Recipe
+from rasa.engine.storage.resource import Resource
+from rasa.engine.storage.storage import ModelStorage
+from rasa.nlu.tokenizers.tokenizer import Token, Tokenizer
+from rasa.shared.nlu.training_data.message import Message
+
+# Syllables of a segmented word are joined with "_" ("đồng hồ" -> "đồng_hồ")
+# so CountVectorsFeaturizer keeps the word as one feature.
+SYLLABLE_JOINER = "_"
+
+
+@DefaultV1Recipe.register(
+    DefaultV1Recipe.ComponentType.MESSAGE_TOKENIZER, is_trainable=False
+)
+class VietnameseTokenizer(Tokenizer):
+    """Tokenizer that segments Vietnamese words with underthesea.
+
+    Segmentation is the expensive part, so results are kept in an LRU cache
+    keyed by the message text. Button payloads and repeated messages are
+    segmented once per process.
+    """
+
+    @staticmethod
+    def get_default_config() -> Dict[Text, Any]:
+        return {
+            # Flag to check whether to split intents
+            "intent_tokenization_flag": False,
+            # Symbol on which intent should be split
+            "intent_split_symbol": "_",
+            # Regular expression to detect tokens
+            "token_pattern": None,
+            # Symbol on which prefix should be split
+            "prefix_separator_symbol": None,
+            # Number of segmented texts kept in memory, 0 disables the cache
+            "cache_size": 10000,
+        }
+
+    @staticmethod
+    def required_packages() -> List[Text]:
+        return ["underthesea"]
+
+    def __init__(self, config: Dict[Text, Any]) -> None:
+        super().__init__(config)
+        from underthesea import word_tokenize
+
+        self._word_tokenize = word_tokenize
+        cache_size = config["cache_size"]
+        if cache_size:
+            self.segment = functools.lru_cache(maxsize=cache_size)(self._segment)
+        else:
+            self.segment = self._segment
+
+    @classmethod
+    def create(
+        cls,
+        config: Dict[Text, Any],
+        model_storage: ModelStorage,
+        resource: Resource,
+        execution_context: ExecutionContext,
+    ) -> "VietnameseTokenizer":
+        return cls(config)
+
+    def _segment(self, text: Text) -> Tuple[Text, ...]:
+        return tuple(self._word_tokenize(text))
+
+    def cache_info(self) -> Optional[Any]:
+        """Hit/miss statistics of the segmentation cache"""
+        return self.segment.cache_info() if hasattr(self.segment, "cache_info") else None
+
+    def tokenize(self, message: Message, attribute: Text) -> List[Token]:
+        text = message.get(attribute)
+        tokens = []
+        offset = 0
+
+        for word in self.segment(text):
+            # Punctuation is dropped like in WhitespaceTokenizer
+            if not any(c.isalnum() for c in word):
+                continue
+
+            start = text.find(word, offset)
+            if start >= 0:
+                tokens.append(Token(word.replace(" ", SYLLABLE_JOINER), start))
+                offset = start + len(word)
+                continue
+
+            # underthesea normalized the word, fall back to its syllables
+            for syllable in word.split():
+                start = text.find(syllable, offset)
+                if start < 0:
+                    continue
+                tokens.append(Token(syllable, start))
+                offset = start + len(syllable)
+
+        return self._apply_token_pattern(tokens)
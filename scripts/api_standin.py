@@ -0,0 +1,328 @@
+"""Minimal stand-in for the watch-shop API, for local tests of the action server.
+
+Serves small fixed catalogs for the GET endpoints used by actions/ (brands,
+categories, colors, movement types, strap materials, order statuses,
+discounts, orders, search and recommendations) with the response shapes of
+the real API. Every response carries an ETag and a Last-Modified header and
+conditional requests (If-None-Match, If-Modified-Since) are answered with
+304 Not Modified, so the revalidation of actions.api.get_json can be tested.
+Bodies of 1 kB or more are gzip compressed for clients accepting gzip
+(--no-gzip disables it). --slow-rate and --slow-seconds add a latency tail:
+that share of the GETs is answered that much later.
+
+POST /_touch?path=/v1/brands changes a resource (new ETag and Last-Modified),
+GET /_stats returns the number of 200, gzip, 304 and delayed replies and the
+bytes sent.
+
+Usage (from the project root):
+    python scripts/api_standin.py [--host 127.0.0.1] [--port 8000] [--no-gzip]
+                                  [--slow-rate 0.05 --slow-seconds 1]
+    API_URL=http://127.0.0.1:8000 rasa run actions
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+logger = logging.getLogger(__name__)
+
+# Smaller bodies are sent uncompressed
+GZIP_MIN_BYTES = 1024
+
+BRANDS = [{"id": i, "name": name} for i, name in enumerate(
+    ["Rolex", "Omega", "Casio", "Seiko", "Citizen", "Tissot", "Orient", "Longines"], 1)]
+CATEGORIES = [{"id": i, "name": name} for i, name in enumerate(
+    ["Đồng hồ nam", "Đồng hồ nữ", "Đồng hồ đôi", "Đồng hồ thông minh"], 1)]
+COLORS = [{"id": i, "name": name} for i, name in enumerate(
+    ["Đen", "Trắng", "Vàng", "Bạc", "Xanh", "Nâu"], 1)]
+MOVEMENT_TYPES = [{"id": 1, "name": "Máy pin"}, {"id": 2, "name": "Máy cơ"}]
+STRAP_MATERIALS = [{"id": i, "name": name} for i, name in enumerate(
+    ["Da", "Thép không gỉ", "Cao su", "Vải"], 1)]
+ORDER_STATUSES = [
+    {"id": 1, "name": "Chờ xác nhận", "description": "Đơn hàng đang chờ shop xác nhận",
+     "color": "Yellow", "hex_code": "#FFC107"},
+    {"id": 2, "name": "Đang chuẩn bị hàng", "description": "Shop đang chuẩn bị hàng",
+     "color": "Orange", "hex_code": "#FD7E14"},
+    {"id": 3, "name": "Hoàn tất", "description": "Đơn hàng đã giao thành công",
+     "color": "Green", "hex_code": "#008000"},
+    {"id": 4, "name": "Đã hủy", "description": "Đơn hàng đã bị hủy",
+     "color": "Red", "hex_code": "#F44336"},
+]
+DISCOUNTS = [
+    {"id": 1, "code": "GIAM50K", "name": "Giảm 50k", "description": "Cho đơn từ 1 triệu",
+     "discount_type": "0", "discount_value": 50000, "min_order_value": 1000000,
+     "max_discount_amount": 50000, "effective_date": "20250101", "valid_until": "20991231"},
+    {"id": 2, "code": "SALE10", "name": "Giảm 10%", "description": "Tối đa 500k",
+     "discount_type": "1", "discount_value": 10, "min_order_value": 0,
+     "max_discount_amount": 500000, "effective_date": "20250101", "valid_until": "20991231"},
+]
+
+
+def make_watches(count: int = 120) -> List[Dict[str, Any]]:
+    watches = []
+    for i in range(1, count + 1):
+        brand = BRANDS[i % len(BRANDS)]
+        category = CATEGORIES[i % len(CATEGORIES)]
+        movement_type = MOVEMENT_TYPES[i % len(MOVEMENT_TYPES)]
+        watches.append({
+            "id": i, "code": f"DH-{i:04d}", "name": f"{brand['name']} {i}",
+            "description": f"Đồng hồ {brand['name']} mẫu {i}", "model": f"M{i}",
+            "case_material": "thép", "case_size": 36 + i % 8, "strap_size": 20,
+            "gender": str(i % 2), "water_resistance": "5ATM", "release_date": "20250101",
+            "sold": i * 3 % 97, "base_price": 500000 + (i * 379000) % 30000000,
+            "rating": i % 6, "status": True, "thumbnail": f"https://example.com/{i}.jpg",
+            "slider": f"https://example.com/{i}-1.jpg,https://example.com/{i}-2.jpg",
+            "brand_id": brand["id"], "brand_name": brand["name"],
+            "category_id": category["id"], "category_name": category["name"],
+            "movement_type_id": movement_type["id"], "movement_type_name": movement_type["name"],
+            "color_id": COLORS[i % len(COLORS)]["id"], "color_name": COLORS[i % len(COLORS)]["name"],
+            "strap_material_id": STRAP_MATERIALS[i % len(STRAP_MATERIALS)]["id"],
+            "created_at": "20250101000000", "updated_at": None,
+        })
+    return watches
+
+
+WATCHES = make_watches()
+ORDERS = [
+    {"id": i, "code": f"OD{i:05d}", "guess_name": "Nguyễn Văn A", "total_amount": 1500000 * i,
+     "final_amount": 1450000 * i, "current_status_id": str(i % 4 + 1), "created_at": "20251017182236"}
+    for i in range(1, 8)
+]
+
+
+def search(query: Dict[str, List[str]]) -> Dict[str, Any]:
+    def first(name: str) -> Optional[str]:
+        return query.get(name, [None])[0]
+
+    items = WATCHES
+    for field in ("brand_id", "category_id", "color_id", "movement_type_id", "strap_material_id", "gender"):
+        value = first(f"{field}__in")
+        if value is not None:
+            items = [w for w in items if str(w[field]) in value.split(",")]
+    if first("rating__gte") is not None:
+        items = [w for w in items if w["rating"] >= int(first("rating__gte"))]
+    if first("base_price__range"):
+        low, high = (int(v) for v in first("base_price__range").split(":"))
+        items = [w for w in items if low <= w["base_price"] <= high]
+    if first("q"):
+        words = first("q").lower().split()
+        items = [w for w in items if any(word in (w["name"] + " " + w["description"]).lower() for word in words)]
+    page, limit = int(first("page") or 1), int(first("limit") or 12)
+    return {"watches": {"items": items[(page - 1) * limit:page * limit], "total": len(items)}}
+
+
+def recommendations(query: Dict[str, List[str]]) -> Dict[str, Any]:
+    limit = int(query.get("limit", ["5"])[0])
+    recs = [
+        {"watch_id": w["id"], "name": w["name"], "base_price": w["base_price"], "rating": w["rating"],
+         "brand": {"id": w["brand_id"], "name": w["brand_name"]}, "score": 1 - i / 100}
+        for i, w in enumerate(sorted(WATCHES, key=lambda w: -w["sold"])[:limit])
+    ]
+    return {"data": {"data": {"recommendations": recs}}}
+
+
+class Resource:
+    """A JSON body with its validators, rebuilt on touch()"""
+
+    def __init__(self, build) -> None:
+        self.build = build
+        self.version = 0
+        self.touch()
+
+    def touch(self) -> None:
+        self.version += 1
+        data = self.build()
+        if self.version > 1 and isinstance(data, dict):
+            data["version"] = self.version
+        self.body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.etag = '"' + hashlib.sha1(self.body).hexdigest() + '"'
+        # Each representation has its own strong validator
+        self.gzip_etag = self.etag[:-1] + '-gzip"'
+        self._gzip_body: Optional[bytes] = None
+        # HTTP dates have a one second resolution
+        self.modified_at = int(time.time())
+
+    @property
+    def gzip_body(self) -> bytes:
+        if self._gzip_body is None:
+            self._gzip_body = gzip.compress(self.body, compresslevel=6, mtime=0)
+        return self._gzip_body
+
+
+STATIC_RESOURCES = {
+    "/v1/brands": lambda: {"brands": {"items": BRANDS}},
+    "/v1/categorys": lambda: {"categorys": {"items": CATEGORIES}},
+    "/v1/colors": lambda: {"colors": {"items": COLORS}},
+    "/v1/movement-type": lambda: {"movementTypes": {"items": MOVEMENT_TYPES}},
+    "/v1/strap-materials": lambda: {"strapMaterials": {"rows": STRAP_MATERIALS, "items": STRAP_MATERIALS}},
+    "/v1/order-status": lambda: {"orderStatuses": {"items": ORDER_STATUSES}},
+    "/v1/discounts": lambda: {"discounts": {"items": DISCOUNTS}},
+    "/v1/orders": lambda: {"orders": {"items": ORDERS}},
+}
+
+
+class ApiStandIn:
+    def __init__(self, compress: bool = True, slow_rate: float = 0.0, slow_seconds: float = 1.0) -> None:
+        self.resources = {path: Resource(build) for path, build in STATIC_RESOURCES.items()}
+        self.compress = compress
+        self.slow_rate = slow_rate
+        self.slow_seconds = slow_seconds
+        # Seeded, runs get the same sequence of slow replies
+        self.random = random.Random(0)
+        self.lock = threading.Lock()
+        self.stats = {"ok": 0, "gzip": 0, "not_modified": 0, "slow": 0, "bytes_sent": 0}
+
+    def resolve(self, path: str, query: Dict[str, List[str]]) -> Optional[Resource]:
+        if path in self.resources:
+            return self.resources[path]
+        # Query-dependent responses, validators from the body
+        if path == "/v1/search":
+            return Resource(lambda: search(query))
+        if path in ("/v1/recommendations", "/v1/recommendations/public"):
+            return Resource(lambda: recommendations(query))
+        if path.startswith("/v1/orders/"):
+            order = next((o for o in ORDERS if str(o["id"]) == path.rsplit("/", 1)[1]), None)
+            return Resource(lambda: {"order": order}) if order else None
+        return None
+
+    def count(self, key: str, size: int = 0) -> None:
+        with self.lock:
+            self.stats[key] += 1
+            self.stats["bytes_sent"] += size
+
+    def delay(self) -> None:
+        """Sleep like a slow reply of the real API, for `slow_rate` of the calls"""
+        with self.lock:
+            slow = self.random.random() < self.slow_rate
+        if slow:
+            self.count("slow")
+            time.sleep(self.slow_seconds)
+
+
+def is_not_modified(headers, resource: Resource) -> bool:
+    """RFC 9110: If-None-Match wins over If-Modified-Since"""
+    if_none_match = headers.get("If-None-Match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or any(
+            etag in tags or f"W/{etag}" in tags for etag in (resource.etag, resource.gzip_etag)
+        )
+    if_modified_since = headers.get("If-Modified-Since")
+    if if_modified_since:
+        try:
+            return resource.modified_at <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def accepts_gzip(headers) -> bool:
+    for item in (headers.get("Accept-Encoding") or "").split(","):
+        name, _, parameters = item.partition(";")
+        if name.strip().lower() in ("gzip", "*"):
+            _, _, weight = parameters.partition("q=")
+            try:
+                return float(weight or 1) > 0
+            except ValueError:
+                return False
+    return False
+
+
+def make_handler(standin: ApiStandIn):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body are separate writes, without this they wait for
+        # the delayed ACK of the client (~40 ms)
+        disable_nagle_algorithm = True
+
+        def log_message(self, format: str, *args: Any) -> None:
+            logger.debug(format % args)
+
+        def send(self, status: int, body: bytes = b"", headers: Tuple[Tuple[str, str], ...] = ()) -> None:
+            self.send_response(status)
+            for name, value in headers:
+                self.send_header(name, value)
+            if status != 304:
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if status != 304:
+                self.wfile.write(body)
+
+        def do_GET(self) -> None:
+            url = urlparse(self.path)
+            if url.path == "/_stats":
+                self.send(200, json.dumps(standin.stats).encode("utf-8"))
+                return
+            standin.delay()
+            resource = standin.resolve(url.path, parse_qs(url.query))
+            if resource is None:
+                self.send(404, b'{"message": "not found"}')
+                return
+            compressed = (
+                standin.compress and len(resource.body) >= GZIP_MIN_BYTES and accepts_gzip(self.headers)
+            )
+            headers = (
+                ("ETag", resource.gzip_etag if compressed else resource.etag),
+                ("Last-Modified", formatdate(resource.modified_at, usegmt=True)),
+                ("Cache-Control", "no-cache"),
+                ("Vary", "Accept-Encoding"),
+            )
+            if is_not_modified(self.headers, resource):
+                standin.count("not_modified")
+                self.send(304, headers=headers)
+                return
+            body = resource.body
+            if compressed:
+                body = resource.gzip_body
+                headers += (("Content-Encoding", "gzip"),)
+                standin.count("gzip")
+            standin.count("ok", len(body))
+            self.send(200, body, headers)
+
+        def do_POST(self) -> None:
+            url = urlparse(self.path)
+            path = parse_qs(url.query).get("path", [""])[0]
+            if url.path != "/_touch" or path not in standin.resources:
+                self.send(404, b'{"message": "not found"}')
+                return
+            # Changes are at least one second apart, If-Modified-Since has a
+            # one second resolution
+            time.sleep(1)
+            standin.resources[path].touch()
+            self.send(200, json.dumps({"path": path, "etag": standin.resources[path].etag}).encode("utf-8"))
+
+    return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--no-gzip", action="store_true", help="never compress bodies")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="share of GETs answered late")
+    parser.add_argument("--slow-seconds", type=float, default=1.0, help="delay of the late answers")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(ApiStandIn(
+        compress=not args.no_gzip, slow_rate=args.slow_rate, slow_seconds=args.slow_seconds,
+    )))
+    logger.info(f"API stand-in listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
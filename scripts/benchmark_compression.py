@@ -0,0 +1,188 @@
+"""Benchmark compression of search responses and webhook replies.
+
+Upstream: GETs /v1/search pages of the API stand-in (scripts/api_standin.py,
+started here) with "Accept-Encoding: identity" and with gzip, and reports
+bytes on the wire and the latency of download plus JSON decoding.
+
+Webhook: serves card replies shaped like the action server's (a "cards"
+custom payload of N watch cards) over a local HTTP server compressed with
+actions.compression, and reports reply size, the time spent compressing and
+decompressing, and the round trip with and without compression.
+
+Both run on loopback, where bandwidth is not the bottleneck. The "@N Mbit/s"
+columns add the transfer time of the measured wire bytes at that bandwidth,
+the expected latency between hosts.
+
+Usage (from the project root):
+    python scripts/benchmark_compression.py [--cards 12 50] [--requests 200] [--bandwidth 10 100]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Text, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+# No cache files for a benchmark
+os.environ.setdefault("ACTION_CACHE_PATH", "")
+os.environ.setdefault("ACTION_STORE_PATH", "")
+
+from actions.cards import watch_card  # noqa: E402
+from actions.compression import COMPRESS_LEVEL, compress, negotiate  # noqa: E402
+from scripts.api_standin import WATCHES, ApiStandIn, make_handler  # noqa: E402
+
+ENCODINGS = {"identity": "identity", "gzip": "gzip, deflate"}
+
+
+def start_server(handler: Any) -> Tuple[ThreadingHTTPServer, Text]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def card_reply(count: int) -> bytes:
+    """Webhook reply of an action sending `count` product cards, as Sanic
+    serializes it"""
+    cards = [watch_card(watch) for watch in (WATCHES * (count // len(WATCHES) + 1))[:count]]
+    message = {
+        "text": None, "buttons": [], "elements": [], "image": None, "attachment": None,
+        "template": None, "response": None, "custom": {"type": "cards", "cards": cards},
+    }
+    reply = {"events": [], "responses": [{"text": f"Tìm thấy {count} sản phẩm:"}, message]}
+    return json.dumps(reply, separators=(",", ":")).encode("utf-8")
+
+
+def make_reply_handler(level: int):
+    bodies: Dict[int, bytes] = {}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body are separate writes, without this they wait for
+        # the delayed ACK of the client (~40 ms)
+        disable_nagle_algorithm = True
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+        def do_POST(self) -> None:
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            count = int(parse_qs(urlparse(self.path).query)["cards"][0])
+            if count not in bodies:
+                bodies[count] = card_reply(count)
+            body = bodies[count]
+            encoding = negotiate(self.headers.get("Accept-Encoding"))
+            self.send_response(200)
+            if encoding is not None:
+                # Compressed per reply, like the response middleware
+                body = compress(body, encoding, level)
+                self.send_header("Content-Encoding", encoding)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return Handler
+
+
+def measure(
+    session: requests.Session, method: Text, url: Text, accept_encoding: Text, requests_count: int
+) -> Tuple[List[float], int, int]:
+    """Latencies (ms) of requests including JSON decoding, wire and body bytes of one response"""
+    latencies = []
+    wire_bytes = body_bytes = 0
+    headers = {"Accept-Encoding": accept_encoding}
+    for _ in range(requests_count):
+        start = time.perf_counter()
+        response = session.request(method, url, headers=headers, data=b"{}" if method == "POST" else None)
+        response.raise_for_status()
+        response.json()
+        latencies.append((time.perf_counter() - start) * 1000)
+        wire_bytes, body_bytes = response.raw.tell(), len(response.content)
+    return latencies, wire_bytes, body_bytes
+
+
+def transfer_ms(size: int, mbit_per_second: float) -> float:
+    return size * 8 / (mbit_per_second * 1e6) * 1000
+
+
+def report(
+    label: Text, latencies: List[float], wire_bytes: int, body_bytes: int, bandwidths: List[float]
+) -> None:
+    p50, p95 = statistics.median(latencies), statistics.quantiles(latencies, n=20)[-1]
+    modeled = "".join(f"{p50 + transfer_ms(wire_bytes, bandwidth):>14.2f}" for bandwidth in bandwidths)
+    print(f"{label:>20}{body_bytes:>9}{wire_bytes:>9}{wire_bytes / body_bytes:>8.1%}"
+          f"{p50:>9.2f}{p95:>9.2f}{modeled}")
+
+
+def header(bandwidths: List[float]) -> None:
+    modeled = "".join(f"{f'@{bandwidth:g} Mbit/s':>14}" for bandwidth in bandwidths)
+    print(f"{'':>20}{'body':>9}{'wire':>9}{'ratio':>8}{'p50 ms':>9}{'p95 ms':>9}{modeled}")
+
+
+def compression_costs(body: bytes, levels: List[int], rounds: int = 50) -> None:
+    for level in levels:
+        start = time.perf_counter()
+        for _ in range(rounds):
+            compressed = compress(body, "gzip", level)
+        compress_ms = (time.perf_counter() - start) * 1000 / rounds
+        start = time.perf_counter()
+        for _ in range(rounds):
+            zlib.decompress(compressed, 16 + zlib.MAX_WBITS)
+        decompress_ms = (time.perf_counter() - start) * 1000 / rounds
+        print(f"{'gzip level ' + str(level):>20}{len(compressed):>9}"
+              f"{compress_ms:>14.3f}{decompress_ms:>16.3f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cards", type=int, nargs="+", default=[12, 50],
+                        help="search page sizes and cards per reply")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--bandwidth", type=float, nargs="+", default=[10, 100],
+                        help="Mbit/s for the modeled latencies")
+    parser.add_argument("--level", type=int, default=COMPRESS_LEVEL, help="gzip level of the webhook replies")
+    args = parser.parse_args()
+
+    api, api_url = start_server(make_handler(ApiStandIn()))
+    replies, replies_url = start_server(make_reply_handler(args.level))
+    session = requests.Session()
+    try:
+        print("Upstream /v1/search (download + decode)")
+        header(args.bandwidth)
+        for count in args.cards:
+            url = f"{api_url}/v1/search?page=1&limit={count}"
+            for name, accept_encoding in ENCODINGS.items():
+                report(f"{count} items {name}", *measure(session, "GET", url, accept_encoding, args.requests),
+                       args.bandwidth)
+
+        print(f"\nWebhook replies (compress level {args.level} + download + decode)")
+        header(args.bandwidth)
+        for count in args.cards:
+            url = f"{replies_url}/webhook?cards={count}"
+            for name, accept_encoding in ENCODINGS.items():
+                report(f"{count} cards {name}", *measure(session, "POST", url, accept_encoding, args.requests),
+                       args.bandwidth)
+
+        print("\nCompression cost per reply")
+        print(f"{'':>20}{'bytes':>9}{'compress ms':>14}{'decompress ms':>16}")
+        for count in args.cards:
+            body = card_reply(count)
+            print(f"{f'{count} cards raw':>20}{len(body):>9}")
+            compression_costs(body, [1, args.level, 9])
+    finally:
+        api.shutdown()
+        replies.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Benchmark decoding of /v1/search and /v1/recommendations bodies.
+
+Compares the previous path (requests' response.json(): text decoding then
+json.loads of the whole body) with the projection of actions.payloads, once
+with json.loads and once with the fast parser it picked (orjson or ujson).
+Reports the decode time, the peak memory allocated while decoding, the
+memory blocks and bytes kept by the result, and the JSON size of what the
+caches store.
+
+Items are the API stand-in's (scripts/api_standin.py) with --extra-fields
+unused fields added, standing for the fields of the real API the cards do
+not read (timestamps, stock, SEO texts, ...).
+
+Usage (from the project root):
+    python scripts/benchmark_decoding.py [--items 12 50] [--extra-fields 15] [--rounds 500]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import AbstractSet, Any, Callable, Dict, List, Text, Tuple
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from actions.payloads import (  # noqa: E402
+    RECOMMENDATION_FIELDS,
+    SEARCH_ITEM_FIELDS,
+    decode_recommendations,
+    decode_search,
+    loads,
+    project,
+)
+from scripts.api_standin import WATCHES  # noqa: E402
+
+
+def with_extra_fields(item: Dict[Text, Any], count: int) -> Dict[Text, Any]:
+    extra = {f"unused_field_{i}": f"Giá trị không dùng {i} của {item.get('name')}" for i in range(count)}
+    return {**item, **extra}
+
+
+def search_body(items: int, extra_fields: int) -> bytes:
+    watches = [with_extra_fields(watch, extra_fields) for watch in (WATCHES * (items // len(WATCHES) + 1))[:items]]
+    data = {"watches": {"items": watches, "total": len(WATCHES)}}
+    return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+
+def recommendations_body(items: int, extra_fields: int) -> bytes:
+    recommendations = []
+    for i, watch in enumerate((WATCHES * (items // len(WATCHES) + 1))[:items]):
+        recommendation = {key: value for key, value in watch.items() if not key.endswith(("_id", "_name"))}
+        recommendation.update({
+            "watch_id": watch["id"], "score": 1 - i / 100, "is_ai_recommended": True,
+            "brand": {"id": watch["brand_id"], "name": watch["brand_name"]},
+            "category": {"id": watch["category_id"], "name": watch["category_name"]},
+            "movement_type": {"id": watch["movement_type_id"], "name": watch["movement_type_name"]},
+            "images": watch["slider"].split(","), "color_tags": [watch["color_name"]],
+            "style_tags": ["thanh lịch"], "material_tags": ["thép"], "movement_type_tags": [],
+        })
+        recommendations.append(with_extra_fields(recommendation, extra_fields))
+    data = {"data": {"data": {"recommendations": recommendations}}}
+    return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+
+def response_json(body: bytes) -> Any:
+    # What response.json() does with response.encoding = "utf-8"
+    return json.loads(body.decode("utf-8"))
+
+
+def stdlib_projection(root: Callable[[Any], Any], fields: AbstractSet[Text]) -> Callable[[bytes], Any]:
+    def decode(body: bytes) -> Any:
+        return project(root(json.loads(body)), fields)
+    return decode
+
+
+def decode_ms(decode: Callable[[bytes], Any], body: bytes, rounds: int) -> float:
+    best = float("inf")
+    # Best of 5 batches, the least disturbed by the rest of the machine
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            decode(body)
+        best = min(best, (time.perf_counter() - start) / rounds)
+    return best * 1000
+
+
+def allocations(decode: Callable[[bytes], Any], body: bytes) -> Tuple[int, int, int]:
+    """(peak bytes allocated while decoding, blocks and bytes kept by the result)"""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    result = decode(body)
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    del result
+    kept = after.compare_to(before, "filename")
+    return (
+        peak - current,
+        sum(stat.count_diff for stat in kept if stat.count_diff > 0),
+        sum(stat.size_diff for stat in kept if stat.size_diff > 0),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, nargs="+", default=[12, 50])
+    parser.add_argument("--extra-fields", type=int, default=15)
+    parser.add_argument("--rounds", type=int, default=500)
+    args = parser.parse_args()
+
+    payloads: List[Tuple[Text, Callable[[int, int], bytes], Callable[[bytes], Any], Callable[[Any], Any], AbstractSet[Text]]] = [
+        ("search", search_body, decode_search,
+         lambda data: data["watches"]["items"], SEARCH_ITEM_FIELDS),
+        ("recommendations", recommendations_body, decode_recommendations,
+         lambda data: data["data"]["data"]["recommendations"], RECOMMENDATION_FIELDS),
+    ]
+    print(f"Fast parser: {loads.__module__}, {args.extra_fields} unused fields per item")
+    print(f"{'':>36}{'body B':>9}{'ms':>9}{'speedup':>9}{'peak kB':>9}{'blocks':>8}{'kept kB':>9}{'cached B':>10}")
+    for name, make_body, fast_decode, root, fields in payloads:
+        for items in args.items:
+            body = make_body(items, args.extra_fields)
+            baseline = None
+            for method, decode in (
+                ("response.json()", response_json),
+                ("json + projection", stdlib_projection(root, fields)),
+                ("fast + projection", fast_decode),
+            ):
+                elapsed = decode_ms(decode, body, args.rounds)
+                baseline = baseline or elapsed
+                peak, kept_blocks, kept_bytes = allocations(decode, body)
+                cached = len(json.dumps(decode(body), ensure_ascii=False).encode("utf-8"))
+                print(f"{f'{name} {items} {method}':>36}{len(body):>9}{elapsed:>9.3f}{baseline / elapsed:>8.1f}x"
+                      f"{peak / 1024:>9.1f}{kept_blocks:>8}{kept_bytes / 1024:>9.1f}{cached:>10}")
+
+
+if __name__ == "__main__":
+    main()
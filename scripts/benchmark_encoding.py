@@ -0,0 +1,106 @@
+"""Benchmark JSON encoding of action-server replies with product cards.
+
+Encodes the webhook reply of a search with N cards ({"events": [...],
+"responses": [text, cards]}) with Sanic's default encoder (what rasa_sdk
+used so far), json.dumps, and actions.encoding.dumps with plain cards, with
+cards taken from the card cache (pre-encoded fragments). The "build" rows
+include building the cards from API items: without cache, on a card cache
+miss (each card built and copied into the cache) and on a hit. Reports
+replies per second and reply size.
+
+Usage (from the project root):
+    python scripts/benchmark_encoding.py [--cards 12 50] [--seconds 1]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, List, Text
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+# No cache files for a benchmark
+os.environ.setdefault("ACTION_CACHE_PATH", "")
+os.environ.setdefault("ACTION_STORE_PATH", "")
+
+from actions.cards import watch_card  # noqa: E402
+from actions.encoding import Fragment, CardCache, dumps, orjson  # noqa: E402
+from scripts.api_standin import WATCHES  # noqa: E402
+
+try:
+    from sanic.response import json_dumps as sanic_dumps
+except ImportError:
+    sanic_dumps = None
+
+
+def reply(cards: List[Dict[Text, Any]]) -> Dict[Text, Any]:
+    """What rasa_sdk returns for a search with these cards"""
+    messages = [
+        {"text": f"Kết quả lọc theo thương hiệu {cards[0]['brandName']}:", "buttons": [], "elements": [],
+         "custom": {}, "template": None, "response": None, "image": None, "attachment": None},
+        {"text": None, "buttons": [], "elements": [], "custom": {"type": "cards", "cards": cards},
+         "template": None, "response": None, "image": None, "attachment": None},
+    ]
+    return {"events": [{"event": "slot", "timestamp": None, "name": "brand", "value": "Rolex"}],
+            "responses": messages}
+
+
+def throughput(encode: Callable[[], Any], seconds: float) -> float:
+    encode()
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        for _ in range(20):
+            encode()
+        count += 20
+    return count / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cards", type=int, nargs="+", default=[12, 50])
+    parser.add_argument("--seconds", type=float, default=1.0)
+    args = parser.parse_args()
+
+    if orjson is None:
+        print("orjson is not installed, actions.encoding.dumps is json.dumps")
+    elif Fragment is None:
+        print(f"orjson {orjson.__version__} has no Fragment (>= 3.9), cards are encoded with the reply")
+    print(f"{'':>34}{'replies/s':>11}{'speedup':>9}{'bytes':>8}")
+    for count in args.cards:
+        watches = (WATCHES * (count // len(WATCHES) + 1))[:count]
+        plain = reply([watch_card(watch) for watch in watches])
+        warm_cache = CardCache(watch_card)
+        # Cards are encoded when they are first reused
+        warm_cache.cards(watches)
+        cached = reply(warm_cache.cards(watches))
+        # Items of a later request are equal but new objects
+        again = json.loads(json.dumps(watches))
+
+        previous = sanic_dumps or json.dumps
+
+        def built(encode: Callable[[Any], Any], cards: Callable[[], List[Dict[Text, Any]]]) -> Callable[[], Any]:
+            # Cards built for this reply, then encoded with it
+            return lambda: encode(reply(cards()))
+
+        encoders = [("json.dumps", lambda: json.dumps(plain))]
+        if sanic_dumps is not None:
+            encoders.insert(0, ("sanic default", lambda: sanic_dumps(plain)))
+        encoders += [
+            ("dumps, plain cards", lambda: dumps(plain)),
+            ("dumps, cached cards", lambda: dumps(cached)),
+            ("build + previous", built(previous, lambda: [watch_card(watch) for watch in watches])),
+            ("build + dumps, cache miss", built(dumps, lambda: CardCache(watch_card).cards(watches))),
+            ("build + dumps, cache hit", built(dumps, lambda: warm_cache.cards(again))),
+        ]
+        baseline = None
+        for name, encode in encoders:
+            rate = throughput(encode, args.seconds)
+            baseline = baseline or rate
+            print(f"{f'{count} cards, {name}':>34}{rate:>11.0f}{rate / baseline:>8.1f}x{len(encode()):>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Benchmark FuzzyIndex against a linear edit-distance scan.
+
+Builds a synthetic catalog of brand/model names (10k by default), then looks
+up misspelled names (one random edit: insertion, deletion, substitution or
+swap) and unrelated words. Reports build time, lookup latency, how often the
+right name is found and how often an unrelated word matches anything.
+
+Usage (from the project root):
+    python scripts/benchmark_fuzzy_index.py [--names 10000] [--queries 500]
+"""
+
+import argparse
+import os
+import random
+import string
+import sys
+import time
+from typing import List, Optional, Text, Tuple
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from actions.fuzzy_index import DEFAULT_CUTOFF, FuzzyIndex, similarity  # noqa: E402
+
+SYLLABLES = [
+    "ro", "lex", "ca", "sio", "se", "iko", "ci", "ti", "zen", "o", "me", "ga",
+    "tis", "sot", "lon", "gi", "nes", "hu", "blot", "ta", "g", "heu", "er",
+    "bre", "guet", "pa", "tek", "phi", "lip", "cha", "nel", "dior", "ori",
+    "ent", "fos", "sil", "da", "niel", "wel", "ling", "to", "n", "cur", "ren",
+]
+
+
+def make_names(count: int, rng: random.Random) -> List[Text]:
+    names = set()
+    while len(names) < count:
+        word = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        if rng.random() < 0.3:
+            word += f" {rng.randint(1, 999)}"
+        names.add(word)
+    return sorted(names)
+
+
+def misspell(name: Text, rng: random.Random) -> Text:
+    i = rng.randrange(len(name))
+    edit = rng.choice(["insert", "delete", "substitute", "swap"])
+    letter = rng.choice(string.ascii_lowercase)
+    if edit == "insert":
+        return name[:i] + letter + name[i:]
+    if edit == "delete" and len(name) > 1:
+        return name[:i] + name[i + 1:]
+    if edit == "swap" and i < len(name) - 1:
+        return name[:i] + name[i + 1] + name[i] + name[i + 2:]
+    return name[:i] + letter + name[i + 1:]
+
+
+def linear_lookup(names: List[Text], phrase: Text) -> Optional[Tuple[int, float]]:
+    best = None
+    for index, name in enumerate(names):
+        score = similarity(phrase, name, DEFAULT_CUTOFF)
+        if score >= DEFAULT_CUTOFF and (best is None or score > best[1]):
+            best = (index, score)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--names", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    names = make_names(args.names, rng)
+    targets = [rng.randrange(len(names)) for _ in range(args.queries)]
+    typos = [misspell(names[t], rng) for t in targets]
+    unrelated = ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 9)))
+                 for _ in range(args.queries)]
+
+    start = time.perf_counter()
+    index = FuzzyIndex(names)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    print(f"Names: {len(names)}, index built in {build_ms:.0f} ms, "
+          f"{len(index.postings)} trigrams, cutoff {DEFAULT_CUTOFF}")
+    print(f"{'method':>8}{'ms/lookup':>12}{'found':>10}{'false pos':>12}")
+    for method, lookup in (
+        ("index", index.lookup),
+        ("linear", lambda phrase: linear_lookup(names, phrase)),
+    ):
+        start = time.perf_counter()
+        results = [lookup(typo) for typo in typos]
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        # A typo can be as close to another name as to its own, count equal scores as found
+        found = sum(
+            1 for typo, target, result in zip(typos, targets, results)
+            if result and (result[0] == target
+                           or result[1] == similarity(typo, names[target]))
+        )
+        false_positives = sum(1 for word in unrelated if lookup(word))
+        print(f"{method:>8}{elapsed_ms / len(typos):>12.3f}"
+              f"{found / len(typos):>10.1%}{false_positives / len(unrelated):>12.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Benchmark hedged requests against an API with a latency tail.
+
+Sends /v1/search requests to the API stand-in (scripts/api_standin.py,
+started here) whose --slow-rate share of replies is --slow-seconds late,
+once without hedging and once per hedge percentile with actions.hedging.
+Reports the p50, p95 and p99 latency seen by the caller, the share of
+requests hedged and the requests the API received.
+
+Usage (from the project root):
+    python scripts/benchmark_hedging.py [--requests 1000] [--slow-rate 0.03] [--slow-seconds 0.5]
+                                        [--percentiles 90 95] [--max-rate 0.05]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer
+from typing import List, Optional, Text, Tuple
+
+import requests
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from actions.hedging import Hedger, percentile  # noqa: E402
+from scripts.api_standin import ApiStandIn, make_handler  # noqa: E402
+
+PATH = "/v1/search"
+
+
+def start_server(standin: ApiStandIn) -> Tuple[ThreadingHTTPServer, Text]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(standin))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def measure(hedger: Optional[Hedger], url: Text, count: int) -> List[float]:
+    """Latencies (ms) of `count` searches, hedged when `hedger` is given"""
+    session = requests.Session()
+    latencies = []
+    for i in range(count):
+        # Pages differ, like the searches of different users
+        params = {"page": 1, "limit": 12, "brand_id__in": i % 8 + 1}
+
+        def send() -> requests.Response:
+            response = session.get(f"{url}{PATH}", params=params, timeout=10)
+            response.raise_for_status()
+            return response
+
+        start = time.perf_counter()
+        if hedger is None:
+            send()
+        else:
+            hedger.run(PATH, send)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--slow-rate", type=float, default=0.03)
+    parser.add_argument("--slow-seconds", type=float, default=0.5)
+    parser.add_argument("--percentiles", type=float, nargs="+", default=[90, 95])
+    parser.add_argument("--max-rate", type=float, default=0.05, help="hedges per request at most")
+    args = parser.parse_args()
+
+    modes: List[Tuple[Text, Optional[Hedger]]] = [("no hedging", None)]
+    modes += [(f"hedge at p{percent:g}", Hedger(max_rate=args.max_rate, percent=percent))
+              for percent in args.percentiles]
+    print(f"{args.requests} searches, {args.slow_rate:.0%} answered {args.slow_seconds:g}s late")
+    print(f"{'':>16}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}{'hedged':>8}{'won':>6}{'API GETs':>10}")
+    for name, hedger in modes:
+        # The same sequence of slow replies for every mode
+        standin = ApiStandIn(slow_rate=args.slow_rate, slow_seconds=args.slow_seconds)
+        server, url = start_server(standin)
+        try:
+            latencies = measure(hedger, url, args.requests)
+        finally:
+            server.shutdown()
+        hedged = hedger.hedged / hedger.requests if hedger is not None else 0.0
+        won = hedger.won if hedger is not None else 0
+        gets = standin.stats["ok"] + standin.stats["not_modified"]
+        print(f"{name:>16}{statistics.median(latencies):>9.2f}{percentile(latencies, 95):>9.2f}"
+              f"{percentile(latencies, 99):>9.2f}{max(latencies):>9.2f}{hedged:>8.1%}{won:>6}{gets:>10}")
+
+
+if __name__ == "__main__":
+    main()
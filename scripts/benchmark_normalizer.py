@@ -0,0 +1,83 @@
+"""Benchmark the canonical query normalizer on the examples in data/nlu.yml.
+
+Every example is expanded into spelling variants (upper case, extra spaces,
+decomposed Unicode, no diacritics). Reports:
+  - throughput of QueryNormalizer uncached and cached (messages per second)
+  - distinct cache keys with the raw lower-cased text vs the canonical key
+
+Usage (from the project root):
+    python scripts/benchmark_normalizer.py [--repeat 5]
+"""
+
+import argparse
+import os
+import sys
+import time
+import unicodedata
+from typing import List, Text
+
+import yaml
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from actions.normalizer import QueryNormalizer, strip_diacritics  # noqa: E402
+
+
+def load_examples(path: Text) -> List[Text]:
+    with open(path, encoding="utf-8") as f:
+        data = yaml.safe_load(f)
+    examples = []
+    for item in data.get("nlu", []):
+        if "intent" not in item:
+            continue
+        for line in item.get("examples", "").splitlines():
+            line = line.strip()
+            if line.startswith("- "):
+                examples.append(line[2:])
+    return examples
+
+
+def variants(text: Text) -> List[Text]:
+    return [
+        text,
+        text.upper(),
+        f"  {'  '.join(text.split())} ",
+        unicodedata.normalize("NFD", text),
+        strip_diacritics(text),
+    ]
+
+
+def throughput(normalizer: QueryNormalizer, texts: List[Text], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            normalizer.normalize(text)
+    return repeat * len(texts) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nlu", default=os.path.join(PROJECT_ROOT, "data", "nlu.yml"))
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    texts = [v for example in load_examples(args.nlu) for v in variants(example)]
+    uncached = QueryNormalizer(cache_size=0)
+    cached = QueryNormalizer(cache_size=len(texts))
+    # Fill the cache before timing it
+    throughput(cached, texts, 1)
+
+    print(f"Messages: {len(texts)} ({len(texts) // 5} examples x 5 variants)")
+    print(f"{'':>10}{'msg/s':>12}")
+    print(f"{'uncached':>10}{throughput(uncached, texts, args.repeat):>12,.0f}")
+    print(f"{'cached':>10}{throughput(cached, texts, args.repeat):>12,.0f}")
+
+    raw_keys = {" ".join(t.lower().split()) for t in texts}
+    canonical_keys = {cached.normalize(t).key for t in texts}
+    print(f"\nDistinct keys, raw lower-cased text: {len(raw_keys)}")
+    print(f"Distinct keys, canonical:            {len(canonical_keys)}")
+
+
+if __name__ == "__main__":
+    main()
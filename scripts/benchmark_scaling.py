@@ -0,0 +1,178 @@
+"""Measure Rasa server throughput as instances are added.
+
+Starts the Redis stand-in (unless --redis-host is given) and 1..N Rasa
+servers with endpoints.scaled.yml, then replays short conversations through
+the REST channel. Every message of a conversation goes to the next instance
+round-robin, so conversations only stay consistent if the tracker and lock
+stores are really shared.
+
+The messages only trigger utter_* responses, no action server is needed.
+All instances run on this host, so results are bounded by its CPU cores.
+
+Usage (from the project root, after `rasa train`):
+    python scripts/benchmark_scaling.py --instances 1 2 4 [--model models/]
+"""
+
+import argparse
+import itertools
+import os
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Text
+
+import numpy as np
+import requests
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Messages answered with utter_* responses (see data/stories.yml)
+CONVERSATION = [
+    "xin chào",
+    "chính sách bảo hành như thế nào",
+    "thời gian giao hàng bao lâu",
+    "tạm biệt",
+]
+
+
+def wait_until_ready(url: Text, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(url, timeout=2).ok:
+                return
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(1)
+    raise TimeoutError(f"{url} did not become ready in {timeout} seconds")
+
+
+def start_instances(count: int, base_port: int, model: Text, env: Dict[Text, Text]) -> List[subprocess.Popen]:
+    processes = []
+    for i in range(count):
+        processes.append(subprocess.Popen(
+            [
+                sys.executable, "-m", "rasa", "run", "--enable-api",
+                "--model", model,
+                "--endpoints", "endpoints.scaled.yml",
+                "--port", str(base_port + i),
+            ],
+            cwd=PROJECT_ROOT,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        ))
+    return processes
+
+
+def run_load(urls: List[Text], conversations: int, concurrency: int) -> Dict[Text, float]:
+    next_url = itertools.cycle(urls)
+    lock = threading.Lock()
+    latencies: List[float] = []
+    errors = 0
+
+    def conversation() -> None:
+        nonlocal errors
+        sender = f"bench-{uuid.uuid4().hex}"
+        session = requests.Session()
+        for text in CONVERSATION:
+            with lock:
+                url = next(next_url)
+            start = time.perf_counter()
+            try:
+                response = session.post(
+                    f"{url}/webhooks/rest/webhook",
+                    json={"sender": sender, "message": text},
+                    timeout=30,
+                )
+                ok = response.ok and bool(response.json())
+            except requests.exceptions.RequestException:
+                ok = False
+            with lock:
+                latencies.append(time.perf_counter() - start)
+                if not ok:
+                    errors += 1
+
+        # The tracker must contain every turn no matter which instance served it
+        tracker = session.get(f"{next(next_url)}/conversations/{sender}/tracker", timeout=30).json()
+        user_turns = sum(1 for e in tracker.get("events", []) if e.get("event") == "user")
+        if user_turns != len(CONVERSATION):
+            with lock:
+                errors += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(conversation) for _ in range(conversations)]:
+            future.result()
+    elapsed = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "messages_per_s": len(latencies) / elapsed,
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p95_ms": float(np.percentile(latencies_ms, 95)),
+        "errors": errors,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--instances", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--model", default="models")
+    parser.add_argument("--conversations", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--base-port", type=int, default=5105)
+    parser.add_argument("--redis-host", default=None)
+    parser.add_argument("--redis-port", type=int, default=6390)
+    parser.add_argument("--startup-timeout", type=float, default=180)
+    args = parser.parse_args()
+
+    standin = None
+    redis_host = args.redis_host
+    if redis_host is None:
+        redis_host = "127.0.0.1"
+        standin = subprocess.Popen(
+            [sys.executable, os.path.join(PROJECT_ROOT, "scripts", "redis_standin.py"),
+             "--port", str(args.redis_port)],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+    env = {
+        **os.environ,
+        "REDIS_HOST": redis_host,
+        "REDIS_PORT": str(args.redis_port),
+        "REDIS_PASSWORD": os.environ.get("REDIS_PASSWORD", ""),
+        "ACTION_SERVER_URL": os.environ.get("ACTION_SERVER_URL", "http://localhost:5055"),
+    }
+
+    results = {}
+    try:
+        for count in args.instances:
+            print(f"Starting {count} instance(s)...")
+            processes = start_instances(count, args.base_port, args.model, env)
+            try:
+                urls = [f"http://localhost:{args.base_port + i}" for i in range(count)]
+                for url in urls:
+                    wait_until_ready(f"{url}/status", args.startup_timeout)
+                results[count] = run_load(urls, args.conversations, args.concurrency)
+            finally:
+                for process in processes:
+                    process.terminate()
+                for process in processes:
+                    process.wait()
+    finally:
+        if standin:
+            standin.terminate()
+
+    print(f"\n{'instances':>10}{'msg/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'errors':>10}")
+    for count, r in results.items():
+        print(f"{count:>10}{r['messages_per_s']:>10.1f}{r['p50_ms']:>10.1f}"
+              f"{r['p95_ms']:>10.1f}{r['errors']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Benchmark VietnameseTokenizer against WhitespaceTokenizer on data/nlu.yml.
+
+Reports:
+  - vocabulary size of the char_wb (1-4) and word (1-2) CountVectors features
+  - tokenization time per message, uncached and cached
+  - intent accuracy and parse latency of an NLU model trained with each
+    tokenizer (config.yml with the tokenizer swapped), unless --skip-training
+
+Usage (from the project root):
+    python scripts/benchmark_tokenizer.py [--skip-training]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Text
+
+import yaml
+from sklearn.feature_extraction.text import CountVectorizer
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from rasa.model_training import train_nlu  # noqa: E402
+from rasa.nlu.tokenizers.whitespace_tokenizer import WhitespaceTokenizer  # noqa: E402
+from rasa.shared.nlu.training_data.loading import load_data  # noqa: E402
+from rasa.shared.nlu.training_data.message import Message  # noqa: E402
+
+from components.vietnamese_tokenizer import VietnameseTokenizer  # noqa: E402
+from evaluate_tiered_intents import evaluate  # noqa: E402
+
+TOKENIZERS = {
+    "whitespace": "WhitespaceTokenizer",
+    "vietnamese": "components.vietnamese_tokenizer.VietnameseTokenizer",
+}
+
+
+def tokenize_all(tokenizer: Any, texts: List[Text]) -> List[List[Text]]:
+    return [
+        [t.text for t in tokenizer.tokenize(Message(data={"text": text}), "text")]
+        for text in texts
+    ]
+
+
+def vocabulary_sizes(tokenized: List[List[Text]]) -> Dict[Text, int]:
+    # Same settings as the two CountVectorsFeaturizers in config.yml
+    documents = [" ".join(tokens) for tokens in tokenized]
+    char_wb = CountVectorizer(analyzer="char_wb", ngram_range=(1, 4), lowercase=False)
+    word = CountVectorizer(
+        analyzer="word", ngram_range=(1, 2), lowercase=False, token_pattern=r"(?u)\b\w+\b"
+    )
+    char_wb.fit(documents)
+    word.fit(documents)
+    return {"char_wb": len(char_wb.vocabulary_), "word": len(word.vocabulary_)}
+
+
+def time_per_message_ms(tokenizer: Any, texts: List[Text]) -> float:
+    start = time.perf_counter()
+    tokenize_all(tokenizer, texts)
+    return (time.perf_counter() - start) * 1000 / len(texts)
+
+
+def write_config(base_config: Dict[Text, Any], path: Text, tokenizer: Text) -> None:
+    config = dict(base_config)
+    config["pipeline"] = [
+        {**c, "name": tokenizer} if c["name"] in TOKENIZERS.values() else c
+        for c in base_config["pipeline"]
+    ]
+    with open(path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(config, f, allow_unicode=True, sort_keys=False)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--config", default=os.path.join(PROJECT_ROOT, "config.yml"))
+    parser.add_argument("--nlu", default=os.path.join(PROJECT_ROOT, "data", "nlu.yml"))
+    parser.add_argument("--domain", default=os.path.join(PROJECT_ROOT, "domain.yml"))
+    parser.add_argument("--train-frac", type=float, default=0.8)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--skip-training", action="store_true")
+    args = parser.parse_args()
+
+    data = load_data(args.nlu)
+    texts = [e.get("text") for e in data.intent_examples if e.get("text")]
+
+    whitespace = WhitespaceTokenizer(WhitespaceTokenizer.get_default_config())
+    vietnamese = VietnameseTokenizer(VietnameseTokenizer.get_default_config())
+    vietnamese_uncached = VietnameseTokenizer(
+        {**VietnameseTokenizer.get_default_config(), "cache_size": 0}
+    )
+
+    print(f"Messages: {len(texts)}")
+    print(f"{'tokenizer':>12}{'char_wb':>10}{'word':>10}{'tokens':>10}{'ms/msg':>10}{'cached':>10}")
+    for name, tokenizer, uncached_tokenizer in (
+        ("whitespace", whitespace, whitespace),
+        ("vietnamese", vietnamese, vietnamese_uncached),
+    ):
+        # The first pass fills the LRU cache, the timed second pass hits it
+        tokenized = tokenize_all(tokenizer, texts)
+        sizes = vocabulary_sizes(tokenized)
+        uncached = time_per_message_ms(uncached_tokenizer, texts)
+        cached = time_per_message_ms(tokenizer, texts)
+        n_tokens = sum(len(t) for t in tokenized)
+        print(f"{name:>12}{sizes['char_wb']:>10}{sizes['word']:>10}{n_tokens:>10}"
+              f"{uncached:>10.3f}{cached:>10.3f}")
+    print(f"Segmentation cache: {vietnamese.cache_info()}")
+
+    if args.skip_training:
+        return
+
+    with open(args.config, encoding="utf-8") as f:
+        base_config = yaml.safe_load(f)
+    train_data, test_data = data.train_test_split(args.train_frac, random_seed=args.seed)
+    test_examples = [e for e in test_data.intent_examples if e.get("text")]
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        train_path = os.path.join(tmp, "train.yml")
+        train_data.persist_nlu(train_path)
+        for name, tokenizer in TOKENIZERS.items():
+            config_path = os.path.join(tmp, f"config_{name}.yml")
+            write_config(base_config, config_path, tokenizer)
+            model_path = train_nlu(
+                config_path, train_path, os.path.join(tmp, name),
+                fixed_model_name=name, domain=args.domain,
+            )
+            results[name] = asyncio.run(evaluate(model_path, test_examples))
+
+    print(f"\n{'tokenizer':>12}{'accuracy':>10}{'mean ms':>10}{'p95 ms':>10}")
+    for name, r in results.items():
+        print(f"{name:>12}{r['accuracy']:>10.3f}{r['mean_ms']:>10.2f}{r['p95_ms']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Train and compare the pipeline profiles in configs/.
+
+For every profile (config.<name>.yml) this trains a full model on a split of
+data/nlu.yml plus the stories and rules, then reports:
+  - intent F1 (weighted and macro) on the held-out NLU examples
+  - story accuracy on tests/test_stories.yml
+  - training time and model size
+  - per-message parse latency
+
+Usage (from the project root):
+    python scripts/evaluate_profiles.py [--profiles fast balanced accurate]
+"""
+
+import argparse
+import asyncio
+import glob
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Text
+
+import numpy as np
+from sklearn.metrics import f1_score
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from rasa.core.agent import Agent  # noqa: E402
+from rasa.model_training import train  # noqa: E402
+from rasa.shared.nlu.training_data.loading import load_data  # noqa: E402
+
+CONFIGS_DIR = os.path.join(PROJECT_ROOT, "configs")
+DATA_DIR = os.path.join(PROJECT_ROOT, "data")
+DOMAIN = os.path.join(PROJECT_ROOT, "domain.yml")
+TEST_STORIES = os.path.join(PROJECT_ROOT, "tests", "test_stories.yml")
+
+
+def available_profiles() -> List[Text]:
+    paths = sorted(glob.glob(os.path.join(CONFIGS_DIR, "config.*.yml")))
+    return [os.path.basename(p)[len("config."):-len(".yml")] for p in paths]
+
+
+async def evaluate_nlu(model_path: Text, examples: List[Any]) -> Dict[Text, Any]:
+    agent = Agent.load(model_path)
+    # Warm up so graph loading is not counted as latency
+    await agent.parse_message(examples[0].get("text"))
+
+    expected, predicted, latencies = [], [], []
+    for example in examples:
+        start = time.perf_counter()
+        result = await agent.parse_message(example.get("text"))
+        latencies.append(time.perf_counter() - start)
+        expected.append(example.get("intent"))
+        predicted.append(result["intent"].get("name") or "")
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "f1_weighted": f1_score(expected, predicted, average="weighted", zero_division=0),
+        "f1_macro": f1_score(expected, predicted, average="macro", zero_division=0),
+        "mean_ms": float(latencies_ms.mean()),
+        "p95_ms": float(np.percentile(latencies_ms, 95)),
+    }
+
+
+def count_stories(path: Text) -> int:
+    if not os.path.exists(path):
+        return 0
+    with open(path, encoding="utf-8") as f:
+        return sum(1 for line in f if line.lstrip().startswith("- story:"))
+
+
+def evaluate_stories(model_path: Text, out_dir: Text) -> float:
+    subprocess.run(
+        [
+            sys.executable, "-m", "rasa", "test", "core",
+            "--model", model_path,
+            "--stories", TEST_STORIES,
+            "--out", out_dir,
+            "--no-plot",
+        ],
+        cwd=PROJECT_ROOT,
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+    total = count_stories(TEST_STORIES)
+    failed = count_stories(os.path.join(out_dir, "failed_test_stories.yml"))
+    return (total - failed) / total if total else 0.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", nargs="+", default=available_profiles())
+    parser.add_argument("--train-frac", type=float, default=0.8)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    data = load_data(os.path.join(DATA_DIR, "nlu.yml"))
+    train_data, test_data = data.train_test_split(args.train_frac, random_seed=args.seed)
+    test_examples = [e for e in test_data.intent_examples if e.get("text")]
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        train_nlu_path = os.path.join(tmp, "nlu.yml")
+        train_data.persist_nlu(train_nlu_path)
+        training_files = [
+            train_nlu_path,
+            os.path.join(DATA_DIR, "stories.yml"),
+            os.path.join(DATA_DIR, "rules.yml"),
+        ]
+
+        for profile in args.profiles:
+            config = os.path.join(CONFIGS_DIR, f"config.{profile}.yml")
+            print(f"Training profile '{profile}'...")
+            start = time.perf_counter()
+            result = train(
+                DOMAIN, config, training_files,
+                output=os.path.join(tmp, "models"),
+                fixed_model_name=profile,
+                force_training=True,
+            )
+            train_seconds = time.perf_counter() - start
+
+            metrics = asyncio.run(evaluate_nlu(result.model, test_examples))
+            metrics["story_accuracy"] = evaluate_stories(
+                result.model, os.path.join(tmp, f"results_{profile}")
+            )
+            metrics["train_s"] = train_seconds
+            metrics["size_mb"] = os.path.getsize(result.model) / (1024 * 1024)
+            results[profile] = metrics
+
+    print(f"\nNLU test examples: {len(test_examples)}, "
+          f"test stories: {count_stories(TEST_STORIES)}")
+    header = ["profile", "F1 w", "F1 macro", "stories", "train s", "size MB", "mean ms", "p95 ms"]
+    print("".join(f"{h:>10}" for h in header))
+    for profile, m in results.items():
+        print(f"{profile:>10}{m['f1_weighted']:>10.3f}{m['f1_macro']:>10.3f}"
+              f"{m['story_accuracy']:>10.1%}{m['train_s']:>10.1f}{m['size_mb']:>10.1f}"
+              f"{m['mean_ms']:>10.2f}{m['p95_ms']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
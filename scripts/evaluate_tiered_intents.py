@@ -0,0 +1,133 @@
+"""Compare the tiered intent classifier with DIET alone on data/nlu.yml.
+
+Splits the NLU data into train/test, trains two NLU models (config.yml
+without LinearIntentClassifier, and with it before FastPathDIETClassifier)
+and reports intent accuracy, entity F1, how many messages the linear tier
+answered, and parse latency.
+
+Usage (from the project root):
+    python scripts/evaluate_tiered_intents.py [--train-frac 0.8] [--threshold 0.9]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Set, Text, Tuple
+
+import numpy as np
+import yaml
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from rasa.core.agent import Agent  # noqa: E402
+from rasa.model_training import train_nlu  # noqa: E402
+from rasa.shared.nlu.training_data.loading import load_data  # noqa: E402
+
+from components.fast_path import FAST_PATH  # noqa: E402
+
+LINEAR_TIER = "components.linear_intent_classifier.LinearIntentClassifier"
+DIET = "components.fast_path.FastPathDIETClassifier"
+
+
+def entity_spans(entities: List[Dict[Text, Any]]) -> Set[Tuple[int, int, Text]]:
+    return {(e.get("start"), e.get("end"), e.get("entity")) for e in entities or []}
+
+
+def write_config(base_config: Dict[Text, Any], path: Text, tiered: bool, threshold: float) -> None:
+    config = dict(base_config)
+    pipeline = []
+    for component in base_config["pipeline"]:
+        if component["name"] == LINEAR_TIER:
+            continue
+        if component["name"] == DIET and tiered:
+            pipeline.append({"name": LINEAR_TIER, "confidence_threshold": threshold})
+        pipeline.append(component)
+    config["pipeline"] = pipeline
+    with open(path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(config, f, allow_unicode=True, sort_keys=False)
+
+
+async def evaluate(model_path: Text, examples: List[Any]) -> Dict[Text, Any]:
+    agent = Agent.load(model_path)
+    # Warm up so graph loading is not counted as latency
+    await agent.parse_message(examples[0].get("text"))
+
+    correct = 0
+    linear = 0
+    # Entity spans found, expected and both
+    found = expected = matched = 0
+    latencies = []
+    for example in examples:
+        start = time.perf_counter()
+        result = await agent.parse_message(example.get("text"))
+        latencies.append(time.perf_counter() - start)
+
+        if result["intent"].get("name") == example.get("intent"):
+            correct += 1
+        if result.get(FAST_PATH) == "LinearIntentClassifier":
+            linear += 1
+        predicted, gold = entity_spans(result.get("entities")), entity_spans(example.get("entities"))
+        found += len(predicted)
+        expected += len(gold)
+        matched += len(predicted & gold)
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "accuracy": correct / len(examples),
+        "entity_f1": 2 * matched / (found + expected) if found + expected else 1.0,
+        "linear_share": linear / len(examples),
+        "mean_ms": float(latencies_ms.mean()),
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p95_ms": float(np.percentile(latencies_ms, 95)),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--config", default=os.path.join(PROJECT_ROOT, "config.yml"))
+    parser.add_argument("--nlu", default=os.path.join(PROJECT_ROOT, "data", "nlu.yml"))
+    parser.add_argument("--domain", default=os.path.join(PROJECT_ROOT, "domain.yml"))
+    parser.add_argument("--train-frac", type=float, default=0.8)
+    parser.add_argument("--threshold", type=float, default=0.9)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with open(args.config, encoding="utf-8") as f:
+        base_config = yaml.safe_load(f)
+
+    data = load_data(args.nlu)
+    train_data, test_data = data.train_test_split(args.train_frac, random_seed=args.seed)
+    test_examples = [e for e in test_data.intent_examples if e.get("text")]
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        train_path = os.path.join(tmp, "train.yml")
+        train_data.persist_nlu(train_path)
+
+        for name, tiered in (("diet", False), ("tiered", True)):
+            config_path = os.path.join(tmp, f"config_{name}.yml")
+            write_config(base_config, config_path, tiered, args.threshold)
+            model_path = train_nlu(
+                config_path, train_path, os.path.join(tmp, name),
+                fixed_model_name=name, domain=args.domain,
+            )
+            results[name] = asyncio.run(evaluate(model_path, test_examples))
+
+    diet, tiered = results["diet"], results["tiered"]
+    print(f"Test examples: {len(test_examples)}, threshold: {args.threshold}")
+    print(f"{'':10}{'accuracy':>10}{'entity F1':>10}{'linear':>10}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, r in results.items():
+        print(f"{name:10}{r['accuracy']:>10.3f}{r['entity_f1']:>10.3f}{r['linear_share']:>10.1%}"
+              f"{r['mean_ms']:>10.2f}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}")
+    print(f"Accuracy difference (tiered - diet): {tiered['accuracy'] - diet['accuracy']:+.3f}")
+    print(f"Entity F1 difference (tiered - diet): {tiered['entity_f1'] - diet['entity_f1']:+.3f}")
+    print(f"Mean latency saved: {diet['mean_ms'] - tiered['mean_ms']:.2f} ms "
+          f"({(1 - tiered['mean_ms'] / diet['mean_ms']) * 100:.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""Minimal Redis-compatible server for local tests of endpoints.scaled.yml.
+
+Implements the subset of commands used by Rasa's RedisTrackerStore and
+RedisLockStore (and by redis-py on connect): PING, ECHO, AUTH, SELECT,
+CLIENT, GET, SET [EX|PX|NX|XX], SETEX, DEL, EXISTS, KEYS, EXPIRE, TTL,
+DBSIZE, FLUSHDB, FLUSHALL, INFO, QUIT. Data lives in memory only.
+
+Usage:
+    python scripts/redis_standin.py [--host 127.0.0.1] [--port 6379]
+"""
+
+import argparse
+import asyncio
+import fnmatch
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+NUM_DATABASES = 16
+
+# key -> (value, expire_at or None)
+Database = Dict[bytes, Tuple[bytes, Optional[float]]]
+
+
+class RespError(Exception):
+    pass
+
+
+def encode(value: object) -> bytes:
+    """Encode a reply in RESP2"""
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, RespError):
+        return b"-" + str(value).encode() + b"\r\n"
+    if isinstance(value, bool):
+        return b":1\r\n" if value else b":0\r\n"
+    if isinstance(value, int):
+        return b":" + str(value).encode() + b"\r\n"
+    if isinstance(value, str):
+        return b"+" + value.encode() + b"\r\n"
+    if isinstance(value, bytes):
+        return b"$" + str(len(value)).encode() + b"\r\n" + value + b"\r\n"
+    if isinstance(value, list):
+        return b"*" + str(len(value)).encode() + b"\r\n" + b"".join(encode(v) for v in value)
+    raise TypeError(f"Cannot encode {type(value)}")
+
+
+class RedisStandIn:
+    def __init__(self) -> None:
+        self.databases: List[Database] = [{} for _ in range(NUM_DATABASES)]
+
+    def _get(self, db: Database, key: bytes) -> Optional[bytes]:
+        item = db.get(key)
+        if item is None:
+            return None
+        value, expire_at = item
+        if expire_at is not None and expire_at <= time.monotonic():
+            del db[key]
+            return None
+        return value
+
+    def execute(self, db_index: int, args: List[bytes]) -> Tuple[object, int]:
+        """Run one command, returns (reply, selected database)"""
+        command = args[0].upper().decode()
+        params = args[1:]
+        db = self.databases[db_index]
+
+        if command == "PING":
+            return (params[0] if params else "PONG"), db_index
+        if command == "ECHO":
+            return params[0], db_index
+        if command in ("AUTH", "CLIENT", "QUIT"):
+            return "OK", db_index
+        if command == "SELECT":
+            index = int(params[0])
+            if not 0 <= index < NUM_DATABASES:
+                return RespError("ERR DB index is out of range"), db_index
+            return "OK", index
+        if command == "GET":
+            return self._get(db, params[0]), db_index
+        if command == "SET":
+            return self._set(db, params), db_index
+        if command == "SETEX":
+            return self._set(db, [params[0], params[2], b"EX", params[1]]), db_index
+        if command == "DEL":
+            return sum(1 for key in params if db.pop(key, None) is not None), db_index
+        if command == "EXISTS":
+            return sum(1 for key in params if self._get(db, key) is not None), db_index
+        if command == "KEYS":
+            pattern = params[0].decode()
+            return [
+                key for key in list(db)
+                if self._get(db, key) is not None and fnmatch.fnmatchcase(key.decode(), pattern)
+            ], db_index
+        if command == "EXPIRE":
+            value = self._get(db, params[0])
+            if value is None:
+                return 0, db_index
+            db[params[0]] = (value, time.monotonic() + int(params[1]))
+            return 1, db_index
+        if command == "TTL":
+            if self._get(db, params[0]) is None:
+                return -2, db_index
+            expire_at = db[params[0]][1]
+            return (-1 if expire_at is None else round(expire_at - time.monotonic())), db_index
+        if command == "DBSIZE":
+            return len(db), db_index
+        if command == "FLUSHDB":
+            db.clear()
+            return "OK", db_index
+        if command == "FLUSHALL":
+            for d in self.databases:
+                d.clear()
+            return "OK", db_index
+        if command == "INFO":
+            return b"# Server\r\nredis_version:7.0.0-standin\r\n", db_index
+
+        return RespError(f"ERR unknown command '{command}'"), db_index
+
+    def _set(self, db: Database, params: List[bytes]) -> object:
+        key, value = params[0], params[1]
+        expire_at = None
+        only_new = only_existing = False
+        options = [p.upper() for p in params[2:]]
+        i = 0
+        while i < len(options):
+            if options[i] == b"EX":
+                expire_at = time.monotonic() + int(options[i + 1])
+                i += 1
+            elif options[i] == b"PX":
+                expire_at = time.monotonic() + int(options[i + 1]) / 1000
+                i += 1
+            elif options[i] == b"NX":
+                only_new = True
+            elif options[i] == b"XX":
+                only_existing = True
+            i += 1
+
+        exists = self._get(db, key) is not None
+        if (only_new and exists) or (only_existing and not exists):
+            return None
+        db[key] = (value, expire_at)
+        return "OK"
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        db_index = 0
+        try:
+            while True:
+                args = await read_command(reader)
+                if args is None:
+                    break
+                if not args:
+                    continue
+                reply, db_index = self.execute(db_index, args)
+                writer.write(encode(reply))
+                await writer.drain()
+                if args[0].upper() == b"QUIT":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def read_command(reader: asyncio.StreamReader) -> Optional[List[bytes]]:
+    line = await reader.readline()
+    if not line:
+        return None
+    line = line.rstrip(b"\r\n")
+    if not line.startswith(b"*"):
+        # Inline command, e.g. from telnet or redis-cli --no-raw
+        return line.split()
+
+    args = []
+    for _ in range(int(line[1:])):
+        header = await reader.readline()
+        length = int(header[1:].rstrip(b"\r\n"))
+        data = await reader.readexactly(length + 2)
+        args.append(data[:-2])
+    return args
+
+
+async def serve(host: str, port: int) -> None:
+    standin = RedisStandIn()
+    server = await asyncio.start_server(standin.handle, host, port)
+    logger.info(f"Redis stand-in listening on {host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6379)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
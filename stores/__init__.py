@@ -0,0 +1 @@
+# This package contains the tracker and lock stores referenced in endpoints.yml
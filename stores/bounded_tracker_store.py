@@ -0,0 +1,228 @@
+import asyncio
+import atexit
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Text, Tuple
+
+from rasa.core.brokers.broker import EventBroker
+from rasa.core.tracker_store import InMemoryTrackerStore
+from rasa.shared.core.constants import ACTION_LISTEN_NAME, ACTION_SESSION_START_NAME
+from rasa.shared.core.domain import Domain
+from rasa.shared.core.events import ActionExecuted, Event, SessionStarted, SlotSet, UserUttered
+from rasa.shared.core.trackers import DialogueStateTracker
+
+logger = logging.getLogger(__name__)
+
+# Message metadata never written to snapshots (the user's JWT)
+SECRET_METADATA_KEYS = ("token",)
+
+
+def _drop_secrets(value: Any) -> None:
+    """Remove SECRET_METADATA_KEYS from every "metadata" dict in `value`"""
+    if isinstance(value, dict):
+        metadata = value.get("metadata")
+        if isinstance(metadata, dict):
+            for key in SECRET_METADATA_KEYS:
+                metadata.pop(key, None)
+        for item in value.values():
+            _drop_secrets(item)
+    elif isinstance(value, list):
+        for item in value:
+            _drop_secrets(item)
+
+
+def without_secrets(serialised: Text) -> Text:
+    """A serialised tracker without the secrets of its message metadata"""
+    data = json.loads(serialised)
+    _drop_secrets(data)
+    return json.dumps(data, ensure_ascii=False)
+
+
+class BoundedTrackerStore(InMemoryTrackerStore):
+    """In-memory tracker store with a fixed memory budget.
+
+    - At most `max_conversations` trackers are kept, the least recently used
+      conversation is evicted first.
+    - A tracker with more than `max_events` events is compacted to its last
+      `keep_turns` user turns (policies use max_history 5), the current slot
+      values are kept.
+    - With `snapshot_path` set, the store is written to disk every
+      `snapshot_interval` seconds and on exit, and loaded again on start.
+      Snapshots leave out the tokens of the message metadata.
+
+    Configure it in endpoints.yml:
+
+        tracker_store:
+          type: stores.bounded_tracker_store.BoundedTrackerStore
+          max_conversations: 5000
+          snapshot_path: snapshots/trackers.json
+    """
+
+    def __init__(
+        self,
+        domain: Domain,
+        host: Optional[Text] = None,
+        event_broker: Optional[EventBroker] = None,
+        max_conversations: int = 5000,
+        max_events: int = 200,
+        keep_turns: int = 20,
+        snapshot_path: Optional[Text] = None,
+        snapshot_interval: float = 60,
+        **kwargs: Dict[Text, Any],
+    ) -> None:
+        super().__init__(domain, event_broker, **kwargs)
+        self.store: "OrderedDict[Text, Text]" = OrderedDict()
+        self.max_conversations = int(max_conversations)
+        self.max_events = int(max_events)
+        self.keep_turns = int(keep_turns)
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval = float(snapshot_interval)
+        self._last_snapshot = time.monotonic()
+        self._snapshot_task: Optional[asyncio.Future] = None
+        # sender id -> (events of the last saved tracker before compaction,
+        # events stored, timestamp of its last event)
+        self._saved: Dict[Text, Tuple[int, int, Optional[float]]] = {}
+
+        if self.snapshot_path:
+            self._load_snapshot()
+            atexit.register(self.write_snapshot)
+
+    async def save(self, tracker: DialogueStateTracker) -> None:
+        """Updates and saves the current conversation state."""
+        await self.stream_events(tracker)
+        events = len(tracker.events)
+        last_timestamp = tracker.events[-1].timestamp if events else None
+        tracker = self._compact(tracker)
+        self.store[tracker.sender_id] = self.serialise_tracker(tracker)
+        self.store.move_to_end(tracker.sender_id)
+        self._saved[tracker.sender_id] = (events, len(tracker.events), last_timestamp)
+
+        while len(self.store) > self.max_conversations:
+            evicted, _ = self.store.popitem(last=False)
+            self._saved.pop(evicted, None)
+            logger.debug(f"Evicted idle conversation '{evicted}' from the tracker store.")
+
+        self._maybe_snapshot()
+
+    async def stream_events(self, tracker: DialogueStateTracker) -> None:
+        """Publish the events of `tracker` that were not published yet"""
+        if self.event_broker is None:
+            return
+        events = list(tracker.events)
+        for event in events[await self._stream_offset(tracker.sender_id, events):]:
+            body = {"sender_id": tracker.sender_id}
+            body.update(event.as_dict())
+            self.event_broker.publish(body)
+
+    async def _stream_offset(self, sender_id: Text, events: List[Event]) -> int:
+        """Number of `events` published by earlier saves.
+
+        The stored tracker may be compacted while the caller goes on with the
+        uncompacted one. `events` continue the uncompacted tracker when they
+        hold its last event at the same position, otherwise the stored one.
+        """
+        saved = self._saved.get(sender_id)
+        if saved is None:
+            # Restored from a snapshot or new
+            old_tracker = await self.retrieve(sender_id)
+            return len(old_tracker.events) if old_tracker else 0
+        uncompacted, stored, last_timestamp = saved
+        if uncompacted != stored and len(events) >= uncompacted > 0 and (
+            events[uncompacted - 1].timestamp == last_timestamp
+        ):
+            return uncompacted
+        return stored
+
+    async def _retrieve(
+        self, sender_id: Text, fetch_all_sessions: bool
+    ) -> Optional[DialogueStateTracker]:
+        if sender_id in self.store:
+            self.store.move_to_end(sender_id)
+        return await super()._retrieve(sender_id, fetch_all_sessions)
+
+    def _compact(self, tracker: DialogueStateTracker) -> DialogueStateTracker:
+        """Drop everything before the last `keep_turns` user turns"""
+        events = list(tracker.events)
+        if len(events) <= self.max_events:
+            return tracker
+
+        user_turns = [i for i, e in enumerate(events) if isinstance(e, UserUttered)]
+        if len(user_turns) <= self.keep_turns:
+            return tracker
+
+        cut = user_turns[-self.keep_turns]
+        previous = events[cut - 1]
+        if isinstance(previous, ActionExecuted) and previous.action_name == ACTION_LISTEN_NAME:
+            cut -= 1
+
+        # Start a session and restore the slots so the kept turns replay to
+        # the same state
+        timestamp = events[cut].timestamp
+        prefix = [
+            ActionExecuted(ACTION_SESSION_START_NAME, timestamp=timestamp),
+            SessionStarted(timestamp=timestamp),
+        ]
+        prefix += [
+            SlotSet(name, value, timestamp=timestamp)
+            for name, value in tracker.current_slot_values().items()
+            if value is not None
+        ]
+
+        return DialogueStateTracker.from_events(
+            tracker.sender_id, prefix + events[cut:], slots=self.domain.slots
+        )
+
+    def _maybe_snapshot(self) -> None:
+        if not self.snapshot_path:
+            return
+        if time.monotonic() - self._last_snapshot < self.snapshot_interval:
+            return
+        if self._snapshot_task and not self._snapshot_task.done():
+            return
+
+        self._last_snapshot = time.monotonic()
+        # Copy on the event loop, write to disk in a worker thread
+        data = dict(self.store)
+        loop = asyncio.get_running_loop()
+        self._snapshot_task = loop.run_in_executor(None, self._write_snapshot, data)
+
+    def write_snapshot(self) -> None:
+        """Write all trackers to `snapshot_path`"""
+        if self.snapshot_path:
+            self._write_snapshot(dict(self.store))
+
+    def _write_snapshot(self, data: Dict[Text, Text]) -> None:
+        directory = os.path.dirname(self.snapshot_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Write to a temporary file and rename so a crash never leaves a
+        # half-written snapshot behind
+        tmp_path = f"{self.snapshot_path}.tmp"
+        try:
+            snapshot = {sender_id: without_secrets(serialised) for sender_id, serialised in data.items()}
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, ensure_ascii=False)
+            os.replace(tmp_path, self.snapshot_path)
+            logger.debug(f"Wrote {len(data)} trackers to '{self.snapshot_path}'.")
+        except OSError as e:
+            logger.warning(f"Could not write tracker snapshot '{self.snapshot_path}': {e}")
+
+    def _load_snapshot(self) -> None:
+        if not os.path.exists(self.snapshot_path):
+            return
+
+        try:
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read tracker snapshot '{self.snapshot_path}': {e}")
+            return
+
+        # The snapshot is in LRU order, keep the most recent conversations
+        for sender_id, serialised in list(data.items())[-self.max_conversations:]:
+            self.store[sender_id] = serialised
+        logger.info(f"Restored {len(self.store)} trackers from '{self.snapshot_path}'.")
@@ -0,0 +1,8 @@
+import os
+
+# Importing actions.api opens the shared cache; tests use their own
+os.environ.setdefault("ACTION_CACHE_PATH", "")
+os.environ.setdefault("ACTION_STORE_PATH", "")
+# No background refresh of the bucket replies, and no real API
+os.environ.setdefault("ACTION_BUCKET_REFRESH", "0")
+os.environ.setdefault("API_URL", "http://127.0.0.1:9")
@@ -0,0 +1,60 @@
+import pytest
+import requests
+
+pytest.importorskip("rasa_sdk")
+
+from rasa_sdk import Tracker  # noqa: E402
+from rasa_sdk.executor import CollectingDispatcher  # noqa: E402
+
+from actions import actions, api, deadline  # noqa: E402
+from actions.deadline import DeadlineExceeded  # noqa: E402
+
+SLOW_REPLY = "Hệ thống đang phản hồi chậm, bạn vui lòng thử lại sau giây lát nhé."
+
+
+def tracker(text, metadata=None):
+    message = {"text": text, "intent": {"name": "filter_products"}, "metadata": metadata or {}, "entities": []}
+    return Tracker("alice", {}, message, [], False, None, {}, "")
+
+
+def test_degraded_reply_without_recommendations(monkeypatch):
+    def no_time(token, limit):
+        raise DeadlineExceeded("action_search_products: 5s budget spent")
+
+    monkeypatch.setattr(actions, "get_recommendations", no_time)
+    dispatcher = CollectingDispatcher()
+    actions.utter_degraded(dispatcher, tracker("rolex"))
+    assert [message["text"] for message in dispatcher.messages] == [SLOW_REPLY]
+
+
+def test_degraded_reply_with_cached_recommendations(monkeypatch):
+    recommendations = [{"id": 1, "name": "Casio MTP", "base_price": 1500000}]
+    monkeypatch.setattr(
+        actions, "get_recommendations",
+        lambda token, limit: {"data": {"data": {"recommendations": recommendations}}},
+    )
+    dispatcher = CollectingDispatcher()
+    actions.utter_degraded(dispatcher, tracker("rolex"))
+    (message,) = dispatcher.messages
+    assert message["custom"]["type"] == "cards"
+    assert len(message["custom"]["cards"]) == 1
+
+
+def test_search_past_its_deadline_replies_degraded(monkeypatch):
+    monkeypatch.setattr(api, "cache", None)
+    monkeypatch.setattr(deadline, "ACTION_DEADLINES", {"action_filter_products": 1.0})
+    requested = []
+
+    def timeout(url, **kwargs):
+        requested.append((url, kwargs["timeout"]))
+        raise requests.exceptions.ReadTimeout(url)
+
+    monkeypatch.setattr(api.session, "get", timeout)
+    dispatcher = CollectingDispatcher()
+    events = actions.ActionFilterProducts().run(dispatcher, tracker("lọc", {"brand_id": 7}), {})
+
+    assert events == []
+    assert [message["text"] for message in dispatcher.messages] == [SLOW_REPLY]
+    # The search, then the recommendations, each within the 1s budget
+    assert [url.rsplit("/v1", 1)[1] for url, _ in requested] == ["/search", "/recommendations/public"]
+    assert all(seconds <= 1.0 for _, seconds in requested)
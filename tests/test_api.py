@@ -0,0 +1,86 @@
+import pytest
+import requests
+
+from actions import api
+from actions.deadline import DeadlineExceeded
+from actions.shared_cache import SharedCache
+
+
+def response(body, status=200, headers=None):
+    reply = requests.Response()
+    reply.status_code = status
+    reply._content = body
+    reply.headers.update(headers or {})
+    return reply
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    shared = SharedCache(str(tmp_path / "cache.bin"), slots=16, slot_size=4096)
+    monkeypatch.setattr(api, "cache", shared)
+    monkeypatch.setattr(api, "validators", api.ConditionalCache())
+    return shared
+
+
+def serve(monkeypatch, *replies):
+    """api._request answers with `replies` in turn, exceptions are raised"""
+    calls = []
+
+    def request(path, headers, params):
+        reply = replies[len(calls)]
+        calls.append(headers)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    monkeypatch.setattr(api, "_request", request)
+    return calls
+
+
+def test_cached_responses_are_not_requested_again(cache, monkeypatch):
+    calls = serve(monkeypatch, response(b'{"brands": [1]}'))
+    assert api.get_json("/v1/brands", ttl=60) == {"brands": [1]}
+    assert api.get_json("/v1/brands", ttl=60) == {"brands": [1]}
+    assert len(calls) == 1
+
+
+def test_expired_response_is_served_when_the_deadline_is_spent(cache, monkeypatch):
+    calls = serve(
+        monkeypatch,
+        response(b'{"brands": [1]}', headers={"ETag": '"v1"'}),
+        DeadlineExceeded("/v1/brands: no reply within the 0.10s left"),
+    )
+    assert api.get_json("/v1/brands", ttl=60) == {"brands": [1]}
+    cache.clear()
+    assert api.get_json("/v1/brands", ttl=60) == {"brands": [1]}
+    # The second request was conditional
+    assert calls[1].get("If-None-Match") == '"v1"'
+
+
+def test_per_user_responses_are_never_served_stale(cache, monkeypatch):
+    serve(
+        monkeypatch,
+        response(b'{"orders": [1]}', headers={"ETag": '"v1"'}),
+        DeadlineExceeded("/v1/orders: no reply within the 0.10s left"),
+    )
+    api.get_json("/v1/orders", token="jwt", ttl=60, per_user=True)
+    cache.clear()
+    with pytest.raises(DeadlineExceeded):
+        api.get_json("/v1/orders", token="jwt", ttl=60, per_user=True)
+
+
+def test_not_modified_reuses_the_previous_response(cache, monkeypatch):
+    serve(
+        monkeypatch,
+        response(b'{"brands": [1]}', headers={"ETag": '"v1"'}),
+        response(b"", status=304),
+    )
+    first = api.get_json("/v1/brands", ttl=60)
+    cache.clear()
+    assert api.get_json("/v1/brands", ttl=60) is first
+
+
+def test_other_errors_are_raised(cache, monkeypatch):
+    serve(monkeypatch, response(b"", status=503))
+    with pytest.raises(requests.HTTPError):
+        api.get_json("/v1/brands", ttl=60)
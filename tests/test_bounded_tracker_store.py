@@ -0,0 +1,32 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("rasa")
+
+from rasa.shared.core.domain import Domain  # noqa: E402
+from rasa.shared.core.events import UserUttered  # noqa: E402
+from rasa.shared.core.trackers import DialogueStateTracker  # noqa: E402
+
+from stores.bounded_tracker_store import BoundedTrackerStore  # noqa: E402
+
+
+def test_save_writes_snapshot(tmp_path):
+    snapshot_path = tmp_path / "trackers.json"
+
+    async def save_trackers() -> BoundedTrackerStore:
+        store = BoundedTrackerStore(Domain.empty(), snapshot_path=str(snapshot_path), snapshot_interval=0)
+        for sender_id in ("alice", "bob"):
+            tracker = DialogueStateTracker(sender_id, slots=[])
+            tracker.update(UserUttered("xin chào", metadata={"token": "secret-jwt"}))
+            await store.save(tracker)
+            await store._snapshot_task
+        return store
+
+    asyncio.run(save_trackers())
+
+    assert snapshot_path.exists()
+    snapshot = json.loads(snapshot_path.read_text(encoding="utf-8"))
+    assert set(snapshot) == {"alice", "bob"}
+    assert "secret-jwt" not in snapshot_path.read_text(encoding="utf-8")
@@ -0,0 +1,70 @@
+import time
+
+import pytest
+import requests
+
+from actions import deadline
+from actions.deadline import Deadline, DeadlineExceeded, request_timeout, with_deadline
+
+
+class Inner:
+    def name(self):
+        return "inner"
+
+    @with_deadline
+    def run(self):
+        return deadline._current.get()
+
+
+class Outer:
+    def name(self):
+        return "outer"
+
+    @with_deadline
+    def run(self):
+        return deadline._current.get(), Inner().run()
+
+
+class Slow:
+    def name(self):
+        return "slow"
+
+    @with_deadline
+    def run(self, seconds):
+        time.sleep(seconds)
+        return request_timeout(10)
+
+
+@pytest.fixture(autouse=True)
+def deadlines(monkeypatch):
+    monkeypatch.setattr(deadline, "ACTION_DEADLINES", {"outer": 2.0, "inner": 8.0, "slow": 0.3})
+
+
+def test_nested_actions_share_the_outer_budget():
+    outer, inner = Outer().run()
+    assert inner is outer
+    assert outer.name == "outer" and outer.seconds == 2.0
+    assert Inner().run().seconds == 8.0
+    assert deadline._current.get() is None
+
+
+def test_requests_get_the_time_left():
+    assert request_timeout(10) == 10
+    assert 0 < Slow().run(0) <= 0.3
+
+
+def test_spent_budget_raises_a_requests_timeout():
+    with pytest.raises(DeadlineExceeded) as error:
+        Slow().run(0.1)
+    assert isinstance(error.value, requests.exceptions.Timeout)
+    assert "slow" in str(error.value)
+    assert deadline._current.get() is None
+
+
+def test_deadline_timeout():
+    budget = Deadline(0.3, "search")
+    assert budget.timeout(0.1) == 0.1
+    assert budget.timeout(10) <= 0.3
+    budget.expires_at = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        budget.timeout(10)
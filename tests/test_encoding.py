@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+from actions.encoding import CardCache, EncodedCard, dumps, encode_card, install_reply_encoding
+
+
+def build(item):
+    return {"id": item["id"], "title": item["name"], "tags": ["mới"]}
+
+
+def decoded(value):
+    body = dumps(value)
+    return json.loads(body)
+
+
+def test_miss_returns_a_card_the_cache_does_not_share():
+    cache = CardCache(build)
+    card = cache.card({"id": 1, "name": "Casio"})
+    card["title"] = "changed"
+    assert cache.card({"id": 1, "name": "Casio"})["title"] == "Casio"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_cached_cards_are_read_only():
+    cache = CardCache(build)
+    cache.card({"id": 1, "name": "Casio"})
+    card = cache.card({"id": 1, "name": "Casio"})
+    assert isinstance(card, EncodedCard)
+    with pytest.raises(TypeError):
+        card["title"] = "changed"
+    with pytest.raises(TypeError):
+        card.update(title="changed")
+    copy = dict(card)
+    copy["title"] = "changed"
+    assert cache.card({"id": 1, "name": "Casio"})["title"] == "Casio"
+
+
+def test_changed_items_get_a_new_card():
+    cache = CardCache(build)
+    cache.card({"id": 1, "name": "Casio"})
+    assert cache.card({"id": 1, "name": "Casio G-Shock"})["title"] == "Casio G-Shock"
+    assert cache.misses == 2
+
+
+def test_least_recently_used_cards_are_dropped():
+    cache = CardCache(build, max_entries=2)
+    cache.cards([{"id": 1, "name": "a"}, {"id": 2, "name": "b"}])
+    cache.card({"id": 1, "name": "a"})
+    cache.card({"id": 3, "name": "c"})
+    cache.cards([{"id": 1, "name": "a"}, {"id": 2, "name": "b"}])
+    assert (cache.hits, cache.misses) == (2, 4)
+
+
+def test_cards_encode_like_plain_dicts():
+    cache = CardCache(build)
+    items = [{"id": 1, "name": "Đồng hồ"}, {"id": None, "name": "no id"}]
+    first = cache.cards(items)
+    again = cache.cards(items)
+    expected = {"cards": [build(item) for item in items]}
+    assert decoded({"cards": first}) == decoded({"cards": again}) == expected
+    assert decoded([encode_card({"a": 1})]) == [{"a": 1}]
+
+
+def test_reply_encoding_only_replaces_the_action_endpoint():
+    endpoint = pytest.importorskip("rasa_sdk.endpoint")
+    sanic_response = pytest.importorskip("sanic.response")
+    original = endpoint.response
+    try:
+        assert install_reply_encoding()
+        reply = endpoint.response.json({"text": "Đồng hồ"})
+        assert reply.body == '{"text":"Đồng hồ"}'.encode("utf-8")
+        assert sanic_response.json({"text": "Đồng hồ"}).body != reply.body
+    finally:
+        endpoint.response = original
@@ -0,0 +1,81 @@
+import threading
+import time
+
+from actions.hedging import MIN_SAMPLES, HedgeBudget, Hedger, LatencyWindow, percentile
+
+
+def test_percentile():
+    assert percentile([5, 1, 4, 2, 3], 50) == 3
+    assert percentile([5, 1, 4, 2, 3], 100) == 5
+    assert percentile([7], 1) == 7
+
+
+def test_latency_window_keeps_the_last_latencies():
+    window = LatencyWindow(size=3)
+    assert window.percentile(99) is None
+    for seconds in (9, 1, 2, 3):
+        window.add(seconds)
+    assert len(window) == 3
+    assert window.percentile(100) == 3
+
+
+def test_empty_budget_refuses_hedges():
+    budget = HedgeBudget(rate=0.5, burst=1)
+    assert not budget.spend()
+    budget.earn()
+    assert not budget.spend()
+    budget.earn()
+    assert budget.spend()
+    assert not budget.spend()
+
+
+def test_budget_saves_up_to_the_burst():
+    budget = HedgeBudget(rate=1, burst=2)
+    for _ in range(5):
+        budget.earn()
+    assert [budget.spend() for _ in range(3)] == [True, True, False]
+
+
+def warm_up(hedger, name):
+    for _ in range(MIN_SAMPLES):
+        hedger.run(name, lambda: "fast")
+
+
+def test_slow_request_is_hedged_and_the_hedge_wins():
+    hedger = Hedger(max_rate=1, percent=95, min_delay=0.01)
+    warm_up(hedger, "/v1/search")
+    calls = []
+    lock = threading.Lock()
+
+    def send():
+        with lock:
+            calls.append(len(calls))
+            first = len(calls) == 1
+        if first:
+            time.sleep(0.5)
+            return "slow"
+        return "hedge"
+
+    assert hedger.run("/v1/search", send) == "hedge"
+    assert (hedger.hedged, hedger.won, hedger.denied) == (1, 1, 0)
+
+
+def test_slow_request_is_waited_for_without_budget():
+    hedger = Hedger(max_rate=0.01, percent=95, min_delay=0.01)
+    warm_up(hedger, "/v1/search")
+    calls = []
+
+    def send():
+        calls.append(1)
+        time.sleep(0.1)
+        return "slow"
+
+    assert hedger.run("/v1/search", send) == "slow"
+    assert len(calls) == 1
+    assert (hedger.hedged, hedger.denied) == (0, 1)
+
+
+def test_disabled_hedging_sends_once():
+    hedger = Hedger(max_rate=0)
+    assert hedger.run("/v1/search", lambda: "reply") == "reply"
+    assert hedger.requests == 0
@@ -0,0 +1,56 @@
+import pytest
+
+from actions.lexicon import PREFIX, SUBSTRING, Lexicon, search_lexicon, strap_material_lexicon
+from actions.parsing import parse_gender, parse_price, parse_rating
+
+
+def phrases(hits, category):
+    return [(hit.phrase, hit.start, hit.end) for hit in hits.get(category, [])]
+
+
+def test_match_modes():
+    lexicon = Lexicon([
+        ("word", "nam", "nam"),
+        ("prefix", "nam", "0", PREFIX),
+        ("substring", "m", "m", SUBSTRING),
+    ])
+    hits = lexicon.scan("Hà Nam namtinh 2m4")
+    assert phrases(hits, "word") == [("nam", 3, 6)]
+    assert phrases(hits, "prefix") == [("nam", 3, 6), ("nam", 7, 10)]
+    assert [hit.start for hit in hits["substring"]] == [5, 9, 16]
+
+
+def test_unknown_match_mode():
+    with pytest.raises(ValueError):
+        Lexicon([("price_word", "giá", "giá", "fuzzy")])
+
+
+def test_search_lexicon_categories():
+    hits = search_lexicon().scan("đồng hồ cổ điển giá rẻ nhất")
+    assert [hit.phrase for hit in hits["vague_price"]] == ["giá rẻ", "rẻ", "rẻ nhất"]
+    assert [hit.phrase for hit in hits["style"]] == ["cổ điển"]
+    assert "price_word" in hits
+    assert "rating_word" not in hits
+
+
+def test_strap_materials_need_the_strap():
+    lexicon = strap_material_lexicon(("da", "thép"))
+    assert [hit.value for hit in lexicon.scan("đồng hồ dây da").get("strap_material", [])] == [0]
+    assert "strap_material" not in lexicon.scan("đồng hồ da trắng")
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("đồng hồ nam", "0"),
+    ("Đồng hồ NỮ", "1"),
+    ("nữ và nam", "1"),
+    ("Hà Nam", "0"),
+    ("đồng hồ thể thao", None),
+])
+def test_gender(text, expected):
+    assert parse_gender(text) == expected
+
+
+def test_rating_keywords_without_price_keywords_skip_the_price():
+    assert parse_price("từ 4 sao trở lên") is None
+    assert parse_rating("từ 4 sao trở lên") == 4
+    assert parse_price("4 sao dưới 2 triệu") == (0, 2000000)
@@ -0,0 +1,49 @@
+import pytest
+
+from actions.normalizer import match_name, normalize_query
+
+CATEGORIES = [{"id": 1, "name": "Đồng hồ nam"}, {"id": 2, "name": "Đồng hồ nữ"}]
+COLORS = [{"id": 1, "name": "Đen"}, {"id": 2, "name": "Vàng gold"}, {"id": 3, "name": "Hồng"}]
+
+
+def match(text, items, **kwargs):
+    return match_name(normalize_query(text), items, **kwargs).get("id")
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("tìm đồng hồ nam", 1),
+    ("dong ho nu", 2),
+    ("đồng hồ việt nam sản xuất", None),
+    ("cho tôi xem mẫu nam", None),
+])
+def test_category_names_keep_stop_words(text, expected):
+    assert match(text, CATEGORIES) == expected
+
+
+def test_names_of_stop_words_only_never_match():
+    items = [{"id": 1, "name": "Đồng hồ"}, {"id": 2, "name": "Sản phẩm"}, {"id": 3, "name": ""}]
+    assert match("đồng hồ sản phẩm mới", items) is None
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("đồng hồ màu gold", 2),
+    ("dây yellow", 2),
+    ("mau den", 1),
+    # One-word names without diacritics only match unaccented words
+    ("khi nào đến", None),
+    ("máy bị hỏng", None),
+])
+def test_color_names(text, expected):
+    assert match(text, COLORS) == expected
+
+
+def test_one_shared_synonym_does_not_select_a_longer_name():
+    brands = [{"id": 1, "name": "Gold Star"}]
+    assert match("đồng hồ gold", brands) is None
+    assert match("đồng hồ gold star", brands) == 1
+
+
+def test_fuzzy_brand_names():
+    brands = [{"id": 1, "name": "Rolex"}, {"id": 2, "name": "Casio"}]
+    assert match("đồng hồ rolx", brands, fuzzy=True) == 1
+    assert match("đồng hồ rolx", brands) is None
@@ -0,0 +1,51 @@
+import threading
+import time
+
+from actions.prefetch import Prefetcher
+
+
+def wait_idle(prefetcher):
+    prefetcher._executor.shutdown(wait=True)
+
+
+def test_most_clicked_options_are_prefetched_first():
+    fetched = []
+    prefetcher = Prefetcher(lambda token, request: fetched.append(request), lambda key: False, per_message=2)
+    for _ in range(3):
+        prefetcher.requested("c")
+    prefetcher.requested("b")
+    assert prefetcher.prefetch(None, [("a", "A"), ("b", "B"), ("c", "C")]) == 2
+    wait_idle(prefetcher)
+    assert sorted(fetched) == ["B", "C"]
+
+
+def test_prefetched_keys_are_used_once_and_expire():
+    prefetcher = Prefetcher(lambda token, request: None, lambda key: False, ttl=0.1)
+    prefetcher.prefetch(None, [("a", "A")])
+    wait_idle(prefetcher)
+    assert prefetcher.requested("a")
+    assert not prefetcher.requested("a")
+    assert prefetcher.stats()["hit_rate"] == 1.0
+
+
+def test_cached_options_are_not_prefetched():
+    prefetcher = Prefetcher(lambda token, request: None, lambda key: key == "a")
+    assert prefetcher.prefetch(None, [("a", "A"), ("b", "B")]) == 1
+
+
+def test_counters_under_concurrent_prefetches():
+    def fetch(token, request):
+        time.sleep(0.001)
+        if request % 2:
+            raise ValueError("API down")
+
+    prefetcher = Prefetcher(fetch, lambda key: False, per_message=4, max_pending=1000, max_workers=8)
+    options = [[(f"key{i}-{j}", j) for j in range(4)] for i in range(50)]
+    threads = [threading.Thread(target=prefetcher.prefetch, args=(None, batch)) for batch in options]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wait_idle(prefetcher)
+    stats = prefetcher.stats()
+    assert (stats["submitted"], stats["failed"]) == (200, 100)
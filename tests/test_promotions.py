@@ -0,0 +1,129 @@
+import datetime
+import threading
+import time
+
+import pytest
+
+from actions import promotions
+from actions.promotions import PromotionCache, parse_api_time
+
+VIETNAM = datetime.timezone(datetime.timedelta(hours=7))
+
+
+@pytest.fixture
+def host_timezone(monkeypatch):
+    """Run with the host in another timezone than the API"""
+    if not hasattr(time, "tzset"):
+        pytest.skip("time.tzset is not available")
+    monkeypatch.setenv("TZ", "America/New_York")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_api_times_are_in_the_api_timezone(host_timezone):
+    assert parse_api_time("20251017") == datetime.datetime(2025, 10, 17, tzinfo=VIETNAM).timestamp()
+    assert parse_api_time("20251017", end=True) == datetime.datetime(2025, 10, 18, tzinfo=VIETNAM).timestamp()
+    assert parse_api_time("2025-10-17 18:22:36") == (
+        datetime.datetime(2025, 10, 17, 18, 22, 36, tzinfo=VIETNAM).timestamp()
+    )
+    assert parse_api_time("") is None
+    assert parse_api_time("20251399") is None
+
+
+def discount(id, starts=None, ends=None):
+    def api_date(moment):
+        return datetime.datetime.fromtimestamp(moment, VIETNAM).strftime("%Y%m%d%H%M%S") if moment else None
+
+    return {"id": id, "name": f"Giảm {id}", "effective_date": api_date(starts), "valid_until": api_date(ends)}
+
+
+class SlowApi:
+    def __init__(self, *downloads):
+        self.downloads = list(downloads)
+        self.tokens = []
+        self.lock = threading.Lock()
+
+    def __call__(self, token, refresh):
+        time.sleep(0.3)
+        with self.lock:
+            self.tokens.append(token)
+            return self.downloads[min(len(self.tokens), len(self.downloads)) - 1]
+
+
+def concurrently(function, count=8):
+    results = [None] * count
+
+    def run(i):
+        results[i] = function(i)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def wait_for_reload(cache):
+    deadline = time.monotonic() + 5
+    while cache._reloading and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_concurrent_first_queries_download_once():
+    api = SlowApi([discount(1)])
+    cache = PromotionCache(api)
+    results = concurrently(lambda i: cache.cards(f"token{i}"))
+    assert cache.downloads == 1 and len(api.tokens) == 1
+    assert all(len(cards) == 1 for cards in results)
+
+
+def test_queries_after_the_next_change_reload_once_with_a_query_token():
+    ends = time.time() + 3600
+    api = SlowApi([discount(1, ends=ends)], [discount(2)])
+    cache = PromotionCache(api)
+    assert [card["id"] for card in cache.cards("first")] == [1]
+    assert cache.next_change() == pytest.approx(ends, abs=1)
+
+    cache._reload_at = time.time()
+    # Served at once from the loaded cards while one query reloads them
+    start = time.monotonic()
+    results = concurrently(lambda i: [card["id"] for card in cache.cards(f"token{i}")])
+    assert time.monotonic() - start < 0.2
+    assert results == [[1]] * 8
+
+    wait_for_reload(cache)
+    assert cache.downloads == 2
+    assert api.tokens[0] == "first" and api.tokens[1].startswith("token")
+    assert [card["id"] for card in cache.cards("later")] == [2]
+    assert cache.downloads == 2
+
+
+def test_ended_discounts_are_left_out():
+    now = time.time()
+    cache = PromotionCache(lambda token, refresh: [
+        discount(1, ends=now - 60), discount(2, starts=now - 60), discount(3, starts=now + 60),
+    ])
+    assert [card["id"] for card in cache.cards("first")] == [2]
+    assert cache.next_change() == pytest.approx(now + 60, abs=1)
+
+
+def test_failed_reload_is_retried_later(monkeypatch):
+    calls = []
+
+    def download(token, refresh):
+        calls.append(refresh)
+        if refresh:
+            raise ConnectionError("API down")
+        return [discount(1)]
+
+    cache = PromotionCache(download, max_age=0)
+    cache.cards("first")
+    cache.cards("second")
+    wait_for_reload(cache)
+    assert calls == [False, True]
+    assert cache._reload_at > time.time() + promotions.RETRY_DELAY - 5
+    assert [card["id"] for card in cache.cards("third")] == [1]
+    assert calls == [False, True]
@@ -0,0 +1,99 @@
+import json
+import time
+
+import pytest
+
+from actions.refinement import MIN_LOCAL_RESULTS, RefinementStore, SearchState, merge_filters
+from actions.shared_cache import SharedCache
+
+WATCHES = [
+    {"id": i, "brand_id": 1, "strap_material_id": 2 if i % 2 else 3, "rating": i % 5, "base_price": i * 1000000}
+    for i in range(1, 11)
+]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return RefinementStore(SharedCache(str(tmp_path / "cache.bin"), slots=16, slot_size=8192))
+
+
+def as_slot(value):
+    """The slot value after a trip through the tracker (JSON)"""
+    return json.loads(json.dumps(value))
+
+
+@pytest.mark.parametrize("previous, filters, merged", [
+    ({"brand_id": 1}, {"strap_material_id": 2}, {"brand_id": 1, "strap_material_id": 2}),
+    ({"brand_id": 1}, {"brand_id": "1"}, {"brand_id": "1"}),
+    ({"price_range": (0, 5000000)}, {"price_range": (1000000, 3000000)}, {"price_range": (1000000, 3000000)}),
+    # Metadata sends ratings as strings, entities as ints
+    ({"rating_min": "3"}, {"rating_min": 4}, {"rating_min": 4}),
+    ({"rating_min": 3}, {"rating_min": "3"}, {"rating_min": "3"}),
+])
+def test_merge_narrows(previous, filters, merged):
+    assert merge_filters(previous, filters) == merged
+
+
+@pytest.mark.parametrize("previous, filters", [
+    ({"brand_id": 1}, {"brand_id": 2}),
+    ({"price_range": (0, 5000000)}, {"price_range": (0, 10000000)}),
+    ({"price_range": (1000000, 5000000)}, {"price_range": (0, 5000000)}),
+    ({"price_range": (0, 5000000)}, {"price_range": (1000000, None)}),
+    ({"rating_min": "4"}, {"rating_min": 3}),
+    ({"rating_min": 4}, {"rating_min": "1"}),
+])
+def test_merge_rejects_wider_or_other_filters(previous, filters):
+    assert merge_filters(previous, filters) is None
+
+
+def test_missing_or_expired_slot_is_no_search(store):
+    assert store.load("alice", None) is None
+    assert store.load("alice", "not a search") is None
+    slot = as_slot(store.save("alice", SearchState({"brand_id": 1}, {}, WATCHES, True)))
+    slot["expires_at"] = time.time() - 1
+    assert store.load("alice", slot) is None
+
+
+def test_refinement_on_top_of_the_last_search(store):
+    slot = as_slot(store.save("alice", SearchState({"brand_id": 1}, {"brand_id": "Rolex"}, WATCHES, True)))
+    previous = store.load("alice", slot)
+    assert previous.items == WATCHES
+
+    search = store.refine(previous, {"strap_material_id": 2}, {"strap_material_id": "dây da"})
+    assert search.filters == {"brand_id": 1, "strap_material_id": 2}
+    assert search.labels == {"brand_id": "Rolex", "strap_material_id": "dây da"}
+    assert [item["id"] for item in search.items] == [1, 3, 5, 7, 9]
+    assert store.local == 1
+
+    # The narrowed search is the last search of the next turn
+    slot = as_slot(store.save("alice", search))
+    search = store.refine(store.load("alice", slot), {"price_range": (0, 5000000)}, {})
+    assert [item["id"] for item in search.items] == [1, 3, 5]
+    assert search.filters["price_range"] == (0, 5000000)
+
+
+def test_too_few_local_items_ask_the_api(store):
+    slot = as_slot(store.save("alice", SearchState({"brand_id": 1}, {}, WATCHES, False)))
+    search = store.refine(store.load("alice", slot), {"rating_min": "4"}, {})
+    assert len([w for w in WATCHES if w["rating"] >= 4]) < MIN_LOCAL_RESULTS
+    assert search.items is None and not search.complete
+    assert store.remote == 1
+
+
+def test_items_of_another_host_are_fetched_again(tmp_path, store):
+    slot = as_slot(store.save("alice", SearchState({"brand_id": 1}, {}, WATCHES, True)))
+    other_host = RefinementStore(SharedCache(str(tmp_path / "other.bin"), slots=16, slot_size=8192))
+    previous = other_host.load("alice", slot)
+    assert previous.filters == {"brand_id": 1} and previous.items is None
+    assert other_host.refine(previous, {"strap_material_id": 2}, {}).items is None
+
+
+def test_clearing_refinement_starts_a_new_search(store):
+    slot = as_slot(store.save("alice", SearchState({"brand_id": 1, "rating_min": 4}, {}, WATCHES, True)))
+    previous = store.load("alice", slot)
+    assert store.refine(previous, {"brand_id": 2}, {}) is None
+    assert store.replaces(previous, {"brand_id": 2})
+    assert store.replaces(None, {"brand_id": 1})
+    # Repeating the filters is not a refinement either
+    assert store.replaces(previous, {"brand_id": 1, "rating_min": 4})
+    assert not store.replaces(previous, {"strap_material_id": 2})
@@ -0,0 +1,76 @@
+import sqlite3
+import time
+
+from actions.response_store import ResponseStore
+
+
+def stored_keys(store):
+    with sqlite3.connect(store.path) as connection:
+        return {key for (key,) in connection.execute("SELECT key FROM responses")}
+
+
+def total(store):
+    with sqlite3.connect(store.path) as connection:
+        return connection.execute("SELECT total FROM responses_size").fetchone()[0]
+
+
+def test_get_returns_value_and_remaining_ttl(tmp_path):
+    store = ResponseStore(str(tmp_path / "responses.sqlite3"))
+    store.put("/v1/brands", {"brands": ["Casio"]}, ttl=60)
+    store.flush()
+    value, remaining = store.get("/v1/brands")
+    assert value == {"brands": ["Casio"]}
+    assert 0 < remaining <= 60
+    assert store.get("/v1/colors") is None
+
+
+def test_expired_rows_are_not_returned(tmp_path):
+    store = ResponseStore(str(tmp_path / "responses.sqlite3"))
+    store.put("/v1/brands", [1], ttl=0.05)
+    store.flush()
+    time.sleep(0.1)
+    assert store.get("/v1/brands") is None
+
+
+def test_size_counts_utf8_bytes(tmp_path):
+    store = ResponseStore(str(tmp_path / "responses.sqlite3"))
+    store.put("vi", "Đồng hồ", ttl=60)
+    store.flush()
+    # '"Đồng hồ"': 9 characters, 14 bytes
+    assert total(store) == 14
+
+
+def test_eviction_drops_expired_rows_first(tmp_path):
+    store = ResponseStore(str(tmp_path / "responses.sqlite3"), max_bytes=250)
+    store.put("expired", "x" * 100, ttl=0.05)
+    store.put("fresh", "x" * 100, ttl=60)
+    store.flush()
+    time.sleep(0.1)
+    store.put("new", "x" * 100, ttl=60)
+    store.flush()
+    assert stored_keys(store) == {"fresh", "new"}
+    assert total(store) == 2 * 102
+
+
+def test_eviction_drops_least_recently_used_rows(tmp_path):
+    store = ResponseStore(str(tmp_path / "responses.sqlite3"), max_bytes=350)
+    for key in ("a", "b", "c"):
+        store.put(key, "x" * 100, ttl=60)
+        store.flush()
+        time.sleep(0.01)
+    # "a" is read, "b" is now the least recently used
+    assert store.get("a") is not None
+    store.flush()
+    store.put("d", "x" * 100, ttl=60)
+    store.flush()
+    assert stored_keys(store) == {"a", "c", "d"}
+
+
+def test_reopened_store_keeps_rows_and_size(tmp_path):
+    path = str(tmp_path / "responses.sqlite3")
+    store = ResponseStore(path)
+    store.put("/v1/brands", [1, 2], ttl=60)
+    store.flush()
+    reopened = ResponseStore(path)
+    assert reopened.get("/v1/brands")[0] == [1, 2]
+    assert total(reopened) == len("[1,2]")
@@ -0,0 +1,86 @@
+import time
+
+import pytest
+
+from actions import shared_cache
+from actions.shared_cache import PROBES, SharedCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SharedCache(str(tmp_path / "cache.bin"), slots=16, slot_size=512)
+
+
+def test_set_and_get(cache):
+    assert cache.set("/v1/brands", {"brands": ["Casio", "Đồng Nai"]}, ttl=60)
+    assert cache.get("/v1/brands") == {"brands": ["Casio", "Đồng Nai"]}
+    assert cache.get("/v1/colors") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_values_larger_than_a_slot_are_not_cached(cache):
+    assert not cache.set("big", "x" * 1024, ttl=60)
+    assert cache.get("big") is None
+
+
+def test_entries_expire(cache):
+    cache.set("short", 1, ttl=0.05)
+    cache.set("long", 2, ttl=60)
+    time.sleep(0.1)
+    assert cache.get("short") is None
+    assert cache.get("long") == 2
+    assert cache.stats()["entries"] == 1
+
+
+def test_full_slots_replace_the_entry_that_expires_first(tmp_path):
+    # With as many slots as probes every key may use every slot
+    cache = SharedCache(str(tmp_path / "cache.bin"), slots=PROBES, slot_size=512)
+    for i in range(PROBES):
+        cache.set(f"key{i}", i, ttl=60 + i)
+    cache.set("new", "new", ttl=600)
+    assert cache.get("key0") is None
+    assert [cache.get(f"key{i}") for i in range(1, PROBES)] == list(range(1, PROBES))
+    assert cache.get("new") == "new"
+
+
+def test_other_processes_see_the_entries(tmp_path):
+    path = str(tmp_path / "cache.bin")
+    SharedCache(path, slots=16, slot_size=512).set("key", "value", ttl=60)
+    # A later process keeps the layout of the file, not its own settings
+    other = SharedCache(path, slots=64, slot_size=4096)
+    assert (other.slots, other.slot_size) == (16, 512)
+    assert other.get("key") == "value"
+
+
+def test_read_retries_when_a_writer_changed_the_slot(cache, monkeypatch):
+    cache.set("key", "old", ttl=60)
+    sequence = shared_cache.SEQUENCE
+
+    class WriterBetweenReads:
+        """Rewrites the slot after the reader copied it, before its check"""
+
+        calls = 0
+
+        def unpack_from(self, buffer, offset):
+            self.calls += 1
+            if self.calls == 2:
+                monkeypatch.setattr(shared_cache, "SEQUENCE", sequence)
+                cache.set("key", "new", ttl=60)
+                monkeypatch.setattr(shared_cache, "SEQUENCE", self)
+            return sequence.unpack_from(buffer, offset)
+
+    reads = WriterBetweenReads()
+    monkeypatch.setattr(shared_cache, "SEQUENCE", reads)
+    assert cache.get("key") == "new"
+    # First copy, its check, second copy, its check
+    assert reads.calls == 4
+
+
+def test_slot_being_written_reads_as_missing(cache):
+    cache.set("key", "value", ttl=60)
+    offset = cache._find(b"key", shared_cache._hash_key(b"key"))
+    (sequence,) = shared_cache.SEQUENCE.unpack_from(cache._mmap, offset)
+    shared_cache.SEQUENCE.pack_into(cache._mmap, offset, sequence + 1)
+    assert cache.get("key") is None
+    shared_cache.SEQUENCE.pack_into(cache._mmap, offset, sequence + 2)
+    assert cache.get("key") == "value"